@@ -0,0 +1,198 @@
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+from dotenv import load_dotenv
+
+from app.agents.metrics import alternate_pool_refills_total, alternate_pool_requests_total
+from app.agents.structured_logging import get_logger
+
+load_dotenv()
+
+log = get_logger("alternate_pool")
+
+ALT_POOL_ENABLED = os.getenv("ALT_POOL_ENABLED", "true").lower() in ("1", "true", "yes")
+# Alternates generated per day by one refill call
+ALT_POOL_SIZE = int(os.getenv("ALT_POOL_SIZE", "5"))
+# Refill a day in the background once it has this many alternates left
+ALT_POOL_LOW_WATER = int(os.getenv("ALT_POOL_LOW_WATER", "2"))
+ALT_POOL_MAX_PLANS = int(os.getenv("ALT_POOL_MAX_PLANS", "256"))
+ALT_POOL_TTL = float(os.getenv("ALT_POOL_TTL", "3600"))
+# Word overlap (Jaccard) at which an alternate counts as "similar" to an excluded idea
+ALT_POOL_SIMILARITY = float(os.getenv("ALT_POOL_SIMILARITY", "0.6"))
+
+_WORDS_RE = re.compile(r"[a-z0-9]+")
+
+def _words(text: str) -> frozenset:
+    return frozenset(_WORDS_RE.findall(text.lower()))
+
+def is_similar(a: str, b: str, threshold: float = ALT_POOL_SIMILARITY) -> bool:
+    """True for the same idea, or ideas sharing most of their words."""
+    words_a, words_b = _words(a), _words(b)
+    if not words_a or not words_b:
+        return a.strip().lower() == b.strip().lower()
+    return len(words_a & words_b) / len(words_a | words_b) >= threshold
+
+class _PlanPool:
+    def __init__(self):
+        self.ideas = {}      # day -> deque of unserved alternates
+        self.seen = {}       # day -> ideas already shown (served or excluded), never served again
+        self.touched = time.monotonic()
+
+class AlternatePool:
+    """
+    Pre-generated alternate ideas per (topic, audience) plan and day.
+
+    `fill(topic, audience, days, avoid)` produces {day: [ideas]} with one LLM call (and
+    `fill_async` the same without blocking the loop). take() serves from the pool and starts a
+    background refill when a day runs low, so most Regenerate clicks need no network call.
+    """
+
+    def __init__(self, fill, fill_async=None, size: int = ALT_POOL_SIZE, low_water: int = ALT_POOL_LOW_WATER,
+                 max_plans: int = ALT_POOL_MAX_PLANS, ttl: float = ALT_POOL_TTL, enabled: bool = ALT_POOL_ENABLED):
+        self.fill = fill
+        self.fill_async = fill_async
+        self.size = size
+        self.low_water = low_water
+        self.max_plans = max_plans
+        self.ttl = ttl
+        self.enabled = enabled
+        self._plans = OrderedDict()
+        self._refilling = set()
+        self._background_tasks = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(topic: str, audience: str) -> tuple:
+        return " ".join(topic.lower().split()), " ".join(audience.lower().split())
+
+    def _plan(self, key: tuple) -> _PlanPool:
+        # Caller holds self._lock
+        plan = self._plans.get(key)
+        now = time.monotonic()
+        if plan is None or now - plan.touched > self.ttl:
+            plan = self._plans[key] = _PlanPool()
+        plan.touched = now
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.max_plans:
+            self._plans.popitem(last=False)
+        return plan
+
+    def _take(self, topic: str, audience: str, day: str, exclude: str):
+        """Pop an alternate for the day; returns (idea or None, days needing a refill)."""
+        key = self._key(topic, audience)
+        with self._lock:
+            plan = self._plan(key)
+            seen = plan.seen.setdefault(day, [])
+            if exclude and exclude not in seen:
+                seen.append(exclude)
+            queue = plan.ideas.setdefault(day, deque())
+            idea = None
+            while queue:
+                candidate = queue.popleft()
+                if not any(is_similar(candidate, shown) for shown in seen):
+                    idea = candidate
+                    seen.append(idea)
+                    break
+            needs_refill = len(queue) <= self.low_water and (key, day) not in self._refilling
+            if needs_refill:
+                self._refilling.add((key, day))
+        alternate_pool_requests_total.inc("hit" if idea is not None else "miss")
+        return idea, needs_refill
+
+    def take(self, topic: str, audience: str, day: str, exclude: str = ""):
+        """An alternate not similar to `exclude` (or anything shown before), or None on a pool miss."""
+        if not self.enabled:
+            return None
+        idea, needs_refill = self._take(topic, audience, day, exclude)
+        if needs_refill:
+            threading.Thread(target=self._refill, args=(topic, audience, [day]), daemon=True).start()
+        return idea
+
+    async def take_async(self, topic: str, audience: str, day: str, exclude: str = ""):
+        """Async variant of take(); the refill runs as a task on the current loop."""
+        if not self.enabled:
+            return None
+        idea, needs_refill = self._take(topic, audience, day, exclude)
+        if needs_refill:
+            if self.fill_async is not None:
+                task = asyncio.create_task(self._refill_async(topic, audience, [day]))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+                # Not a finally in _refill_async: a task cancelled before its first step never runs its body
+                key = self._key(topic, audience)
+                task.add_done_callback(lambda _: self._refill_done(key, [day]))
+            else:
+                threading.Thread(target=self._refill, args=(topic, audience, [day]), daemon=True).start()
+        return idea
+
+    def prefill(self, topic: str, audience: str, days: list, avoid: dict = None, background: bool = True) -> None:
+        """Fill every day of a freshly generated plan at once (one call), e.g. right after generation."""
+        if not self.enabled:
+            return
+        key = self._key(topic, audience)
+        with self._lock:
+            plan = self._plan(key)
+            for day, idea in (avoid or {}).items():
+                plan.seen.setdefault(day, []).append(idea)
+            days = [day for day in days if (key, day) not in self._refilling]
+            self._refilling.update((key, day) for day in days)
+        if not days:
+            return
+        if background:
+            threading.Thread(target=self._refill, args=(topic, audience, days), daemon=True).start()
+        else:
+            self._refill(topic, audience, days)
+
+    def _avoid(self, key: tuple, days: list) -> dict:
+        with self._lock:
+            plan = self._plan(key)
+            return {day: list(plan.seen.get(day, ())) + list(plan.ideas.get(day, ())) for day in days}
+
+    def _store(self, key: tuple, days: list, generated: dict) -> None:
+        added = 0
+        with self._lock:
+            plan = self._plan(key)
+            for day in days:
+                queue = plan.ideas.setdefault(day, deque())
+                seen = plan.seen.get(day, [])
+                for idea in generated.get(day, ()):
+                    if not any(is_similar(idea, other) for other in list(queue) + seen):
+                        queue.append(idea)
+                        added += 1
+        alternate_pool_refills_total.inc()
+        log.debug("alternate pool refilled", days=len(days), added=added)
+
+    def _refill(self, topic: str, audience: str, days: list) -> None:
+        key = self._key(topic, audience)
+        try:
+            self._store(key, days, self.fill(topic, audience, days, self._avoid(key, days)))
+        except Exception as e:
+            log.warning("alternate pool refill failed", days=len(days), error=str(e))
+        finally:
+            self._refill_done(key, days)
+
+    async def _refill_async(self, topic: str, audience: str, days: list) -> None:
+        """Refill from a task; the task's creator releases the (key, day) claims when it ends."""
+        key = self._key(topic, audience)
+        try:
+            self._store(key, days, await self.fill_async(topic, audience, days, self._avoid(key, days)))
+        except Exception as e:
+            log.warning("alternate pool refill failed", days=len(days), error=str(e))
+
+    def _refill_done(self, key: tuple, days: list) -> None:
+        """Release the refill claims, however the refill ended (filled, failed or cancelled)."""
+        with self._lock:
+            self._refilling.difference_update((key, day) for day in days)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "plans": len(self._plans),
+                "pooled_ideas": sum(len(q) for plan in self._plans.values() for q in plan.ideas.values()),
+                "refills_in_flight": len(self._refilling),
+            }
@@ -0,0 +1,155 @@
+"""
+Mixed read/write load on the scheduling endpoints under each database profile.
+
+Every profile runs in its own process (models.py reads its config at import time) against a fresh
+SQLite file seeded with --rows posts, then serves --requests requests over ASGI with --concurrency
+in flight: --write-share of them POST /schedule-post, the rest page GET /scheduled-posts over a
+random month. Profiles:
+
+  default      SQLite's own settings (rollback journal, synchronous=FULL), sync sessions
+  tuned        WAL + the SQLITE_* pragmas in models.py, sync sessions
+  tuned-async  tuned, served through aiosqlite AsyncSessions (DB_ASYNC=true; needs aiosqlite)
+
+    python -m benchmarks.bench_db_load
+    python -m benchmarks.bench_db_load --rows 100000 --requests 5000 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+PROFILES = {
+    "default": {"DB_PROFILE": "default", "DB_ASYNC": "false"},
+    "tuned": {"DB_PROFILE": "tuned", "DB_ASYNC": "false"},
+    "tuned-async": {"DB_PROFILE": "tuned", "DB_ASYNC": "true"},
+}
+FIRST_DAY = date(2030, 1, 1)
+DAYS = 365
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))] if ordered else 0.0
+
+def _summarize(samples: list, wall_seconds: float, errors: int) -> dict:
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "throughput": round(len(samples) / wall_seconds, 1) if wall_seconds else 0.0,
+        "p50_ms": round(_percentile(samples, 50), 2),
+        "p95_ms": round(_percentile(samples, 95), 2),
+        "p99_ms": round(_percentile(samples, 99), 2),
+    }
+
+def _seed(rows: int) -> None:
+    from sqlalchemy import insert
+
+    from app.database.models import ScheduledPost, SessionLocal
+
+    with SessionLocal() as db:
+        db.execute(insert(ScheduledPost), [
+            {"idea": f"Seeded idea {n}", "date": FIRST_DAY + timedelta(days=n % DAYS)} for n in range(rows)])
+        db.commit()
+
+async def _load(args) -> dict:
+    import httpx
+
+    from main import app
+
+    rng = random.Random(args.seed)
+    samples = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        async def one(i):
+            if rng.random() < args.write_share:
+                kind = "write"
+                day = FIRST_DAY + timedelta(days=rng.randrange(DAYS))
+                request = client.post("/schedule-post", json={"idea": f"Load idea {i}", "date": day.isoformat()})
+            else:
+                kind = "read"
+                start = FIRST_DAY + timedelta(days=rng.randrange(DAYS - 30))
+                request = client.get("/scheduled-posts", params={
+                    "from": start.isoformat(), "to": (start + timedelta(days=30)).isoformat(), "limit": 50})
+            async with semaphore:
+                started = time.perf_counter()
+                response = await request
+                elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code >= 400:
+                errors[kind] += 1
+            else:
+                samples[kind].append(elapsed)
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        wall = time.perf_counter() - wall_start
+
+    results = {kind: _summarize(samples[kind], wall, errors[kind]) for kind in samples}
+    results["total"] = _summarize(samples["read"] + samples["write"], wall, errors["read"] + errors["write"])
+    return results
+
+def _child(args) -> None:
+    from app.database import models
+
+    if os.environ.get("DB_ASYNC") == "true" and models.AsyncSessionLocal is None:
+        print(json.dumps({"skipped": "aiosqlite is not installed"}))
+        return
+    _seed(args.rows)
+    results = asyncio.run(_load(args))
+    with models.engine.connect() as conn:
+        results["journal_mode"] = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    print(json.dumps(results))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--rows", type=int, default=20_000, help="Posts in the table before the load starts")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--write-share", type=float, default=0.2, help="Share of requests that are POSTs")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child(args)
+        return
+
+    print(f"{'profile':<12} {'journal':<8} {'kind':<6} {'n':>6} {'err':>4} {'ops/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in args.profiles:
+        workdir = tempfile.mkdtemp(prefix="planner-dbload-")
+        env = {
+            **os.environ,
+            **PROFILES[name],
+            "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'posts.db')}",
+            "OPENAI_API_KEY": "bench-key",
+            "PERPLEXITY_API_KEY": "bench-key",
+            "LLM_CACHE_DB": "",
+            "HEALTH_PROBE_ENABLED": "false",
+            "PREWARM_ENABLED": "false",
+            "LOG_LEVEL": "ERROR",
+        }
+        command = [sys.executable, "-m", "benchmarks.bench_db_load", "--child", "--rows", str(args.rows),
+                   "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                   "--write-share", str(args.write_share), "--seed", str(args.seed)]
+        output = subprocess.run(command, env=env, capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f"{name:<12} failed:\n{output.stderr}")
+            continue
+        results = json.loads(output.stdout.strip().splitlines()[-1])
+        if "skipped" in results:
+            print(f"{name:<12} skipped: {results['skipped']}")
+            continue
+        for kind in ("read", "write", "total"):
+            r = results[kind]
+            print(f"{name:<12} {results['journal_mode']:<8} {kind:<6} {r['count']:>6} {r['errors']:>4} "
+                  f"{r['throughput']:>9.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+if __name__ == "__main__":
+    main()
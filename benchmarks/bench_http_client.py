@@ -0,0 +1,62 @@
+"""
+Per-call latency: module-level httpx.post (new connection every call) vs the pooled
+per-provider client from llm_client.
+
+    python -m benchmarks.bench_http_client --calls 200 --latency-ms 5
+"""
+import argparse
+import statistics
+import time
+
+import httpx
+
+from app.agents import llm_client
+from benchmarks.mock_provider import MockProvider
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _time_calls(fn, calls: int) -> list:
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def _report(name: str, samples: list) -> None:
+    print(f"{name:<22} mean={statistics.mean(samples):7.2f}ms  p50={_percentile(samples, 50):7.2f}ms  "
+          f"p95={_percentile(samples, 95):7.2f}ms  p99={_percentile(samples, 99):7.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated provider latency")
+    args = parser.parse_args()
+
+    payload = {"model": "gpt-3.5-turbo", "messages": [{"role": "user", "content": "ping"}], "max_tokens": 10}
+
+    with MockProvider(latency_ms=args.latency_ms) as provider:
+        url = f"{provider.url}/chat/completions"
+        llm_client.PROVIDER_BASE_URLS["openai"] = provider.url
+        llm_client.close_clients()
+        pooled = llm_client.get_client("openai")
+
+        # Warm up both paths once so import/first-connection costs are excluded
+        httpx.post(url, json=payload, timeout=10)
+        pooled.post("/chat/completions", json=payload)
+
+        unpooled_samples = _time_calls(lambda: httpx.post(url, json=payload, timeout=10), args.calls)
+        pooled_samples = _time_calls(lambda: pooled.post("/chat/completions", json=payload), args.calls)
+        llm_client.close_clients()
+
+    print(f"{args.calls} calls against {provider.url} (simulated latency {args.latency_ms}ms)")
+    _report("httpx.post (no pool)", unpooled_samples)
+    _report("pooled client", pooled_samples)
+    saved = statistics.mean(unpooled_samples) - statistics.mean(pooled_samples)
+    print(f"Mean saving per call: {saved:.2f}ms (plain HTTP; TLS handshakes to the real APIs save considerably more)")
+
+if __name__ == "__main__":
+    main()
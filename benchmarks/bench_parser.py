@@ -0,0 +1,79 @@
+"""
+Checks _parse_content_ideas against a corpus of messy real-world responses, then times it
+(and the previous nested literal_eval scan) as the response size grows.
+
+    python -m benchmarks.bench_parser
+"""
+import argparse
+import ast
+import json
+import os
+import time
+
+from app.agents.content_generator import DAYS, _parse_content_ideas
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "parse_corpus.json")
+TOPIC, AUDIENCE = "AI marketing", "marketers"
+PLACEHOLDER_MARKERS = ("content for monday", "content idea about", "content idea for", "Creative AI marketing content")
+
+def _real_ideas(ideas: list) -> int:
+    return sum(1 for idea in ideas if not any(marker.lower() in idea.lower() for marker in PLACEHOLDER_MARKERS))
+
+def check_corpus() -> bool:
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        cases = json.load(f)["cases"]
+    ok = True
+    for case in cases:
+        result = _parse_content_ideas(case["response"], DAYS, TOPIC, AUDIENCE)
+        recovered = _real_ideas(result["ideas"])
+        passed = len(result["ideas"]) == 7 and recovered >= case["expect_ideas"]
+        ok &= passed
+        print(f"{'PASS' if passed else 'FAIL'}  {case['name']:<28} recovered {recovered}/7 (expected >= {case['expect_ideas']})")
+    return ok
+
+def _legacy_list_scan(raw_response: str):
+    """The previous approach: literal_eval every '[' ... ']' pair (O(n^2) slices)."""
+    starts = [i for i, c in enumerate(raw_response) if c == "["]
+    ends = [i for i, c in enumerate(raw_response) if c == "]"]
+    for start in starts:
+        for end in ends:
+            if end > start:
+                try:
+                    data = ast.literal_eval(raw_response[start:end + 1])
+                    if isinstance(data, list) and len(data) >= 5:
+                        return data
+                except (ValueError, SyntaxError, TypeError):
+                    continue
+    return None
+
+def _messy_response(noise_blocks: int) -> str:
+    """A valid list buried after prose full of bracketed asides, as verbose models produce."""
+    noise = " ".join(f"[aside {i}] some commentary (see [ref {i}])." for i in range(noise_blocks))
+    items = ", ".join(f"'{day}: idea number {i} for the week'" for i, day in enumerate(DAYS))
+    return f"{noise}\n[{items}]\nSummary of the week."
+
+def _time(fn, text: str, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(text)
+    return (time.perf_counter() - start) / repeat * 1000
+
+def benchmark(sizes: list, legacy_limit: int) -> None:
+    print(f"\n{'noise blocks':>12} {'chars':>8} {'new parser':>12} {'legacy scan':>12}")
+    for blocks in sizes:
+        text = _messy_response(blocks)
+        new_ms = _time(lambda t: _parse_content_ideas(t, DAYS, TOPIC, AUDIENCE), text, 20)
+        legacy = f"{_time(_legacy_list_scan, text, 1):10.2f}ms" if blocks <= legacy_limit else "   (skipped)"
+        print(f"{blocks:>12} {len(text):>8} {new_ms:10.3f}ms {legacy:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="0,10,50,100,200,500,1000,5000")
+    parser.add_argument("--legacy-limit", type=int, default=200, help="Largest size to run the legacy scan on")
+    args = parser.parse_args()
+    corpus_ok = check_corpus()
+    benchmark([int(s) for s in args.sizes.split(",")], args.legacy_limit)
+    raise SystemExit(0 if corpus_ok else 1)
+
+if __name__ == "__main__":
+    main()
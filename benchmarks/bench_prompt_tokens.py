@@ -0,0 +1,95 @@
+"""
+Token usage per call before and after prompt_templates: the original full prompts with fixed
+max_tokens, vs the compact variants with max_tokens sized from observed completions.
+
+Completion lengths come from --completions (a JSON object of template name -> list of
+completion texts, e.g. exported from production logs) or, by default, the mock provider's
+canned responses. Reserved tokens are what the per-provider TPM limiter charges per call.
+
+    python -m benchmarks.bench_prompt_tokens
+    python -m benchmarks.bench_prompt_tokens --completions observed.json
+"""
+import argparse
+import json
+
+from app.agents.prompt_templates import TEMPLATES, OutputBudget, estimate_tokens
+from app.agents.rate_limiter import estimate_request_tokens
+from benchmarks.mock_provider import RESPONSE_SHAPES
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+WEEK_IDEAS = ["Five AI tools that automate your weekly social media posting",
+              "Common AI marketing mistakes small businesses make", "Writing better prompts for ad copy",
+              "Case study: a bakery that doubled bookings with AI email", "Free AI analytics tools compared",
+              "Where AI marketing is heading this year", "Join our community Q&A on AI marketing"]
+POOL_SIZE = 5
+
+VALUES = {
+    "plan-content": {"topic": "AI marketing", "audience": "small business owners"},
+    "plan-content-json": {"topic": "AI marketing", "audience": "small business owners"},
+    "summarize-idea": {"topic": "AI marketing", "audience": "small business owners", "day": "Monday",
+                       "idea": "Five AI tools that automate your weekly social media posting"},
+    "summarize-week": {"topic": "AI marketing", "audience": "small business owners",
+                       "plan": "\n".join(f"{day}: {idea}" for day, idea in zip(DAYS, WEEK_IDEAS)),
+                       "shape": "{" + ", ".join(f'"{day}": "..."' for day in DAYS) + "}"},
+    "alternate-pool": {"count": POOL_SIZE, "topic": "AI marketing", "audience": "small business owners",
+                       "days": ", ".join(DAYS), "avoid_clause": "",
+                       "shape": "{" + ", ".join(f'"{day}": ["...", ...]' for day in DAYS) + "}"},
+    "alternate-idea": {"topic": "AI marketing", "audience": "small business owners", "day": "Monday",
+                       "exclude_clause": "\n\nDO NOT suggest anything similar to: 'Five AI tools for social media'"},
+}
+
+SAMPLE_SUMMARY = (
+    "Monday is when small business owners plan their week, so a practical automation list lands while they "
+    "are deciding what to delegate. It speaks to their limited time and budget, and each tool is something "
+    "they can try the same day."
+)
+
+def _default_completions() -> dict:
+    return {
+        "plan-content": [RESPONSE_SHAPES["list"], RESPONSE_SHAPES["lines"], RESPONSE_SHAPES["messy"]],
+        "plan-content-json": [RESPONSE_SHAPES["json"]],
+        "summarize-idea": [SAMPLE_SUMMARY],
+        "summarize-week": [json.dumps({day: SAMPLE_SUMMARY for day in DAYS})],
+        "alternate-pool": [json.dumps({day: [RESPONSE_SHAPES["short"]] * POOL_SIZE for day in DAYS})],
+        "alternate-idea": [RESPONSE_SHAPES["short"]],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--completions", help="JSON file: {template: [completion, ...]}")
+    args = parser.parse_args()
+
+    completions = _default_completions()
+    if args.completions:
+        with open(args.completions, encoding="utf-8") as f:
+            completions.update(json.load(f))
+
+    budget = OutputBudget(min_samples=1)
+    for name, texts in completions.items():
+        for text in texts:
+            budget.record(name, estimate_tokens(text))
+
+    print(f"{'template':<20} {'prompt before':>13} {'prompt after':>12} {'max_tok before':>14} {'max_tok after':>13} "
+          f"{'reserved before':>15} {'reserved after':>14} {'saved':>7}")
+    totals = [0, 0]
+    for name, template in TEMPLATES.items():
+        values = VALUES.get(name)
+        if values is None:
+            print(f"{name:<20} (no sample values in VALUES; skipped)")
+            continue
+        before_prompt = template.render("full", **values)
+        after_prompt = template.render("compact", **values)
+        before_max, after_max = template.max_tokens, budget.max_tokens(template)
+        before_reserved = estimate_request_tokens(before_prompt, before_max)
+        after_reserved = estimate_request_tokens(after_prompt, after_max)
+        totals[0] += before_reserved
+        totals[1] += after_reserved
+        print(f"{name:<20} {estimate_tokens(before_prompt):>13} {estimate_tokens(after_prompt):>12} {before_max:>14} "
+              f"{after_max:>13} {before_reserved:>15} {after_reserved:>14} "
+              f"{1 - after_reserved / before_reserved:>6.0%}")
+    print(f"\nReserved tokens for one call of each template: {totals[0]} -> {totals[1]} "
+          f"({1 - totals[1] / totals[0]:.0%} less). Billed output tokens don't change with max_tokens; "
+          f"prompt tokens and limiter reservations do.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Topic index lookup latency at production scale: indexes --topics synthetic topics across the
+dashboard audiences, then times exact (after canonicalization), near-duplicate and miss lookups.
+
+    python -m benchmarks.bench_topic_index
+    python -m benchmarks.bench_topic_index --topics 200000 --lookups 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.agents.topic_index import TopicIndex, canonicalize_topic
+
+WORDS = (
+    "ai marketing seo email social media video podcast brand growth sales remote work hiring fintech crypto "
+    "saas product design ux devops cloud security privacy health fitness nutrition travel finance budgeting "
+    "investing ecommerce retail logistics education coding python data analytics startup funding leadership "
+    "productivity sustainability climate energy real estate gaming esports music photography writing"
+).split()
+# Checked before timing anything: request phrasing must merge, different topics must not
+SAME_TOPIC = [
+    ("AI Marketing", " ai marketing "), ("AI marketing", "AI-marketing strategies"),
+    ("AI marketing", "ai marketing tips"), ("email marketing", "Email Marketing Ideas"),
+]
+DISTINCT_TOPICS = [
+    "business", "business plan", "business strategy", "business ideas", "business tips",
+    "content marketing", "marketing", "marketing strategy", "content", "content plan", "guide to seo", "seo",
+]
+# Near-duplicate lookup: a typo still finds the indexed topic; these lookalikes must not
+NEAR_DUPLICATES = [("social media marketing for small businesses", "social media marketting for small businesses")]
+NOT_NEAR_DUPLICATES = [
+    ("social media marketing for B2B companies", "social media marketing for B2C companies"),
+    ("digital marketing trends for 2023", "digital marketing trends for 2024"),
+    ("python to java", "java to python"),
+]
+AUDIENCES = ["entrepreneurs", "marketers", "creators", "developers", "students", "healthcare", "executives"]
+
+def _typo(topic: str, rng: random.Random) -> str:
+    """Double one letter, the kind of near-duplicate users type ("marketting")."""
+    i = rng.randrange(len(topic))
+    while not topic[i].isalpha():
+        i = rng.randrange(len(topic))
+    return topic[:i] + topic[i] + topic[i:]
+
+def _unseen_topic(rng: random.Random) -> str:
+    """Words outside the indexed vocabulary, so nothing should match."""
+    return " ".join("".join(rng.choice("bcdfghjklmnpqrstvwxz") for _ in range(rng.randint(4, 9)))
+                    for _ in range(rng.randint(2, 3)))
+
+def check_canonicalization() -> list:
+    """Failures of the SAME_TOPIC / DISTINCT_TOPICS expectations; empty when canonicalization is right."""
+    failures = [f"{a!r} and {b!r} should be one topic ({canonicalize_topic(a)!r} vs {canonicalize_topic(b)!r})"
+                for a, b in SAME_TOPIC if canonicalize_topic(a) != canonicalize_topic(b)]
+    seen = {}
+    for topic in DISTINCT_TOPICS:
+        key = canonicalize_topic(topic)
+        if key in seen:
+            failures.append(f"{seen[key]!r} and {topic!r} should be different topics (both {key!r})")
+        seen.setdefault(key, topic)
+    return failures
+
+def check_near_duplicates() -> list:
+    """Failures of the NEAR_DUPLICATES / NOT_NEAR_DUPLICATES expectations at the default threshold."""
+    failures = []
+    for indexed, query, expected in [(a, b, True) for a, b in NEAR_DUPLICATES] + \
+                                    [(a, b, False) for a, b in NOT_NEAR_DUPLICATES]:
+        index = TopicIndex()
+        index.add("marketers", indexed, indexed)
+        match = index.lookup("marketers", query)
+        if (match is not None) != expected:
+            found = f"matched ({match.similarity:.2f})" if match is not None else "no match"
+            failures.append(f"{query!r} looking up {indexed!r}: {found}, expected {'a' if expected else 'no'} match")
+    return failures
+
+def _percentiles(samples: list) -> str:
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return f"p50={statistics.median(samples) * 1e6:7.1f}us  p99={p99 * 1e6:7.1f}us"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--topics", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    failures = check_canonicalization()
+    if failures:
+        raise SystemExit("canonicalization check failed:\n  " + "\n  ".join(failures))
+    print(f"canonicalization: {len(SAME_TOPIC)} merges and {len(DISTINCT_TOPICS)} distinct topics ok")
+    failures = check_near_duplicates()
+    if failures:
+        raise SystemExit("near-duplicate check failed:\n  " + "\n  ".join(failures))
+    print(f"near duplicates: {len(NEAR_DUPLICATES)} matches and {len(NOT_NEAR_DUPLICATES)} lookalikes kept apart ok")
+
+    rng = random.Random(args.seed)
+    index = TopicIndex(max_entries=args.topics)
+    topics = []
+    started = time.perf_counter()
+    while len(topics) < args.topics:
+        topic = " ".join(rng.sample(WORDS, rng.randint(2, 4)))
+        audience = rng.choice(AUDIENCES)
+        index.add(audience, topic, len(topics))
+        topics.append((audience, topic))
+    print(f"indexed {len(topics)} topics in {time.perf_counter() - started:.1f}s "
+          f"({index.stats()['topics']} distinct after canonicalization)")
+
+    sample = rng.sample(topics, args.lookups)
+    cases = {
+        "exact": [(audience, f"  {topic.upper()} strategies ") for audience, topic in sample],
+        "near-duplicate": [(audience, _typo(topic, rng)) for audience, topic in sample],
+        "miss": [(audience, _unseen_topic(rng)) for audience, _ in sample],
+    }
+    for name, queries in cases.items():
+        timings, hits = [], 0
+        for audience, topic in queries:
+            started = time.perf_counter()
+            match = index.lookup(audience, topic)
+            timings.append(time.perf_counter() - started)
+            hits += match is not None
+        print(f"{name:<15} {_percentiles(timings)}  hit rate={hits / len(queries):.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Local stand-in for the OpenAI / Perplexity chat completion APIs.
+
+Used by the benchmarks so we can measure the client side without spending API credits.
+Latency distribution, 429/500 rates and the shape of the returned completion are configurable.
+Run it standalone with:  python -m benchmarks.mock_provider --port 8900 --latency-ms 800 --jitter 0.5
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops SYNs under concurrent load, which shows up
+    # as 1s connect retransmits in the client-side percentiles
+    request_queue_size = 256
+    daemon_threads = True
+
+DEFAULT_CONTENT = (
+    "['Monday: Intro to the topic', 'Tuesday: Common mistakes', 'Wednesday: Advanced techniques', "
+    "'Thursday: Case studies', 'Friday: Tools and resources', 'Saturday: Trends', "
+    "'Sunday: Community tips']\n\nA balanced week moving from basics to advanced practice."
+)
+
+_DAY_IDEAS = [
+    ("Monday", "Intro to the topic"), ("Tuesday", "Common mistakes"), ("Wednesday", "Advanced techniques"),
+    ("Thursday", "Case studies"), ("Friday", "Tools and resources"), ("Saturday", "Trends"),
+    ("Sunday", "Community tips"),
+]
+
+# Completion bodies in the shapes real models return
+RESPONSE_SHAPES = {
+    "list": DEFAULT_CONTENT,
+    "lines": "\n".join(f"{n}. **{day}:** {idea}" for n, (day, idea) in enumerate(_DAY_IDEAS, 1))
+             + "\n\nA balanced week moving from basics to advanced practice.",
+    "json": json.dumps({"ideas": dict(_DAY_IDEAS), "summary": "A balanced week moving from basics to advanced practice."}),
+    "messy": "Sure! [Note: tailored for you] Here's the plan [v2]:\n```python\n" + DEFAULT_CONTENT + "\n```",
+    "short": "A concise, relevant idea that works well for this audience.",
+}
+
+# Latency distributions; `latency_ms` is the median and `jitter` the spread
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+class MockProvider:
+    """Threaded HTTP server answering POST /chat/completions with a canned completion."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0.0,
+                 content: str = DEFAULT_CONTENT, stream_chunk_chars: int = 8, stream_chunk_delay_ms: float = 0.0,
+                 distribution: str = "fixed", jitter: float = 0.0, rate_limit_rate: float = 0.0,
+                 error_rate: float = 0.0, retry_after: int = 1, shape: str = None, seed: int = None):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency_ms = latency_ms
+        self.content = RESPONSE_SHAPES[shape] if shape else content
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_chunk_delay_ms = stream_chunk_delay_ms
+        self.distribution = distribution
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.error_count = 0
+        self._count_lock = threading.Lock()
+        self._server = _Server((host, port), self._make_handler())
+        self._thread = None
+
+    def sample_latency(self) -> float:
+        """Seconds to wait before answering, drawn from the configured distribution."""
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            spread = self.latency_ms * self.jitter
+            return max(0.0, self._random.uniform(self.latency_ms - spread, self.latency_ms + spread)) / 1000
+        if self.distribution == "lognormal":
+            # Median latency_ms with a long right tail, like real completion APIs
+            return self.latency_ms * self._random.lognormvariate(0, self.jitter or 0.5) / 1000
+        return self.latency_ms / 1000
+
+    def _outcome(self) -> str:
+        roll = self._random.random()
+        if roll < self.rate_limit_rate:
+            return "rate_limited"
+        if roll < self.rate_limit_rate + self.error_rate:
+            return "error"
+        return "ok"
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs
+            disable_nagle_algorithm = True  # avoid delayed-ACK stalls on reused connections
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                with provider._count_lock:
+                    provider.request_count += 1
+                    outcome = provider._outcome()
+                    delay = provider.sample_latency()
+                if outcome == "rate_limited":
+                    with provider._count_lock:
+                        provider.rate_limited_count += 1
+                    self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                                    {"retry-after": str(provider.retry_after)})
+                    return
+                if delay:
+                    time.sleep(delay)
+                if outcome == "error":
+                    with provider._count_lock:
+                        provider.error_count += 1
+                    self._send_json(500, {"error": {"message": "Mock server error", "type": "server_error"}})
+                    return
+                if body.get("stream"):
+                    self._stream(body)
+                    return
+                prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+                completion_tokens = len(provider.content) // 4
+                self._send_json(200, {
+                    "id": "mock-completion",
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": provider.content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                })
+
+            def _send_json(self, status: int, body: dict, headers: dict = None) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _write_chunk(self, data: bytes) -> None:
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+            def _stream(self, body: dict) -> None:
+                """Answer stream=true requests with chunked SSE deltas, like the real APIs."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                content = provider.content
+                step = max(1, provider.stream_chunk_chars)
+                for i in range(0, len(content), step):
+                    chunk = {"choices": [{"index": 0, "delta": {"content": content[i:i + step]}}]}
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+                    if provider.stream_chunk_delay_ms:
+                        time.sleep(provider.stream_chunk_delay_ms / 1000)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+        return Handler
+
+    def start(self) -> "MockProvider":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local mock LLM provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Median response latency")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="fixed")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Spread: fraction (uniform) or sigma (lognormal)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--shape", choices=sorted(RESPONSE_SHAPES), default="list")
+    args = parser.parse_args()
+    server = MockProvider(args.host, args.port, args.latency_ms, distribution=args.distribution,
+                          jitter=args.jitter, rate_limit_rate=args.rate_limit_rate,
+                          error_rate=args.error_rate, shape=args.shape)
+    print(f"Mock provider listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
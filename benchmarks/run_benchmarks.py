@@ -0,0 +1,448 @@
+"""
+Offline benchmark suite for the generation and storage hot paths.
+
+Starts two mock providers (OpenAI and Perplexity stand-ins), points the app at them and
+a throwaway SQLite database, then measures:
+
+  - call_llm        provider fallback with OpenAI answering a share of requests with 429
+  - parse           _parse_content_ideas over the messy-response corpus
+  - endpoints       every FastAPI endpoint in main.py, in-process over ASGI, plus scheduling a
+                    week with seven single POSTs vs one bulk request and an unchanged poll of
+                    /scheduled-posts revalidated with If-None-Match
+  - db              ScheduledPost create / read / update / delete through the ORM
+
+Each scenario reports throughput and p50/p95/p99. Results are compared with
+benchmarks/baseline.json; a p95 or throughput regression beyond --tolerance exits non-zero.
+
+    python -m benchmarks.run_benchmarks                      # compare against the baseline
+    python -m benchmarks.run_benchmarks --update-baseline    # record this machine's numbers
+    python -m benchmarks.run_benchmarks --only call_llm db --latency-ms 50 --rate-limit-rate 0.3
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from benchmarks.mock_provider import LATENCY_DISTRIBUTIONS, MockProvider
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "parse_corpus.json")
+SCENARIOS = ("call_llm", "parse", "endpoints", "db")
+TOPIC, AUDIENCE = "AI marketing", "marketers"
+
+def _percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def _summarize(samples: list, wall_seconds: float, errors: int = 0) -> dict:
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "throughput": round(len(samples) / wall_seconds, 2) if wall_seconds else 0.0,
+        "p50_ms": round(_percentile(samples, 50), 3),
+        "p95_ms": round(_percentile(samples, 95), 3),
+        "p99_ms": round(_percentile(samples, 99), 3),
+    }
+
+def _run_threaded(fn, iterations: int, concurrency: int) -> dict:
+    """Call fn(i) `iterations` times from `concurrency` threads, timing each call."""
+    samples, errors = [], 0
+    lock = threading.Lock()
+
+    def timed(i):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            fn(i)
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            samples.append(elapsed)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(iterations)))
+    return _summarize(samples or [0.0], time.perf_counter() - wall_start, errors)
+
+async def _run_async(fn, iterations: int, concurrency: int) -> dict:
+    """Await fn(i) `iterations` times with at most `concurrency` in flight."""
+    samples, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await fn(i)
+            except Exception:
+                errors += 1
+                return
+            samples.append((time.perf_counter() - start) * 1000)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(timed(i) for i in range(iterations)))
+    return _summarize(samples or [0.0], time.perf_counter() - wall_start, errors)
+
+def check_hedge_fallback() -> list:
+    """
+    Failures of the hedge race with a slow OpenAI and Perplexity's circuit open: the local model
+    must not be fired as the hedge, and must stay queued for the ordinary fallback.
+    """
+    from app.agents import content_generator as cg
+    from app.agents.hedging import HedgePolicy
+    from app.agents.provider_health import ProviderCircuit, provider_circuits
+
+    calls = []
+
+    def provider(name, seconds):
+        def call(prompt, max_tokens, temperature, json_schema=None):
+            calls.append(name)
+            time.sleep(seconds)
+            return f"{name} answer"
+
+        async def call_async(prompt, max_tokens, temperature, json_schema=None):
+            calls.append(name)
+            await asyncio.sleep(seconds)
+            return f"{name} answer"
+        return call, call_async
+
+    saved = (dict(cg._PROVIDER_CALLS), dict(cg._PROVIDER_CALLS_ASYNC), dict(provider_circuits))
+    failures = []
+    try:
+        for name, seconds in (("openai", 0.2), ("perplexity", 0.0), ("local", 0.0)):
+            cg._PROVIDER_CALLS[name], cg._PROVIDER_CALLS_ASYNC[name] = provider(name, seconds)
+            provider_circuits[name] = ProviderCircuit(name)
+        provider_circuits["perplexity"].record_failure("check", retry_after=60)
+
+        def race_sync(remaining, policy):
+            return cg._race_providers("openai", remaining, "check", 64, 0.5, policy, [])
+
+        def race_async(remaining, policy):
+            return asyncio.run(cg._race_providers_async("openai", remaining, "check", 64, 0.5, policy, []))
+
+        for label, race in (("sync", race_sync), ("async", race_async)):
+            calls.clear()
+            remaining = ["perplexity", "local"]
+            result = race(remaining, HedgePolicy("check", delay=0.02, adaptive=False, budget=1.0))
+            if calls != ["openai"] or result != "openai answer":
+                failures.append(f"{label}: expected only openai to be called, got {calls} -> {result!r}")
+            if remaining != ["local"]:
+                failures.append(f"{label}: local should stay queued for the fallback, remaining={remaining}")
+    finally:
+        cg._PROVIDER_CALLS.update(saved[0])
+        cg._PROVIDER_CALLS_ASYNC.update(saved[1])
+        provider_circuits.clear()
+        provider_circuits.update(saved[2])
+    return failures
+
+# --- scenarios ---
+
+def bench_call_llm(args, providers) -> dict:
+    from app.agents.content_generator import call_llm
+
+    failures = check_hedge_fallback()
+    if failures:
+        raise SystemExit("hedge fallback check failed:\n  " + "\n  ".join(failures))
+
+    # Only this scenario sees 429s, so the other numbers are not skewed by circuit state
+    openai, perplexity = providers["openai"], providers["perplexity"]
+    openai.rate_limit_rate = args.rate_limit_rate
+    before = (openai.request_count, openai.rate_limited_count, perplexity.request_count)
+    try:
+        result = _run_threaded(
+            lambda i: call_llm(f"Benchmark prompt {i}", max_tokens=64, use_cache=False),
+            args.iterations, args.concurrency,
+        )
+    finally:
+        openai.rate_limit_rate = 0.0
+    result["openai_429s"] = openai.rate_limited_count - before[1]
+    result["openai_served"] = openai.request_count - before[0] - result["openai_429s"]
+    result["perplexity_served"] = perplexity.request_count - before[2]
+    return {"call_llm.fallback": result}
+
+def bench_parse(args, providers) -> dict:
+    from app.agents.content_generator import DAYS, _parse_content_ideas
+
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        responses = [case["response"] for case in json.load(f)["cases"]]
+    iterations = max(args.iterations * 10, len(responses))
+    return {"parse_content_ideas": _run_threaded(
+        lambda i: _parse_content_ideas(responses[i % len(responses)], DAYS, TOPIC, AUDIENCE),
+        iterations, 1,
+    )}
+
+def _delete_posts_from(first_day: date) -> None:
+    """Drop the rows the scheduling scenarios added, so later scenarios (db read all) see the same table size."""
+    from app.database.listing_cache import listing_cache
+    from app.database.models import ScheduledPost, SessionLocal
+
+    with SessionLocal() as db:
+        db.query(ScheduledPost).filter(ScheduledPost.date >= first_day).delete()
+        db.commit()
+    listing_cache.invalidate()
+
+async def _bench_endpoints(args) -> dict:
+    import httpx
+
+    from app.agents.llm_client import aclose_clients
+    from main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def expect_ok(response):
+            if response.status_code >= 400:
+                raise RuntimeError(f"{response.request.url.path} -> {response.status_code}")
+            return response
+
+        async def get(path, **params):
+            return await expect_ok(await client.get(path, params=params))
+
+        async def plan_stream(i):
+            async with client.stream("GET", "/plan-content/stream", params={"topic": f"{TOPIC} {i}"}) as response:
+                await expect_ok(response)
+                async for _ in response.aiter_lines():
+                    pass
+
+        async def plan_batch(i):
+            items = [{"topic": f"{TOPIC} {i}-{n}", "audience": AUDIENCE} for n in range(5)]
+            async with client.stream("POST", "/plan-content/batch", json={"items": items}) as response:
+                await expect_ok(response)
+                async for _ in response.aiter_lines():
+                    pass
+
+        day_params = {"topic": TOPIC, "audience": AUDIENCE, "day": "Monday"}
+        stateless = [
+            ("GET /", lambda i: get("/")),
+            ("GET /health", lambda i: get("/health")),
+            ("GET /plan-content", lambda i: get("/plan-content", topic=f"{TOPIC} {i}", audience=AUDIENCE)),
+            ("GET /plan-content/stream", plan_stream),
+            ("POST /plan-content/batch", plan_batch),
+            ("GET /summarize-idea", lambda i: get("/summarize-idea", idea=f"Idea {i}", **day_params)),
+            ("GET /alternate-idea", lambda i: get("/alternate-idea", exclude=f"Idea {i}", **day_params)),
+        ]
+        for name, fn in stateless:
+            results[f"endpoint {name}"] = await _run_async(fn, args.iterations, args.concurrency)
+
+        # /api-status reports the background health prober's cached provider status, no live probes
+        results["endpoint GET /api-status"] = await _run_async(
+            lambda i: get("/api-status"), args.iterations, args.concurrency)
+
+        created = []
+
+        async def schedule(i):
+            response = await expect_ok(await client.post(
+                "/schedule-post", json={"idea": f"Endpoint idea {i}", "date": "2030-01-01"}))
+            created.append(response.json()["post"]["id"])
+
+        results["endpoint POST /schedule-post"] = await _run_async(schedule, args.iterations, args.concurrency)
+        results["endpoint GET /scheduled-posts"] = await _run_async(
+            lambda i: get("/scheduled-posts"), args.iterations, args.concurrency)
+        # A dashboard poll with nothing changed: the ETag revalidates to an empty 304 without a query
+        etag = (await get("/scheduled-posts")).headers["etag"]
+
+        async def poll_unchanged(i):
+            response = await client.get("/scheduled-posts", headers={"If-None-Match": etag})
+            if response.status_code != 304:
+                raise RuntimeError(f"/scheduled-posts revalidation -> {response.status_code}")
+
+        results["endpoint GET /scheduled-posts (304)"] = await _run_async(
+            poll_unchanged, args.iterations, args.concurrency)
+        results["endpoint PUT /scheduled-posts/{id}"] = await _run_async(
+            lambda i: client.put(f"/scheduled-posts/{created[i % len(created)]}",
+                                 json={"idea": f"Endpoint idea {i} (edited)", "date": "2030-01-02"}),
+            len(created), args.concurrency)
+        results["endpoint DELETE /scheduled-posts/{id}"] = await _run_async(
+            lambda i: client.delete(f"/scheduled-posts/{created[i]}"), len(created), args.concurrency)
+
+        # Scheduling a generated week: seven single POSTs vs one bulk request (ops/s = weeks/s)
+        async def schedule_week_per_row(i):
+            for day in range(7):
+                await expect_ok(await client.post(
+                    "/schedule-post", json={"idea": f"Week idea {i}-{day}", "date": f"2030-03-0{day + 1}"}))
+
+        async def schedule_week_bulk(i):
+            await expect_ok(await client.post("/schedule-post/bulk", json=[
+                {"idea": f"Bulk week idea {i}-{day}", "date": f"2030-03-0{day + 1}"} for day in range(7)]))
+
+        async def import_csv(i):
+            rows = "\n".join(f"CSV idea {i}-{n},2030-04-{n % 28 + 1:02d}" for n in range(500))
+            await expect_ok(await client.post("/schedule-post/bulk", content=f"idea,date\n{rows}\n",
+                                              headers={"content-type": "text/csv"}))
+
+        results["endpoint POST /schedule-post x7 (week)"] = await _run_async(
+            schedule_week_per_row, args.iterations, args.concurrency)
+        results["endpoint POST /schedule-post/bulk (week)"] = await _run_async(
+            schedule_week_bulk, args.iterations, args.concurrency)
+        results["endpoint POST /schedule-post/bulk (500-row CSV)"] = await _run_async(
+            import_csv, max(1, args.iterations // 10), 1)
+        _delete_posts_from(date(2030, 3, 1))
+    await aclose_clients()
+    return results
+
+def bench_endpoints(args, providers) -> dict:
+    return asyncio.run(_bench_endpoints(args))
+
+def bench_db(args, providers) -> dict:
+    from app.database.models import ScheduledPost, SessionLocal
+
+    ids = []
+
+    def create(i):
+        with SessionLocal() as db:
+            post = ScheduledPost(idea=f"DB idea {i}", date=date(2030, 2, 1))
+            db.add(post)
+            db.commit()
+            ids.append(post.id)
+
+    def read_all(i):
+        with SessionLocal() as db:
+            db.query(ScheduledPost).all()
+
+    def read_one(i):
+        with SessionLocal() as db:
+            db.query(ScheduledPost).filter(ScheduledPost.id == ids[i % len(ids)]).first()
+
+    def update(i):
+        with SessionLocal() as db:
+            post = db.query(ScheduledPost).filter(ScheduledPost.id == ids[i]).first()
+            post.idea = f"DB idea {i} (edited)"
+            db.commit()
+
+    def delete(i):
+        with SessionLocal() as db:
+            db.query(ScheduledPost).filter(ScheduledPost.id == ids[i]).delete()
+            db.commit()
+
+    # SQLite serializes writers, so writes run single-threaded like a single uvicorn worker would
+    results = {"db create": _run_threaded(create, args.iterations, 1)}
+    results["db read all"] = _run_threaded(read_all, args.iterations, args.concurrency)
+    results["db read by id"] = _run_threaded(read_one, args.iterations, args.concurrency)
+    results["db update"] = _run_threaded(update, len(ids), 1)
+    results["db delete"] = _run_threaded(delete, len(ids), 1)
+    return results
+
+BENCHMARKS = {"call_llm": bench_call_llm, "parse": bench_parse, "endpoints": bench_endpoints, "db": bench_db}
+
+# --- baseline ---
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """Names of benchmarks whose p95 grew or throughput dropped by more than `tolerance`."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance) and current["p95_ms"] - previous["p95_ms"] > 1.0:
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput']}/s -> {current['throughput']}/s")
+    return regressions
+
+def _print_table(results: dict, baseline: dict) -> None:
+    print(f"\n{'benchmark':<48} {'n':>6} {'err':>4} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'p95 vs base':>12}")
+    for name, r in results.items():
+        previous = baseline.get("results", {}).get(name)
+        delta = ""
+        if previous and previous["p95_ms"]:
+            delta = f"{(r['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}%"
+        print(f"{name:<48} {r['count']:>6} {r['errors']:>4} {r['throughput']:>10.1f} "
+              f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {delta:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Median mock provider latency")
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.2, help="Share of OpenAI requests answered with 429")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed relative regression before failing")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--verbose", action="store_true", help="Keep the app's own logging")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="planner-bench-")
+    providers = {
+        "openai": MockProvider(latency_ms=args.latency_ms, distribution=args.distribution, jitter=args.jitter,
+                               retry_after=1, seed=args.seed),
+        "perplexity": MockProvider(latency_ms=args.latency_ms, distribution=args.distribution,
+                                   jitter=args.jitter, seed=args.seed + 1),
+    }
+    for provider in providers.values():
+        provider.start()
+
+    # Must be set before the app modules are imported: they read their config at import time
+    os.environ.update({
+        "OPENAI_BASE_URL": providers["openai"].url,
+        "PERPLEXITY_BASE_URL": providers["perplexity"].url,
+        "OPENAI_API_KEY": "bench-key",
+        "PERPLEXITY_API_KEY": "bench-key",
+        "DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'posts.db')}",
+        "LLM_CACHE_ENABLED": "false",
+        "LLM_CACHE_DB": "",
+        "OPENAI_RPM_LIMIT": "0",
+        "OPENAI_TPM_LIMIT": "0",
+        "PERPLEXITY_RPM_LIMIT": "0",
+        "PERPLEXITY_TPM_LIMIT": "0",
+        "LOG_LEVEL": "INFO" if args.verbose else "ERROR",
+    })
+
+    results = {}
+    try:
+        for scenario in args.only:
+            print(f"Running {scenario}...", file=sys.stderr)
+            quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+            with quiet:
+                results.update(BENCHMARKS[scenario](args, providers))
+    finally:
+        for provider in providers.values():
+            provider.stop()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    _print_table(results, baseline)
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "settings": {k: v for k, v in vars(args).items() if k not in ("baseline", "update_baseline", "verbose")},
+                "results": results,
+            }, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if not baseline:
+        print("\nNo baseline yet - run with --update-baseline to record one.")
+        return
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  - {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%}.")
+
+if __name__ == "__main__":
+    main()
@@ -1,69 +1,185 @@
 import ast
+import asyncio
+import functools
+import json
 import os
+import re
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 
 import httpx
 from dotenv import load_dotenv
 
+from app.agents.alternate_pool import ALT_POOL_SIZE, AlternatePool
+from app.agents.hedging import HEDGE_MAX_WORKERS, get_hedge_policy, latency_tracker
+from app.agents.llm_cache import llm_cache, make_cache_key
+from app.agents.llm_client import get_async_client, get_client
+from app.agents.local_llm import LOCAL_LLM_ENABLED, local_model
+from app.agents.metrics import (llm_chain_failures_total, llm_fallbacks_total,
+                                llm_rate_limited_total, llm_request_seconds,
+                                llm_responses_total, llm_tokens_total,
+                                llm_truncated_total,
+                                plan_parse_failures_total,
+                                plan_parse_placeholder_days_total,
+                                plan_parse_total, topic_index_lookups_total,
+                                week_summary_fallback_days_total)
+from app.agents.prewarm import Prewarmer, topic_popularity
+from app.agents.prompt_templates import (TEMPLATES, build_prompt,
+                                         get_prompt_stats, record_completion)
+from app.agents.provider_health import (HEALTH_PROBE_ENABLED, HealthProber,
+                                        get_circuit_snapshot, provider_circuits)
+from app.agents.rate_limiter import (PRIORITY_BATCH, PRIORITY_INTERACTIVE,
+                                     QueueTimeoutError,
+                                     estimate_request_tokens,
+                                     get_rate_limiter_stats, rate_limiters)
+from app.agents.singleflight import AsyncSingleFlight, SingleFlight
+from app.agents.streaming import (SSE_DONE, SSE_TRUNCATED, IncrementalIdeaParser,
+                                  parse_sse_delta)
+from app.agents.structured_logging import get_logger, truncate
+from app.agents.topic_index import TOPIC_INDEX_ENABLED, topic_index
+
 load_dotenv()
 
+log = get_logger("llm")
+
+OPENAI_MODEL = "gpt-3.5-turbo"
+PERPLEXITY_MODEL = "sonar-pro"
+
+# Keeps references to in-flight async cache refreshes so they aren't garbage collected
+_background_tasks = set()
+
+# Identical concurrent cache misses share one upstream call
+_llm_flight = SingleFlight()
+_llm_flight_async = AsyncSingleFlight()
+
+def _parse_retry_after(resp: httpx.Response, default: float) -> float:
+    """Read the retry-after header (seconds); fall back to a default when missing or malformed."""
+    try:
+        return float(resp.headers.get("retry-after", default))
+    except (TypeError, ValueError):
+        return default
+
+def _record_response(provider: str, resp: httpx.Response) -> None:
+    llm_responses_total.inc(provider, str(resp.status_code))
+
+def _record_usage(provider: str, response_data: dict) -> None:
+    """Count tokens from the provider's `usage` field, when it sends one."""
+    usage = response_data.get("usage") or {}
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if usage.get(kind):
+            llm_tokens_total.inc(provider, kind.split("_")[0], amount=usage[kind])
+
+def _record_transport_error(provider: str, e: Exception) -> None:
+    if isinstance(e, httpx.TimeoutException):
+        llm_responses_total.inc(provider, "timeout")
+    elif isinstance(e, httpx.RequestError):
+        llm_responses_total.inc(provider, "connection_error")
+
+# A completion cut off at max_tokens is retried once with this many times the budget
+TRUNCATION_RETRY_FACTOR = 2
+
+class Completion(str):
+    """
+    Completion text, plus whether the provider stopped it at max_tokens (finish_reason "length")
+    and, where it matters downstream, which provider produced it.
+    """
+
+    def __new__(cls, text: str, truncated: bool = False, provider: str = None):
+        completion = super().__new__(cls, text)
+        completion.truncated = truncated
+        completion.provider = provider
+        return completion
+
 class RateLimitError(Exception):
     """Custom exception for rate limiting"""
-    pass
+    def __init__(self, message: str = "", retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
 
-def call_llm_openai(prompt: str, max_tokens: int = 512, temperature: float = 0.95) -> str:
-    """Call OpenAI Chat Completion API with enhanced error handling."""
+def _openai_request(prompt: str, max_tokens: int, temperature: float, json_schema: dict = None) -> tuple:
+    """Build headers and payload for an OpenAI chat completion."""
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     if not OPENAI_API_KEY:
         raise Exception("OPENAI_API_KEY not set or loaded.")
 
     data = {
-        "model": "gpt-3.5-turbo",
+        "model": OPENAI_MODEL,
         "messages": [{"role": "user", "content": prompt}],
         "temperature": temperature,
         "max_tokens": max_tokens,
     }
+    if json_schema is not None:
+        # gpt-3.5-turbo supports JSON mode but not strict schemas; the prompt describes the shape
+        data["response_format"] = {"type": "json_object"}
     headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
-    url = "https://api.openai.com/v1/chat/completions"
+    return headers, data
+
+def _handle_openai_response(resp: httpx.Response) -> str:
+    """Validate an OpenAI response and extract the completion text."""
+    _record_response("openai", resp)
+    # Handle rate limiting - DON'T WAIT, just raise the error immediately
+    if resp.status_code == 429:
+        retry_after = _parse_retry_after(resp, 60)
+        # DON'T sleep here - let the fallback handle it
+        raise RateLimitError("OpenAI rate limit exceeded", retry_after=retry_after)
+    
+    # Handle other HTTP errors
+    if resp.status_code == 401:
+        raise Exception("Invalid OpenAI API key. Check your key and billing status.")
+    elif resp.status_code == 403:
+        raise Exception("OpenAI API access forbidden. Check your account permissions.")
+    elif resp.status_code >= 500:
+        raise Exception(f"OpenAI server error ({resp.status_code}). Try again later.")
+    
+    resp.raise_for_status()
+    response_data = resp.json()
+    
+    # Enhanced response validation
+    if "choices" not in response_data or not response_data["choices"]:
+        raise Exception("Invalid response format from OpenAI API")
+    
+    _record_usage("openai", response_data)
+    choice = response_data["choices"][0]
+    return Completion(choice["message"]["content"].strip(), truncated=choice.get("finish_reason") == "length")
+
+def _openai_error(e: Exception) -> Exception:
+    """Map transport/HTTP errors from an OpenAI call to the exceptions call_llm expects."""
+    if isinstance(e, RateLimitError):
+        return e
+    _record_transport_error("openai", e)
+    if isinstance(e, httpx.TimeoutException):
+        return Exception("OpenAI API request timed out. Check your connection.")
+    if isinstance(e, httpx.RequestError):
+        return Exception(f"OpenAI API connection error: {e}")
+    if "429" in str(e) or "rate limit" in str(e).lower():
+        return RateLimitError(str(e))
+    return Exception(f"OpenAI API error: {e}")
+
+def call_llm_openai(prompt: str, max_tokens: int = 512, temperature: float = 0.95,
+                    json_schema: dict = None) -> str:
+    """Call OpenAI Chat Completion API with enhanced error handling."""
+    headers, data = _openai_request(prompt, max_tokens, temperature, json_schema)
     
     try:
-        resp = httpx.post(url, headers=headers, json=data, timeout=90)
-        
-        # Handle rate limiting - DON'T WAIT, just raise the error immediately
-        if resp.status_code == 429:
-            retry_after = int(resp.headers.get("retry-after", 60))
-            print(f"OpenAI rate limited. Retry after {retry_after}s - switching to fallback immediately...")
-            # DON'T sleep here - let the fallback handle it
-            raise RateLimitError("OpenAI rate limit exceeded")
-        
-        # Handle other HTTP errors
-        if resp.status_code == 401:
-            raise Exception("Invalid OpenAI API key. Check your key and billing status.")
-        elif resp.status_code == 403:
-            raise Exception("OpenAI API access forbidden. Check your account permissions.")
-        elif resp.status_code >= 500:
-            raise Exception(f"OpenAI server error ({resp.status_code}). Try again later.")
-        
-        resp.raise_for_status()
-        response_data = resp.json()
-        
-        # Enhanced response validation
-        if "choices" not in response_data or not response_data["choices"]:
-            raise Exception("Invalid response format from OpenAI API")
-        
-        return response_data["choices"][0]["message"]["content"].strip()
-        
-    except httpx.TimeoutException:
-        raise Exception("OpenAI API request timed out. Check your connection.")
-    except httpx.RequestError as e:
-        raise Exception(f"OpenAI API connection error: {e}")
+        resp = get_client("openai").post("/chat/completions", headers=headers, json=data)
+        return _handle_openai_response(resp)
     except Exception as e:
-        if "429" in str(e) or "rate limit" in str(e).lower():
-            raise RateLimitError(str(e))
-        raise Exception(f"OpenAI API error: {e}")
+        raise _openai_error(e)
 
-def call_llm_perplexity(prompt: str, max_tokens: int = 512, temperature: float = 0.95) -> str:
-    """Call Perplexity API as fallback when OpenAI is rate limited."""
+async def call_llm_openai_async(prompt: str, max_tokens: int = 512, temperature: float = 0.95,
+                                json_schema: dict = None) -> str:
+    """Async variant of call_llm_openai built on the pooled async client."""
+    headers, data = _openai_request(prompt, max_tokens, temperature, json_schema)
+    
+    try:
+        resp = await get_async_client("openai").post("/chat/completions", headers=headers, json=data)
+        return _handle_openai_response(resp)
+    except Exception as e:
+        raise _openai_error(e)
+
+def _perplexity_request(prompt: str, max_tokens: int, temperature: float, json_schema: dict = None) -> tuple:
+    """Build headers and payload for a Perplexity chat completion."""
     PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
     
     if not PERPLEXITY_API_KEY:
@@ -76,190 +192,907 @@ def call_llm_perplexity(prompt: str, max_tokens: int = 512, temperature: float =
     
     # Using sonar-pro as requested
     data = {
-        "model": "sonar-pro",  # ✅ Using sonar-pro
+        "model": PERPLEXITY_MODEL,  # ✅ Using sonar-pro
         "messages": [{"role": "user", "content": prompt}],
         "temperature": temperature,
         "max_tokens": max_tokens
     }
+    if json_schema is not None:
+        data["response_format"] = {"type": "json_schema", "json_schema": {"schema": json_schema}}
+    return headers, data
+
+def _handle_perplexity_response(resp: httpx.Response) -> str:
+    """Validate a Perplexity response and extract the completion text."""
+    _record_response("perplexity", resp)
+    if resp.status_code == 429:
+        retry_after = _parse_retry_after(resp, 30)
+        raise RateLimitError("Perplexity rate limit exceeded", retry_after=retry_after)
     
-    try:
-        print(f"🔄 Calling Perplexity with sonar-pro model...")
-        resp = httpx.post("https://api.perplexity.ai/chat/completions", 
-                         headers=headers, json=data, timeout=90)
-        
-        print(f"📡 Perplexity response status: {resp.status_code}")
-        
-        if resp.status_code == 429:
-            retry_after = int(resp.headers.get("retry-after", 30))
-            print(f"⏳ Perplexity rate limited. Waiting {retry_after} seconds...")
-            time.sleep(min(retry_after, 30))
-            raise RateLimitError("Perplexity rate limit exceeded")
-        
-        if resp.status_code == 400:
-            print(f"❌ Perplexity 400 error: {resp.text}")
-            raise Exception(f"Perplexity API 400 error: {resp.text}")
-        
-        resp.raise_for_status()
-        response_data = resp.json()
-        
-        # Enhanced response validation
-        if "choices" not in response_data or not response_data["choices"]:
-            print(f"❌ Invalid response format: {response_data}")
-            raise Exception("Invalid response format from Perplexity API")
-            
-        content = response_data["choices"][0]["message"]["content"].strip()
-        print(f"✅ Perplexity sonar-pro response received: {len(content)} characters")
-        
-        return content
+    if resp.status_code == 400:
+        log.error("provider rejected request", provider="perplexity", status=400, body=resp.text)
+        raise Exception(f"Perplexity API 400 error: {truncate(resp.text)}")
+    
+    resp.raise_for_status()
+    response_data = resp.json()
+    
+    # Enhanced response validation
+    if "choices" not in response_data or not response_data["choices"]:
+        log.error("invalid provider response", provider="perplexity", body=response_data)
+        raise Exception("Invalid response format from Perplexity API")
         
-    except httpx.TimeoutException:
-        raise Exception("Perplexity API request timed out. Check your connection.")
-    except httpx.RequestError as e:
-        raise Exception(f"Perplexity API connection error: {e}")
-    except httpx.HTTPStatusError as e:
+    _record_usage("perplexity", response_data)
+    choice = response_data["choices"][0]
+    return Completion(choice["message"]["content"].strip(), truncated=choice.get("finish_reason") == "length")
+
+def _perplexity_error(e: Exception) -> Exception:
+    """Map transport/HTTP errors from a Perplexity call to the exceptions call_llm expects."""
+    if isinstance(e, RateLimitError):
+        return e
+    _record_transport_error("perplexity", e)
+    if isinstance(e, httpx.TimeoutException):
+        return Exception("Perplexity API request timed out. Check your connection.")
+    if isinstance(e, httpx.RequestError):
+        return Exception(f"Perplexity API connection error: {e}")
+    if isinstance(e, httpx.HTTPStatusError):
         error_detail = e.response.text if hasattr(e.response, 'text') else str(e)
-        raise Exception(f"Perplexity API HTTP error {e.response.status_code}: {error_detail}")
+        return Exception(f"Perplexity API HTTP error {e.response.status_code}: {error_detail}")
+    if "429" in str(e) or "rate limit" in str(e).lower():
+        return RateLimitError(str(e))
+    return Exception(f"Perplexity API error: {e}")
+
+def call_llm_perplexity(prompt: str, max_tokens: int = 512, temperature: float = 0.95,
+                        json_schema: dict = None) -> str:
+    """Call Perplexity API as fallback when OpenAI is rate limited."""
+    headers, data = _perplexity_request(prompt, max_tokens, temperature, json_schema)
+    
+    try:
+        resp = get_client("perplexity").post("/chat/completions", headers=headers, json=data)
+        return _handle_perplexity_response(resp)
+    except Exception as e:
+        raise _perplexity_error(e)
+
+async def call_llm_perplexity_async(prompt: str, max_tokens: int = 512, temperature: float = 0.95,
+                                    json_schema: dict = None) -> str:
+    """Async variant of call_llm_perplexity built on the pooled async client."""
+    headers, data = _perplexity_request(prompt, max_tokens, temperature, json_schema)
+    
+    try:
+        resp = await get_async_client("perplexity").post("/chat/completions", headers=headers, json=data)
+        return _handle_perplexity_response(resp)
+    except Exception as e:
+        raise _perplexity_error(e)
+
+def call_llm_local(prompt: str, max_tokens: int = 512, temperature: float = 0.95, json_schema: dict = None) -> str:
+    """
+    Last-resort fallback: the local CPU model (local_llm.py), bounded by its own latency budget.
+    json_schema isn't enforced; the prompt already describes the expected JSON.
+    """
+    return Completion(local_model.complete(prompt, max_tokens, temperature), provider="local")
+
+async def call_llm_local_async(prompt: str, max_tokens: int = 512, temperature: float = 0.95,
+                               json_schema: dict = None) -> str:
+    """Async variant of call_llm_local; generation runs on the local model's worker pool."""
+    return Completion(await local_model.complete_async(prompt, max_tokens, temperature), provider="local")
+
+# Providers in fallback order; each has a circuit in provider_health
+PROVIDER_ORDER = ["openai", "perplexity"] + (["local"] if LOCAL_LLM_ENABLED else [])
+PROVIDER_LABELS = {"openai": "OpenAI", "perplexity": "Perplexity", "local": "Local model"}
+_PROVIDER_CALLS = {"openai": call_llm_openai, "perplexity": call_llm_perplexity, "local": call_llm_local}
+_PROVIDER_CALLS_ASYNC = {"openai": call_llm_openai_async, "perplexity": call_llm_perplexity_async,
+                         "local": call_llm_local_async}
+# Never raced as a hedge: a losing local generation would keep the CPU busy until its budget runs out
+_UNHEDGED_PROVIDERS = {"local"}
+# Served, but never cached or indexed: a lower-quality outage answer must not outlive the outage
+_UNCACHED_PROVIDERS = {"local"}
+
+def _cacheable(result: str) -> bool:
+    return getattr(result, "provider", None) not in _UNCACHED_PROVIDERS
+
+_PROVIDER_REQUESTS = {"openai": _openai_request, "perplexity": _perplexity_request}
+_PROVIDER_RESPONSE_HANDLERS = {"openai": _handle_openai_response, "perplexity": _handle_perplexity_response}
+_PROVIDER_ERRORS = {"openai": _openai_error, "perplexity": _perplexity_error}
+
+# Runs the hedge (second) calls for the sync path; a losing call can't be interrupted, its result is discarded
+_hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="llm-hedge")
+
+def _record_provider_failure(name: str, error: Exception, errors: list) -> None:
+    """Feed a failed call into the provider's circuit and collect the error for reporting."""
+    if isinstance(error, RateLimitError):
+        circuit = provider_circuits[name]
+        retry_after = error.retry_after if error.retry_after is not None else circuit.cooldown
+        circuit.record_failure(str(error), retry_after=retry_after)
+        llm_rate_limited_total.inc(name)
+        llm_fallbacks_total.inc(name, "rate_limited")
+        log.warning("provider rate limited, falling back", provider=name, retry_after=retry_after)
+    else:
+        provider_circuits[name].record_failure(str(error))
+        llm_fallbacks_total.inc(name, "error")
+        log.warning("provider failed, falling back", provider=name, error=str(error))
+    errors.append(f"{PROVIDER_LABELS[name]}: {error}")
+
+def _skip_open_circuit(name: str, errors: list) -> bool:
+    """True (and note why) when the provider's circuit is open and it must be skipped."""
+    circuit = provider_circuits[name]
+    if circuit.allow_request():
+        return False
+    llm_fallbacks_total.inc(name, "circuit_open")
+    errors.append(f"{PROVIDER_LABELS[name]}: unavailable (circuit {circuit.state}, retry in {circuit.retry_in():.0f}s)")
+    return True
+
+def _queue_timeout(name: str, error: QueueTimeoutError, errors: list) -> None:
+    """Our own limiter gave up waiting: skip the provider without counting it as unhealthy."""
+    provider_circuits[name].release_trial()
+    llm_fallbacks_total.inc(name, "queue_timeout")
+    log.warning("rate limit queue timeout, falling back", provider=name, error=str(error))
+    errors.append(f"{PROVIDER_LABELS[name]}: {error}")
+
+def _truncation_retry_budget(name: str, max_tokens: int) -> int:
+    """
+    max_tokens for retrying a completion that stopped at its budget. The adaptive budget is sized
+    from past completions (and from a word-count estimate without tiktoken), so a longer answer
+    than usual is detected from finish_reason and retried rather than left cut off. A retry that is
+    truncated again is returned as is; the plan parser fills any missing days.
+    """
+    llm_truncated_total.inc(name)
+    log.warning("completion hit max_tokens, retrying with a larger budget", provider=name, max_tokens=max_tokens)
+    return max_tokens * TRUNCATION_RETRY_FACTOR
+
+def _retry_truncated(name: str, prompt: str, max_tokens: int, temperature: float, priority: int,
+                     json_schema: dict, truncated: str) -> str:
+    """
+    Re-call a provider whose completion stopped at max_tokens. The retry goes through the rate
+    limiter with its own (larger) token estimate like any request; if the limiter times out the
+    truncated completion is kept.
+    """
+    budget = _truncation_retry_budget(name, max_tokens)
+    try:
+        if name in rate_limiters:
+            rate_limiters[name].acquire(estimate_request_tokens(prompt, budget), priority)
+    except QueueTimeoutError as e:
+        log.warning("rate limit queue timeout, keeping the truncated completion", provider=name, error=str(e))
+        return truncated
+    return _PROVIDER_CALLS[name](prompt, budget, temperature, json_schema)
+
+async def _retry_truncated_async(name: str, prompt: str, max_tokens: int, temperature: float, priority: int,
+                                 json_schema: dict, truncated: str) -> str:
+    """Async variant of _retry_truncated."""
+    budget = _truncation_retry_budget(name, max_tokens)
+    try:
+        if name in rate_limiters:
+            await rate_limiters[name].acquire_async(estimate_request_tokens(prompt, budget), priority)
+    except QueueTimeoutError as e:
+        log.warning("rate limit queue timeout, keeping the truncated completion", provider=name, error=str(e))
+        return truncated
+    return await _PROVIDER_CALLS_ASYNC[name](prompt, budget, temperature, json_schema)
+
+def _invoke_provider(name: str, prompt: str, max_tokens: int, temperature: float, errors: list,
+                     priority: int = PRIORITY_INTERACTIVE, json_schema: dict = None) -> str:
+    """Call one provider once the client-side limiter allows it, recording latency and circuit outcome."""
+    try:
+        if name in rate_limiters:
+            rate_limiters[name].acquire(estimate_request_tokens(prompt, max_tokens), priority)
+    except QueueTimeoutError as e:
+        _queue_timeout(name, e, errors)
+        raise
+    started = time.monotonic()
+    try:
+        result = _PROVIDER_CALLS[name](prompt, max_tokens, temperature, json_schema)
+        if getattr(result, "truncated", False):
+            result = _retry_truncated(name, prompt, max_tokens, temperature, priority, json_schema, result)
     except Exception as e:
-        if "429" in str(e) or "rate limit" in str(e).lower():
-            raise RateLimitError(str(e))
-        raise Exception(f"Perplexity API error: {e}")
+        llm_request_seconds.observe(time.monotonic() - started, name, "error")
+        _record_provider_failure(name, e, errors)
+        raise
+    elapsed = time.monotonic() - started
+    latency_tracker.record(name, elapsed)
+    llm_request_seconds.observe(elapsed, name, "ok")
+    log.success("provider call ok", provider=name, ms=round(elapsed * 1000, 1))
+    provider_circuits[name].record_success()
+    return result
 
-def call_llm(prompt: str, max_tokens: int = 512, temperature: float = 0.95) -> str:
+async def _invoke_provider_async(name: str, prompt: str, max_tokens: int, temperature: float, errors: list,
+                                 priority: int = PRIORITY_INTERACTIVE, json_schema: dict = None) -> str:
+    """Async variant of _invoke_provider."""
+    try:
+        if name in rate_limiters:
+            await rate_limiters[name].acquire_async(estimate_request_tokens(prompt, max_tokens), priority)
+    except QueueTimeoutError as e:
+        _queue_timeout(name, e, errors)
+        raise
+    except asyncio.CancelledError:
+        provider_circuits[name].release_trial()
+        raise
+    started = time.monotonic()
+    try:
+        result = await _PROVIDER_CALLS_ASYNC[name](prompt, max_tokens, temperature, json_schema)
+        if getattr(result, "truncated", False):
+            result = await _retry_truncated_async(name, prompt, max_tokens, temperature, priority, json_schema,
+                                                  result)
+    except asyncio.CancelledError:
+        # Lost a hedge race or the client went away; don't hold a half-open trial slot
+        provider_circuits[name].release_trial()
+        raise
+    except Exception as e:
+        llm_request_seconds.observe(time.monotonic() - started, name, "error")
+        _record_provider_failure(name, e, errors)
+        raise
+    elapsed = time.monotonic() - started
+    latency_tracker.record(name, elapsed)
+    llm_request_seconds.observe(elapsed, name, "ok")
+    log.success("provider call ok", provider=name, ms=round(elapsed * 1000, 1))
+    provider_circuits[name].record_success()
+    return result
+
+def _llm_cache_key(prompt: str, temperature: float, json_schema: dict = None) -> str:
+    # max_tokens is left out: the adaptive budget moves as completions are observed, and keying on it
+    # would orphan every cached (and prewarmed) completion each time it does
+    model = f"{OPENAI_MODEL}|{PERPLEXITY_MODEL}" + ("|json" if json_schema is not None else "")
+    return make_cache_key(prompt, "auto", model, temperature, None)
+
+def call_llm(prompt: str, max_tokens: int = 512, temperature: float = 0.95, use_cache: bool = True,
+             hedge: str = None, priority: int = PRIORITY_INTERACTIVE, json_schema: dict = None) -> str:
     """
     Smart LLM caller with automatic fallback from OpenAI to Perplexity on rate limits.
+    Responses are served from the LLM cache when possible, and identical concurrent misses
+    are coalesced into one upstream call. Pass use_cache=False to bypass both.
+
+    hedge names an endpoint policy in hedging.py; when hedging is enabled a slow primary
+    is raced against the next provider. priority orders the call in the per-provider
+    rate-limit queue (interactive calls ahead of batch jobs). json_schema requests JSON-mode /
+    schema-constrained output from the providers.
     """
+    fetch = functools.partial(_call_providers, prompt, max_tokens, temperature, hedge=hedge, priority=priority,
+                              json_schema=json_schema)
+    if not use_cache:
+        return fetch()
+
+    key = _llm_cache_key(prompt, temperature, json_schema)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        value, is_stale = cached
+        if is_stale and llm_cache.begin_refresh(key):
+            threading.Thread(target=_refresh_cache_entry, args=(key, fetch), daemon=True).start()
+        return value
+
+    return _llm_flight.do(key, lambda: _fetch_and_cache(key, fetch))
+
+def _fetch_and_cache(key: str, fetch) -> str:
+    result = fetch()
+    if _cacheable(result):
+        llm_cache.set(key, result)
+    return result
+
+def _refresh_cache_entry(key: str, fetch) -> None:
+    """Stale-while-revalidate: fetch a fresh completion for a stale key in the background."""
     try:
-        # Try OpenAI first
-        print("🤖 Attempting OpenAI...")
-        return call_llm_openai(prompt, max_tokens, temperature)
-    except RateLimitError:
-        print("⚠️ OpenAI rate limited, switching to Perplexity sonar-pro...")
-        return call_llm_perplexity(prompt, max_tokens, temperature)
-    except Exception as openai_error:
-        # If OpenAI fails for other reasons, try Perplexity as fallback
-        if "rate limit" in str(openai_error).lower() or "429" in str(openai_error):
-            print("⚠️ OpenAI rate limited, switching to Perplexity sonar-pro...")
-            return call_llm_perplexity(prompt, max_tokens, temperature)
-        else:
-            # For non-rate-limit errors, try Perplexity once
+        result = fetch()
+        # A local fallback answer doesn't replace the stale entry; the next stale hit tries again
+        if _cacheable(result):
+            llm_cache.set(key, result)
+    except Exception as e:
+        log.warning("background cache refresh failed", error=str(e))
+    finally:
+        llm_cache.end_refresh(key)
+
+def _call_providers(prompt: str, max_tokens: int, temperature: float, hedge: str = None,
+                    priority: int = PRIORITY_INTERACTIVE, json_schema: dict = None) -> str:
+    """
+    Uncached provider chain. Providers whose circuit is open are skipped without a round trip,
+    and nothing here ever sleeps waiting for a rate limit to clear.
+    """
+    errors = []
+    policy = get_hedge_policy(hedge)
+    remaining = list(PROVIDER_ORDER)
+    while remaining:
+        name = remaining.pop(0)
+        if _skip_open_circuit(name, errors):
+            continue
+        if policy is not None and _hedgeable(remaining):
             try:
-                print(f"❌ OpenAI failed ({openai_error}), trying Perplexity sonar-pro as fallback...")
-                return call_llm_perplexity(prompt, max_tokens, temperature)
-            except Exception as fallback_error:
-                raise Exception(f"Both APIs failed. OpenAI: {openai_error} | Perplexity: {fallback_error}")
+                return _race_providers(name, remaining, prompt, max_tokens, temperature, policy, errors, priority,
+                                       json_schema)
+            except Exception:
+                continue
+        try:
+            return _invoke_provider(name, prompt, max_tokens, temperature, errors, priority, json_schema)
+        except Exception:
+            continue
+    llm_chain_failures_total.inc()
+    raise Exception(f"All LLM providers failed. {' | '.join(errors)}")
+
+def _hedgeable(remaining: list) -> bool:
+    return any(name not in _UNHEDGED_PROVIDERS for name in remaining)
+
+def _take_hedge(remaining: list, errors: list):
+    """
+    Remove and return the provider to fire as a hedge, or None. Providers with an open circuit
+    are dropped on the way (the fallback loop would skip them too); _UNHEDGED_PROVIDERS stay in
+    `remaining` and only ever run as the ordinary sequential fallback.
+    """
+    for name in list(remaining):
+        if name in _UNHEDGED_PROVIDERS:
+            continue
+        remaining.remove(name)
+        if not _skip_open_circuit(name, errors):
+            return name
+    return None
 
-def generate_content_ideas(topic: str, audience: str = "marketers") -> dict:
+def _start_primary(fn, *args) -> Future:
+    """
+    Run the primary call of a hedge race on its own thread. Queued behind busy _hedge_executor
+    workers it could still be waiting when the hedge delay expires, and the hedge would fire for a
+    call that hasn't started. The calling thread can't run it either: it must stay free to return
+    the hedge's answer while a slow primary is still blocked on the network.
+    """
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True, name="llm-primary").start()
+    return future
+
+def _race_providers(primary: str, remaining: list, prompt: str, max_tokens: int, temperature: float,
+                    policy, errors: list, priority: int = PRIORITY_INTERACTIVE, json_schema: dict = None) -> str:
+    """
+    Run the primary; if it hasn't answered within the hedge delay, fire the next healthy
+    provider too and return whichever succeeds first. A hedged secondary is removed from
+    `remaining` so the fallback loop doesn't call it again.
+    """
+    policy.record_call()
+    futures = {_start_primary(_invoke_provider, primary, prompt, max_tokens, temperature, errors, priority,
+                              json_schema): primary}
+    done, pending = wait(futures, timeout=policy.hedge_delay(primary))
+    if not done and policy.try_acquire_hedge():
+        secondary = _take_hedge(remaining, errors)
+        if secondary is not None:
+            log.info("hedging slow provider", provider=primary, hedge=secondary)
+            futures[_hedge_executor.submit(_invoke_provider, secondary, prompt, max_tokens, temperature, errors,
+                                           priority, json_schema)] = secondary
+
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+    raise Exception("Hedged providers failed")
+
+async def call_llm_async(prompt: str, max_tokens: int = 512, temperature: float = 0.95,
+                         use_cache: bool = True, hedge: str = None, priority: int = PRIORITY_INTERACTIVE,
+                         json_schema: dict = None) -> str:
+    """
+    Async variant of call_llm: same fallback, caching, coalescing, hedging and rate limiting,
+    without blocking a worker thread.
+    """
+    fetch = functools.partial(_call_providers_async, prompt, max_tokens, temperature, hedge=hedge,
+                              priority=priority, json_schema=json_schema)
+    if not use_cache:
+        return await fetch()
+
+    key = _llm_cache_key(prompt, temperature, json_schema)
+    cached = await llm_cache.get_async(key)
+    if cached is not None:
+        value, is_stale = cached
+        if is_stale:
+            _start_refresh_async(key, fetch)
+        return value
+
+    return await _llm_flight_async.do(key, lambda: _fetch_and_cache_async(key, fetch))
+
+async def _fetch_and_cache_async(key: str, fetch) -> str:
+    result = await fetch()
+    if _cacheable(result):
+        llm_cache.set_nowait(key, result)
+    return result
+
+def _start_refresh_async(key: str, fetch) -> None:
+    """Stale-while-revalidate on the event loop: refresh a stale key in a background task, once per key."""
+    if llm_cache.begin_refresh(key):
+        task = asyncio.create_task(_refresh_cache_entry_async(key, fetch))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+async def _refresh_cache_entry_async(key: str, fetch) -> None:
+    try:
+        result = await fetch()
+        if _cacheable(result):
+            llm_cache.set_nowait(key, result)
+    except Exception as e:
+        log.warning("background cache refresh failed", error=str(e))
+    finally:
+        llm_cache.end_refresh(key)
+
+async def _call_providers_async(prompt: str, max_tokens: int, temperature: float, hedge: str = None,
+                                priority: int = PRIORITY_INTERACTIVE, json_schema: dict = None) -> str:
+    """Async variant of _call_providers."""
+    errors = []
+    policy = get_hedge_policy(hedge)
+    remaining = list(PROVIDER_ORDER)
+    while remaining:
+        name = remaining.pop(0)
+        if _skip_open_circuit(name, errors):
+            continue
+        if policy is not None and _hedgeable(remaining):
+            try:
+                return await _race_providers_async(name, remaining, prompt, max_tokens, temperature, policy, errors,
+                                                   priority, json_schema)
+            except Exception:
+                continue
+        try:
+            return await _invoke_provider_async(name, prompt, max_tokens, temperature, errors, priority,
+                                                json_schema)
+        except Exception:
+            continue
+    llm_chain_failures_total.inc()
+    raise Exception(f"All LLM providers failed. {' | '.join(errors)}")
+
+async def _race_providers_async(primary: str, remaining: list, prompt: str, max_tokens: int, temperature: float,
+                                policy, errors: list, priority: int = PRIORITY_INTERACTIVE,
+                                json_schema: dict = None) -> str:
+    """Async variant of _race_providers; the losing request is actually cancelled."""
+    policy.record_call()
+    tasks = {asyncio.create_task(
+        _invoke_provider_async(primary, prompt, max_tokens, temperature, errors, priority, json_schema))}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=policy.hedge_delay(primary))
+        if not done and policy.try_acquire_hedge():
+            secondary = _take_hedge(remaining, errors)
+            if secondary is not None:
+                log.info("hedging slow provider", provider=primary, hedge=secondary)
+                tasks.add(asyncio.create_task(
+                    _invoke_provider_async(secondary, prompt, max_tokens, temperature, errors, priority,
+                                           json_schema)))
+
+        pending = tasks
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        raise Exception("Hedged providers failed")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# JSON mode: ask the providers for a JSON object so parsing is a single json.loads
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "false").lower() in ("1", "true", "yes")
+
+CONTENT_PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "ideas": {
+            "type": "object",
+            "properties": {day: {"type": "string"} for day in DAYS},
+            "required": DAYS,
+        },
+        "summary": {"type": "string"},
+    },
+    "required": ["ideas", "summary"],
+}
+
+def _plan_template() -> str:
+    return "plan-content-json" if LLM_JSON_MODE else "plan-content"
+
+def _build_content_ideas_prompt(topic: str, audience: str) -> tuple:
+    """Prompt and max_tokens for the weekly plan used by generate_content_ideas and its variants."""
+    return build_prompt(_plan_template(), topic=topic, audience=audience)
+
+def _fallback_content_ideas(topic: str, audience: str, error: Exception = None) -> dict:
+    """Static plan returned when every provider fails. Marked with "fallback" so callers can tell."""
+    # Enhanced fallback with more creative ideas
+    fallback_ideas = [
+        f"Introduction to {topic} basics for {audience}",
+        f"Common {topic} challenges and solutions",
+        f"Advanced {topic} strategies and techniques", 
+        f"Real-world {topic} case studies",
+        f"Essential {topic} tools and resources",
+        f"Latest {topic} trends and insights",
+        f"{topic} community tips and networking"
+    ]
+    return {
+        "ideas": fallback_ideas,
+        "summary": f"Comprehensive weekly content plan for {topic} designed to educate and engage {audience}. This fallback plan covers fundamental to advanced concepts with practical applications.",
+        "fallback": True,
+        "error": str(error) if error else None
+    }
+
+def generate_content_ideas(topic: str, audience: str = "marketers", priority: int = PRIORITY_INTERACTIVE) -> dict:
     """
     Generate 7 unique content ideas (Mon-Sun) and a brief weekly summary for the given topic and audience.
     
     Args:
         topic: The content topic to generate ideas for
         audience: Target audience (defaults to "marketers")
+        priority: Rate-limit queue priority (PRIORITY_BATCH for bulk jobs)
     
     Returns:
         dict: {"ideas": [...], "summary": "..."}
     """
-    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-    
-    # Enhanced prompt for better consistency
-    prompt = (
-        f"You are an expert content strategist creating content for {audience}.\n"
-        f"Create 7 unique, engaging content ideas about '{topic}' for a weekly content calendar.\n\n"
-        f"Requirements for each idea:\n"
-        f"- Tailored specifically for {audience}\n"
-        f"- Relevant, actionable, and valuable\n"
-        f"- Different approach/angle for each day\n"
-        f"- Concise but descriptive (10-15 words max)\n\n"
-        f"IMPORTANT: Format your response EXACTLY as a Python list:\n"
-        f"['Monday: [specific idea]', 'Tuesday: [specific idea]', 'Wednesday: [specific idea]', 'Thursday: [specific idea]', 'Friday: [specific idea]', 'Saturday: [specific idea]', 'Sunday: [specific idea]']\n\n"
-        f"After the list, provide a 2-3 sentence summary of the week's content strategy.\n\n"
-        f"Example format:\n"
-        f"['Monday: Introduction to {topic} fundamentals for beginners', 'Tuesday: Common {topic} mistakes to avoid', 'Wednesday: Advanced {topic} techniques', 'Thursday: {topic} case studies and examples', 'Friday: Tools and resources for {topic}', 'Saturday: {topic} trends and future outlook', 'Sunday: {topic} community and networking tips']\n\n"
-        f"This comprehensive weekly plan educates {audience} about {topic}, progressing from basics to advanced applications while building community engagement."
-    )
+    if priority == PRIORITY_INTERACTIVE:
+        topic_popularity.record(topic, audience)
+    indexed = _indexed_plan_response(topic, audience)
+    if indexed is not None:
+        return _parse_content_ideas(indexed, DAYS, topic, audience)
+    prompt, max_tokens = _build_content_ideas_prompt(topic, audience)
+    json_schema = CONTENT_PLAN_SCHEMA if LLM_JSON_MODE else None
     
     try:
-        print(f"🎯 Generating content ideas for '{topic}' targeting {audience}...")
-        response = call_llm(prompt, max_tokens=900, temperature=0.8)
-        result = _parse_content_ideas(response, days, topic, audience)
-        print(f"✅ Successfully generated {len(result['ideas'])} content ideas")
+        response = call_llm(prompt, max_tokens=max_tokens, temperature=0.8, hedge="plan-content", priority=priority,
+                            json_schema=json_schema)
+        record_completion(_plan_template(), response)
+        _index_plan(topic, audience, _llm_cache_key(prompt, 0.8, json_schema), response)
+        result = _parse_content_ideas(response, DAYS, topic, audience)
+        log.success("content plan generated", topic=topic, audience=audience)
         return result
     except Exception as e:
-        print(f"❌ Error in generate_content_ideas: {e}")
-        # Enhanced fallback with more creative ideas
-        fallback_ideas = [
-            f"Introduction to {topic} basics for {audience}",
-            f"Common {topic} challenges and solutions",
-            f"Advanced {topic} strategies and techniques", 
-            f"Real-world {topic} case studies",
-            f"Essential {topic} tools and resources",
-            f"Latest {topic} trends and insights",
-            f"{topic} community tips and networking"
-        ]
-        return {
-            "ideas": fallback_ideas,
-            "summary": f"Comprehensive weekly content plan for {topic} designed to educate and engage {audience}. This fallback plan covers fundamental to advanced concepts with practical applications."
-        }
+        log.error("content plan generation failed, using fallback plan", topic=topic, error=str(e))
+        return _fallback_content_ideas(topic, audience, e)
 
-def _parse_content_ideas(raw_response: str, days: list, topic: str, audience: str) -> dict:
+async def generate_content_ideas_async(topic: str, audience: str = "marketers",
+                                       priority: int = PRIORITY_INTERACTIVE) -> dict:
     """
-    Parse LLM response to extract ideas and summary with enhanced error handling.
+    Async variant of generate_content_ideas for the FastAPI endpoints.
     """
-    summary = ""
-    ideas_final = []
+    if priority == PRIORITY_INTERACTIVE:
+        topic_popularity.record(topic, audience)
+    indexed = await _indexed_plan_response_async(topic, audience)
+    if indexed is not None:
+        return _parse_content_ideas(indexed, DAYS, topic, audience)
+    prompt, max_tokens = _build_content_ideas_prompt(topic, audience)
+    json_schema = CONTENT_PLAN_SCHEMA if LLM_JSON_MODE else None
     
-    # Enhanced parsing with multiple attempts
-    if "[" in raw_response and "]" in raw_response:
-        try:
-            # Find the list portion with better detection
-            start_indices = [i for i, char in enumerate(raw_response) if char == "["]
-            end_indices = [i for i, char in enumerate(raw_response) if char == "]"]
-            
-            # Try each potential list match
-            for start_idx in start_indices:
-                for end_idx in end_indices:
-                    if end_idx > start_idx:
-                        try:
-                            ideas_raw = raw_response[start_idx:end_idx + 1]
-                            ideas_data = ast.literal_eval(ideas_raw)
-                            
-                            if isinstance(ideas_data, list) and len(ideas_data) >= 5:  # At least 5 ideas
-                                # Extract ideas for each day
-                                for day in days:
-                                    found = next((s for s in ideas_data if isinstance(s, str) and s.strip().lower().startswith(day.lower())), None)
-                                    if found and ":" in found:
-                                        idea_text = found.split(":", 1)[1].strip()
-                                        # Clean up the idea text
-                                        idea_text = idea_text.strip('"').strip("'").strip()
-                                        ideas_final.append(idea_text)
-                                    else:
-                                        ideas_final.append(f"Creative {topic} content for {day.lower()}")
-                                
-                                # Extract summary (text after the list)
-                                summary_text = raw_response[end_idx + 1:].strip()
-                                summary = summary_text.lstrip(".,;:-\n").strip() if summary_text else ""
-                                
-                                break
-                        except (ValueError, SyntaxError, TypeError):
-                            continue
-                if ideas_final:
+    try:
+        response = await call_llm_async(prompt, max_tokens=max_tokens, temperature=0.8, hedge="plan-content",
+                                        priority=priority, json_schema=json_schema)
+        record_completion(_plan_template(), response)
+        _index_plan(topic, audience, _llm_cache_key(prompt, 0.8, json_schema), response)
+        result = _parse_content_ideas(response, DAYS, topic, audience)
+        log.success("content plan generated", topic=topic, audience=audience)
+        return result
+    except Exception as e:
+        log.error("content plan generation failed, using fallback plan", topic=topic, error=str(e))
+        return _fallback_content_ideas(topic, audience, e)
+
+def plan_cached_at(topic: str, audience: str):
+    """When the cached completion for this plan was generated (epoch seconds), or None if there is none."""
+    prompt, _ = _build_content_ideas_prompt(topic, audience)
+    return llm_cache.created_at(_llm_cache_key(prompt, 0.8, CONTENT_PLAN_SCHEMA if LLM_JSON_MODE else None))
+
+def prewarm_content_ideas(topic: str, audience: str) -> None:
+    """
+    Regenerate a plan into the LLM cache ahead of demand (used by the prewarmer). Bypasses the
+    cached copy, queues at batch priority, and raises instead of falling back.
+    """
+    prompt, max_tokens = _build_content_ideas_prompt(topic, audience)
+    json_schema = CONTENT_PLAN_SCHEMA if LLM_JSON_MODE else None
+    response = call_llm(prompt, max_tokens=max_tokens, temperature=0.8, use_cache=False, priority=PRIORITY_BATCH,
+                        json_schema=json_schema)
+    if not _cacheable(response):
+        raise Exception("only the local fallback model answered; not prewarming with its plan")
+    record_completion(_plan_template(), response)
+    key = _llm_cache_key(prompt, 0.8, json_schema)
+    llm_cache.set(key, response)
+    _index_plan(topic, audience, key, response)
+
+def _indexed_plan_response(topic: str, audience: str):
+    """
+    Cached completion of a plan generated earlier for the same topic after canonicalization
+    ("AI Marketing" == "ai-marketing strategies") or a near-duplicate one. None on a miss, or
+    when that completion has expired or gone stale (the normal path then refreshes it).
+    """
+    match = _indexed_plan_match(topic, audience)
+    return _indexed_plan_hit(topic, match, llm_cache.get(match.value)) if match is not None else None
+
+async def _indexed_plan_response_async(topic: str, audience: str):
+    """Async variant of _indexed_plan_response; reads the cache with get_async."""
+    match = _indexed_plan_match(topic, audience)
+    return _indexed_plan_hit(topic, match, await llm_cache.get_async(match.value)) if match is not None else None
+
+def _indexed_plan_match(topic: str, audience: str):
+    if not TOPIC_INDEX_ENABLED or not llm_cache.enabled:
+        return None
+    match = topic_index.lookup(audience, topic)
+    if match is None:
+        topic_index_lookups_total.inc("miss")
+    return match
+
+def _indexed_plan_hit(topic: str, match, cached):
+    if cached is None or cached[1]:
+        topic_index_lookups_total.inc("expired")
+        return None
+    topic_index_lookups_total.inc("exact" if match.similarity >= 1 else "similar")
+    log.debug("plan served from topic index", topic=topic, matched=match.topic, similarity=round(match.similarity, 3))
+    return cached[0]
+
+def _index_plan(topic: str, audience: str, key: str, response: str) -> None:
+    if TOPIC_INDEX_ENABLED and llm_cache.enabled and _cacheable(response):
+        topic_index.add(audience, topic, key)
+
+async def _stream_provider_async(name: str, prompt: str, max_tokens: int, temperature: float,
+                                 json_schema: dict = None):
+    """Yield text deltas from one provider's streaming chat completion (stream=true)."""
+    if name == "local":
+        # The local model doesn't stream; its whole (time-bounded) completion is one delta
+        yield await call_llm_local_async(prompt, max_tokens, temperature, json_schema)
+        return
+    headers, data = _PROVIDER_REQUESTS[name](prompt, max_tokens, temperature, json_schema)
+    data["stream"] = True
+    try:
+        async with get_async_client(name).stream("POST", "/chat/completions", headers=headers, json=data) as resp:
+            if resp.status_code == 200:
+                _record_response(name, resp)
+            else:
+                await resp.aread()
+                # Raises the same errors as the non-streaming call (429 -> RateLimitError, ...)
+                _PROVIDER_RESPONSE_HANDLERS[name](resp)
+            async for line in resp.aiter_lines():
+                delta = parse_sse_delta(line)
+                if delta is SSE_DONE:
                     break
-            
-            # If parsing failed, try fallback
-            if not ideas_final:
-                raise ValueError("Could not parse list format")
-                
-        except Exception as e:
-            print(f"⚠️ Failed to parse list format: {e}")
-            ideas_final = _fallback_parse_ideas(raw_response, days, topic)
-            summary = f"Strategic weekly content plan for {topic} targeting {audience}."
+                if delta:
+                    yield delta
+    except Exception as e:
+        raise _PROVIDER_ERRORS[name](e)
+
+async def stream_content_ideas_async(topic: str, audience: str = "marketers",
+                                     priority: int = PRIORITY_INTERACTIVE):
+    """
+    Streaming variant of generate_content_ideas.
+
+    Yields event dicts as the plan is produced:
+        {"event": "idea", "index": 0, "day": "Monday", "idea": "..."}   as soon as each day is complete
+        {"event": "summary", "summary": "...", "ideas": [...]}          the authoritative full plan
+        {"event": "done", "fallback": bool}
+    Days the incremental parser misses are filled in by _parse_content_ideas when the stream ends,
+    and a day may be sent again (same index, new idea) when the final plan differs from what was
+    streamed - e.g. after a provider failed mid-stream. The latest event for an index wins.
+    """
+    if priority == PRIORITY_INTERACTIVE:
+        topic_popularity.record(topic, audience)
+    prompt, max_tokens = _build_content_ideas_prompt(topic, audience)
+    json_schema = CONTENT_PLAN_SCHEMA if LLM_JSON_MODE else None
+    temperature = 0.8
+    key = _llm_cache_key(prompt, temperature, json_schema)
+    parser = IncrementalIdeaParser()
+    response = None
+    errors = []
+
+    indexed = await _indexed_plan_response_async(topic, audience)
+    cached = (indexed, False) if indexed is not None else await llm_cache.get_async(key)
+    if cached is not None:
+        response, is_stale = cached
+        if is_stale:
+            _start_refresh_async(key, functools.partial(_call_providers_async, prompt, max_tokens, temperature,
+                                                        hedge="plan-content", priority=priority,
+                                                        json_schema=json_schema))
+    else:
+        for name in PROVIDER_ORDER:
+            if _skip_open_circuit(name, errors):
+                continue
+            settled = False
+            try:
+                try:
+                    if name in rate_limiters:
+                        await rate_limiters[name].acquire_async(estimate_request_tokens(prompt, max_tokens), priority)
+                except QueueTimeoutError as e:
+                    settled = True
+                    _queue_timeout(name, e, errors)
+                    continue
+                parser.reset_text()
+                truncated = False
+                started = time.monotonic()
+                try:
+                    async for delta in _stream_provider_async(name, prompt, max_tokens, temperature, json_schema):
+                        if delta is SSE_TRUNCATED:
+                            truncated = True
+                            continue
+                        for index, idea in parser.feed(delta):
+                            yield {"event": "idea", "index": index, "day": DAYS[index], "idea": idea}
+                except Exception as e:
+                    settled = True
+                    llm_request_seconds.observe(time.monotonic() - started, name, "error")
+                    _record_provider_failure(name, e, errors)
+                    continue
+                settled = True
+                elapsed = time.monotonic() - started
+                llm_request_seconds.observe(elapsed, name, "ok")
+                log.success("provider stream ok", provider=name, ms=round(elapsed * 1000, 1))
+                provider_circuits[name].record_success()
+            finally:
+                # Cancelled, or the client disconnected (GeneratorExit at a yield) before an outcome was
+                # recorded: free a half-open trial slot now rather than after CIRCUIT_TRIAL_TIMEOUT
+                if not settled:
+                    provider_circuits[name].release_trial()
+            response = parser.text
+            if truncated:
+                # The stream stopped at max_tokens: fetch the whole plan with a larger budget (not streamed);
+                # days that differ from what was already sent are re-emitted below
+                try:
+                    response = await _retry_truncated_async(name, prompt, max_tokens, temperature, priority,
+                                                            json_schema, response)
+                except Exception as e:
+                    log.warning("retry of truncated stream failed, keeping the partial plan", provider=name,
+                                error=str(e))
+            record_completion(_plan_template(), response)
+            if name not in _UNCACHED_PROVIDERS:
+                llm_cache.set_nowait(key, response)
+                _index_plan(topic, audience, key, response)
+            break
+
+    if response is None:
+        log.error("content plan stream failed, using fallback plan", topic=topic, error=" | ".join(errors))
+        result = _fallback_content_ideas(topic, audience, Exception(" | ".join(errors)))
+    else:
+        result = _parse_content_ideas(response, DAYS, topic, audience)
+
+    # Emit every idea the client doesn't have yet in its final form: days the incremental parser missed,
+    # and days streamed by a provider that then failed, whose ideas the fallback answer replaced
+    for index, idea in enumerate(result["ideas"]):
+        if parser.emitted.get(index) != idea:
+            yield {"event": "idea", "index": index, "day": DAYS[index], "idea": idea}
+    yield {"event": "summary", "summary": result["summary"], "ideas": result["ideas"]}
+    yield {"event": "done", "fallback": bool(result.get("fallback"))}
+
+# Special characters the list scanner has to look at; everything else is skipped by the regex engine
+_LIST_SCAN_RE = re.compile(r"[\[\]'\"\\]")
+_LIST_SCAN_NO_QUOTES_RE = re.compile(r"[\[\]]")
+# Bullets, numbering and markdown that models put in front of "Monday: ..." lines
+_LINE_PREFIX_RE = re.compile(r"^[\s\-\*\#>•\d\.\)]*")
+_CODE_FENCE_RE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+
+def _iter_top_level_lists(text: str, respect_quotes: bool = True):
+    """
+    Yield (start, end) of every top-level [...] span in one left-to-right pass.
+    Brackets inside quoted strings are ignored unless respect_quotes is False
+    (used as a second pass when stray apostrophes throw the quote tracking off).
+    """
+    depth = 0
+    start = -1
+    quote = None
+    escaped = False
+    scanner = _LIST_SCAN_RE if respect_quotes else _LIST_SCAN_NO_QUOTES_RE
+    for match in scanner.finditer(text):
+        ch = match.group()
+        i = match.start()
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = i + 1 < len(text) and text[i + 1] in "'\"\\"
+            elif ch == quote:
+                quote = None
+            continue
+        if ch == "[":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "]" and depth:
+            depth -= 1
+            if depth == 0:
+                yield start, i
+        elif ch in "'\"" and depth:
+            quote = ch
+
+def _literal_list(span: str):
+    """Evaluate a list literal written as Python or JSON; None if it isn't one."""
+    for loader in (ast.literal_eval, json.loads):
+        try:
+            value = loader(span)
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            continue
+        if isinstance(value, list):
+            return value
+    return None
+
+def _day_of(text: str, days: list):
+    """The day a "Monday: ..." style item starts with, if any."""
+    lowered = text.lower()
+    for day in days:
+        if lowered.startswith(day.lower()):
+            return day
+    return None
+
+def _clean_idea(text: str) -> str:
+    return text.strip().strip("*").strip().strip('"').strip("'").strip()
+
+def _ideas_from_items(items: list, days: list, topic: str) -> list:
+    """Map list items to days in one pass; items without day prefixes are taken in order."""
+    by_day = {}
+    plain = []
+    for item in items:
+        if not isinstance(item, str):
+            continue
+        text = item.strip()
+        day = _day_of(text, days)
+        if day and ":" in text:
+            by_day.setdefault(day, _clean_idea(text.split(":", 1)[1]))
+        elif text:
+            plain.append(_clean_idea(text))
+    if not by_day and len(plain) == len(days):
+        return plain
+    return [by_day.get(day) or f"Creative {topic} content for {day.lower()}" for day in days]
+
+def _parse_json_plan(raw_response: str, days: list, topic: str):
+    """
+    Parse a JSON-mode response: {"ideas": {"Monday": "...", ...} or [...], "summary": "..."}.
+    Returns (ideas, summary) or None.
+    """
+    text = _CODE_FENCE_RE.sub("", raw_response.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or "ideas" not in data:
+        return None
+    ideas = data["ideas"]
+    if isinstance(ideas, dict):
+        by_day = {str(key).strip().lower(): value for key, value in ideas.items()}
+        ideas = [f"{day}: {by_day.get(day.lower(), '')}" for day in days if by_day.get(day.lower())]
+    if not isinstance(ideas, list) or len(ideas) < 5:
+        return None
+    summary = data.get("summary")
+    return _ideas_from_items(ideas, days, topic), summary.strip() if isinstance(summary, str) else ""
+
+def _parse_list_plan(raw_response: str, days: list, topic: str):
+    """
+    Find the first top-level list literal with at least 5 items. Every top-level span is
+    evaluated at most once, so the total work is linear in the response size.
+    Returns (ideas, summary) or None.
+    """
+    for respect_quotes in (True, False):
+        for start, end in _iter_top_level_lists(raw_response, respect_quotes):
+            items = _literal_list(raw_response[start:end + 1])
+            if items is None or len(items) < 5:  # At least 5 ideas
+                continue
+            # Extract summary (text after the list)
+            summary_text = raw_response[end + 1:].strip()
+            summary = summary_text.lstrip(".,;:-\n").strip() if summary_text else ""
+            return _ideas_from_items(items, days, topic), summary
+    return None
+
+def _parse_content_ideas(raw_response: str, days: list, topic: str, audience: str) -> dict:
+    """
+    Parse LLM response to extract ideas and summary with enhanced error handling.
+
+    Tries a JSON object (JSON mode), then the first list literal, then day-prefixed lines.
+    Each strategy is a single pass over the response.
+    """
+    parsed = _parse_json_plan(raw_response, days, topic)
+    if parsed is not None:
+        plan_parse_total.inc("json")
+    else:
+        parsed = _parse_list_plan(raw_response, days, topic)
+        if parsed is not None:
+            plan_parse_total.inc("list")
+    if parsed is not None:
+        ideas_final, summary = parsed
+    elif "[" in raw_response and "]" in raw_response:
+        log.warning("no list literal with enough ideas, parsing lines", response=raw_response)
+        plan_parse_failures_total.inc("malformed_list")
+        plan_parse_total.inc("lines")
+        ideas_final = _fallback_parse_ideas(raw_response, days, topic)
+        summary = f"Strategic weekly content plan for {topic} targeting {audience}."
     else:
         # Fallback parsing for non-list format
+        plan_parse_failures_total.inc("no_list")
+        plan_parse_total.inc("lines")
         ideas_final = _fallback_parse_ideas(raw_response, days, topic)
         summary = f"Comprehensive weekly content strategy for {topic}, designed to engage {audience} across all seven days."
     
     # Ensure exactly 7 ideas
     ideas_final = ideas_final[:7]
+    if len(ideas_final) < 7:
+        plan_parse_placeholder_days_total.inc(amount=7 - len(ideas_final))
     while len(ideas_final) < 7:
         day_name = days[len(ideas_final)]
         ideas_final.append(f"{day_name.lower()} content idea about {topic}")
@@ -271,26 +1104,30 @@ def _parse_content_ideas(raw_response: str, days: list, topic: str, audience: st
 
 def _fallback_parse_ideas(raw_response: str, days: list, topic: str) -> list:
     """
-    Fallback method to extract ideas from unstructured text.
+    Fallback method to extract ideas from unstructured text: one pass over its lines, then
+    (for days still missing) one pass of the item scanner used for streaming, which also
+    recovers items from broken or truncated list literals.
     """
-    ideas_final = []
-    lines = [line.strip() for line in raw_response.split('\n') if line.strip()]
+    found = {}
+    for line in raw_response.split('\n'):
+        # Strip bullets/numbering/markdown such as "1. **Monday:** ..."
+        line = _LINE_PREFIX_RE.sub("", line).replace("**", "").strip()
+        if not line:
+            continue
+        day = _day_of(line, days)
+        if day and day not in found and ":" in line:
+            found[day] = _clean_idea(line.split(":", 1)[1])
     
-    # Look for day-prefixed lines
-    for day in days:
-        found_line = None
-        for line in lines:
-            if line.lower().startswith(day.lower()):
-                found_line = line
-                break
-        
-        if found_line and ":" in found_line:
-            idea = found_line.split(":", 1)[1].strip()
-            ideas_final.append(idea)
-        else:
-            ideas_final.append(f"Content idea for {day.lower()} about {topic}")
+    if len(found) < len(days):
+        scanner = IncrementalIdeaParser()
+        for index, idea in scanner.feed(raw_response + "\n"):
+            day = DAYS[index]
+            if day in days and day not in found:
+                found[day] = _clean_idea(idea)
     
-    return ideas_final
+    if len(found) < len(days):
+        plan_parse_placeholder_days_total.inc(amount=len(days) - len(found))
+    return [found.get(day) or f"Content idea for {day.lower()} about {topic}" for day in days]
 
 def summarize_single_idea(topic: str, audience: str, idea: str, day: str) -> str:
     """
@@ -305,22 +1142,154 @@ def summarize_single_idea(topic: str, audience: str, idea: str, day: str) -> str
     Returns:
         str: Analysis summary
     """
-    prompt = (
-        f"As a content strategist, analyze why this content idea is effective for {day}:\n\n"
-        f"Topic: {topic}\n"
-        f"Audience: {audience}\n"
-        f"Content Idea: {idea}\n\n"
-        f"Write 2-3 sentences explaining:\n"
-        f"1. Why this idea works well for {day}\n"
-        f"2. How it appeals to {audience}\n"
-        f"3. What specific value it provides\n\n"
-        f"Keep it concise, actionable, and professional."
-    )
+    prompt, max_tokens = _build_summary_prompt(topic, audience, idea, day)
     
     try:
-        return call_llm(prompt, max_tokens=150, temperature=0.7)
+        summary = call_llm(prompt, max_tokens=max_tokens, temperature=0.7, hedge="summarize-idea")
+        record_completion("summarize-idea", summary)
+        return summary
     except Exception as e:
-        return f"This {day} content idea about {topic} is designed to engage {audience} with relevant, timely information. The content provides valuable insights tailored to their specific needs and interests."
+        return _fallback_summary(topic, audience, day)
+
+async def summarize_single_idea_async(topic: str, audience: str, idea: str, day: str) -> str:
+    """
+    Async variant of summarize_single_idea for the FastAPI endpoints.
+    """
+    prompt, max_tokens = _build_summary_prompt(topic, audience, idea, day)
+    
+    try:
+        summary = await call_llm_async(prompt, max_tokens=max_tokens, temperature=0.7, hedge="summarize-idea")
+        record_completion("summarize-idea", summary)
+        return summary
+    except Exception as e:
+        return _fallback_summary(topic, audience, day)
+
+def _build_summary_prompt(topic: str, audience: str, idea: str, day: str) -> tuple:
+    return build_prompt("summarize-idea", topic=topic, audience=audience, idea=idea, day=day)
+
+def _fallback_summary(topic: str, audience: str, day: str) -> str:
+    return f"This {day} content idea about {topic} is designed to engage {audience} with relevant, timely information. The content provides valuable insights tailored to their specific needs and interests."
+
+def summarize_week(topic: str, audience: str, ideas: list, days: list = DAYS) -> dict:
+    """
+    Analyze a whole weekly plan with one LLM call instead of one summarize_single_idea call per day.
+    
+    Args:
+        topic: Main content topic
+        audience: Target audience
+        ideas: The plan's ideas, in day order (blank ideas are skipped)
+        days: Day names matching `ideas` (defaults to Monday-Sunday)
+    
+    Returns:
+        dict: {"summaries": {day: analysis}, "batched_days": [...], "fallback_days": [...]}
+        Days missing from the batched answer are summarized with per-day calls.
+    """
+    plan = _week_plan(ideas, days)
+    if not plan:
+        return {"summaries": {}, "batched_days": [], "fallback_days": []}
+    prompt, max_tokens = _build_week_summary_prompt(topic, audience, plan)
+    
+    try:
+        response = call_llm(prompt, max_tokens=max_tokens, temperature=0.7, hedge="summarize-week",
+                            json_schema=_week_summary_schema(plan) if LLM_JSON_MODE else None)
+        record_completion("summarize-week", response)
+        summaries = _parse_week_summaries(response, list(plan))
+    except Exception as e:
+        log.warning("batched week analysis failed, summarizing per day", topic=topic, error=str(e))
+        summaries = {}
+    
+    missing = [day for day in plan if day not in summaries]
+    if missing:
+        week_summary_fallback_days_total.inc(amount=len(missing))
+    for day in missing:
+        summaries[day] = summarize_single_idea(topic, audience, plan[day], day)
+    return _week_result(plan, summaries, missing)
+
+async def summarize_week_async(topic: str, audience: str, ideas: list, days: list = DAYS) -> dict:
+    """
+    Async variant of summarize_week for the FastAPI endpoints; per-day fallbacks run concurrently.
+    """
+    plan = _week_plan(ideas, days)
+    if not plan:
+        return {"summaries": {}, "batched_days": [], "fallback_days": []}
+    prompt, max_tokens = _build_week_summary_prompt(topic, audience, plan)
+    
+    try:
+        response = await call_llm_async(prompt, max_tokens=max_tokens, temperature=0.7, hedge="summarize-week",
+                                        json_schema=_week_summary_schema(plan) if LLM_JSON_MODE else None)
+        record_completion("summarize-week", response)
+        summaries = _parse_week_summaries(response, list(plan))
+    except Exception as e:
+        log.warning("batched week analysis failed, summarizing per day", topic=topic, error=str(e))
+        summaries = {}
+    
+    missing = [day for day in plan if day not in summaries]
+    if missing:
+        week_summary_fallback_days_total.inc(amount=len(missing))
+        results = await asyncio.gather(
+            *(summarize_single_idea_async(topic, audience, plan[day], day) for day in missing))
+        summaries.update(zip(missing, results))
+    return _week_result(plan, summaries, missing)
+
+def _week_plan(ideas: list, days: list) -> dict:
+    """{day: idea} for the non-blank ideas, in day order."""
+    return {day: idea.strip() for day, idea in zip(days, ideas) if idea and idea.strip()}
+
+def _week_result(plan: dict, summaries: dict, missing: list) -> dict:
+    return {
+        "summaries": {day: summaries[day] for day in plan},
+        "batched_days": [day for day in plan if day not in missing],
+        "fallback_days": missing,
+    }
+
+def _week_summary_schema(plan: dict) -> dict:
+    return {
+        "type": "object",
+        "properties": {day: {"type": "string"} for day in plan},
+        "required": list(plan),
+    }
+
+def _build_week_summary_prompt(topic: str, audience: str, plan: dict) -> tuple:
+    lines = "\n".join(f"{day}: {idea}" for day, idea in plan.items())
+    shape = "{" + ", ".join(f'"{day}": "..."' for day in plan) + "}"
+    return build_prompt("summarize-week", topic=topic, audience=audience, plan=lines, shape=shape)
+
+def _parse_week_summaries(raw_response: str, days: list) -> dict:
+    """
+    Per-day analyses from a week summary response: a JSON object keyed by day, or else
+    "Monday: ..." sections (a section runs until the next day heading). Days not found are left out.
+    """
+    text = _CODE_FENCE_RE.sub("", raw_response.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            by_day = {str(key).strip().lower(): value for key, value in data.items()}
+            found = {day: by_day[day.lower()].strip() for day in days
+                     if isinstance(by_day.get(day.lower()), str) and by_day[day.lower()].strip()}
+            if found:
+                return found
+
+    sections = {}
+    current = None
+    for line in text.split("\n"):
+        stripped = _LINE_PREFIX_RE.sub("", line).replace("**", "").strip()
+        day = _day_of(stripped, days)
+        heading = day and (":" in stripped or stripped.lower() == day.lower())
+        if heading and day not in sections:
+            current = day
+            sections[day] = [stripped.split(":", 1)[1]] if ":" in stripped else []
+        elif current and stripped:
+            sections[current].append(stripped)
+    found = {}
+    for day, parts in sections.items():
+        analysis = _clean_idea(" ".join(part.strip() for part in parts))
+        if analysis:
+            found[day] = analysis
+    return found
 
 def generate_alternate_idea(topic: str, audience: str, day: str, exclude: str = "") -> str:
     """
@@ -335,26 +1304,122 @@ def generate_alternate_idea(topic: str, audience: str, day: str, exclude: str =
     Returns:
         str: Alternative content idea
     """
-    exclude_text = f"\n\nDO NOT suggest anything similar to: '{exclude}'" if exclude else ""
+    pooled = alternate_pool.take(topic, audience, day, exclude)
+    if pooled is not None:
+        return pooled
+    prompt, max_tokens = _build_alternate_prompt(topic, audience, day, exclude)
     
-    prompt = (
-        f"Generate a fresh, creative content idea for {day} about '{topic}' targeting {audience}.\n"
-        f"Make it engaging, specific, and different from typical content in this space.\n"
-        f"Focus on actionable value for {audience}.\n"
-        f"Provide ONLY the content idea title/description, no extra text.{exclude_text}"
-    )
+    try:
+        # Regenerate should always produce a fresh idea, so skip the cache
+        result = call_llm(prompt, max_tokens=max_tokens, temperature=1.0, use_cache=False, hedge="alternate-idea")
+        record_completion("alternate-idea", result)
+        # Clean up the response
+        return result.strip().strip('"').strip("'").strip()
+    except Exception as e:
+        return f"Alternative {day} content about {topic} for {audience}"
+
+async def generate_alternate_idea_async(topic: str, audience: str, day: str, exclude: str = "") -> str:
+    """
+    Async variant of generate_alternate_idea for the FastAPI endpoints.
+    """
+    pooled = await alternate_pool.take_async(topic, audience, day, exclude)
+    if pooled is not None:
+        return pooled
+    prompt, max_tokens = _build_alternate_prompt(topic, audience, day, exclude)
     
     try:
-        result = call_llm(prompt, max_tokens=100, temperature=1.0)
+        # Regenerate should always produce a fresh idea, so skip the cache
+        result = await call_llm_async(prompt, max_tokens=max_tokens, temperature=1.0, use_cache=False,
+                                      hedge="alternate-idea")
+        record_completion("alternate-idea", result)
         # Clean up the response
         return result.strip().strip('"').strip("'").strip()
     except Exception as e:
         return f"Alternative {day} content about {topic} for {audience}"
 
+def _build_alternate_prompt(topic: str, audience: str, day: str, exclude: str) -> tuple:
+    exclude_clause = f"\n\nDO NOT suggest anything similar to: '{exclude}'" if exclude else ""
+    return build_prompt("alternate-idea", topic=topic, audience=audience, day=day, exclude_clause=exclude_clause)
+
+def _build_alternate_pool_prompt(topic: str, audience: str, days: list, avoid: dict) -> tuple:
+    count = ALT_POOL_SIZE
+    avoided = [f"{day}: {idea}" for day in days for idea in avoid.get(day, ())]
+    avoid_clause = "\n\nDO NOT suggest anything similar to:\n" + "\n".join(avoided) if avoided else ""
+    shape = "{" + ", ".join(f'"{day}": ["...", ...]' for day in days) + "}"
+    prompt = TEMPLATES["alternate-pool"].render(count=count, topic=topic, audience=audience, days=", ".join(days),
+                                                avoid_clause=avoid_clause, shape=shape)
+    # Roughly 30 tokens per idea; sized per call since a refill covers one day or the whole week
+    return prompt, min(TEMPLATES["alternate-pool"].max_tokens, 30 * count * len(days) + 40)
+
+def _generate_alternates(topic: str, audience: str, days: list, avoid: dict) -> dict:
+    """One LLM call producing ALT_POOL_SIZE alternates for each day; used to fill the alternate pool."""
+    prompt, max_tokens = _build_alternate_pool_prompt(topic, audience, days, avoid)
+    response = call_llm(prompt, max_tokens=max_tokens, temperature=1.0, use_cache=False, priority=PRIORITY_BATCH)
+    return _parse_alternates(response, days)
+
+async def _generate_alternates_async(topic: str, audience: str, days: list, avoid: dict) -> dict:
+    prompt, max_tokens = _build_alternate_pool_prompt(topic, audience, days, avoid)
+    response = await call_llm_async(prompt, max_tokens=max_tokens, temperature=1.0, use_cache=False,
+                                    priority=PRIORITY_BATCH)
+    return _parse_alternates(response, days)
+
+def _parse_alternates(raw_response: str, days: list) -> dict:
+    """
+    {day: [ideas]} from a pool response: a JSON object of lists, or else day headings
+    ("Monday:" / "**Monday**") each followed by one idea per line.
+    """
+    text = _CODE_FENCE_RE.sub("", raw_response.strip())
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            by_day = {str(key).strip().lower(): value for key, value in data.items()}
+            found = {}
+            for day in days:
+                values = by_day.get(day.lower())
+                if isinstance(values, str):
+                    values = [values]
+                if isinstance(values, list):
+                    ideas = [_clean_idea(v) for v in values if isinstance(v, str) and _clean_idea(v)]
+                    if ideas:
+                        found[day] = ideas
+            if found:
+                return found
+
+    found = {}
+    current = days[0] if len(days) == 1 else None
+    for line in text.split("\n"):
+        stripped = _LINE_PREFIX_RE.sub("", line).replace("**", "").strip()
+        if not stripped:
+            continue
+        day = _day_of(stripped, days)
+        if day and (":" in stripped or stripped.lower() == day.lower()):
+            current = day
+            stripped = stripped.split(":", 1)[1] if ":" in stripped else ""
+        idea = _clean_idea(stripped)
+        if current and idea:
+            found.setdefault(current, []).append(idea)
+    return found
+
+# Pre-generated Regenerate answers; see alternate_pool.py
+alternate_pool = AlternatePool(_generate_alternates, _generate_alternates_async)
+
+prewarmer = Prewarmer(topic_popularity, prewarm_content_ideas, plan_cached_at, ttl=llm_cache.ttl)
+
+async def _probe_provider(name: str) -> None:
+    """One-token completion: the cheapest request that proves key, quota and endpoint all work."""
+    await _PROVIDER_CALLS_ASYNC[name]("Reply with OK.", 1, 0.0)
+
+# Remote providers only; the local model's health is whether it has loaded
+health_prober = HealthProber({name: functools.partial(_probe_provider, name) for name in _PROVIDER_REQUESTS})
+
 def test_api_connection() -> dict:
     """
-    Test both OpenAI and Perplexity API connections.
-    Returns status for both APIs.
+    Test both OpenAI and Perplexity API connections with live completions.
+    Returns status for both APIs. The status endpoints use the background health prober instead.
     """
     results = {
         "openai": {"available": False, "error": None},
@@ -381,33 +1446,55 @@ def test_api_connection() -> dict:
     
     return results
 
+def get_coalescing_stats() -> dict:
+    """Counters for the single-flight layer in front of the providers."""
+    return {"sync": _llm_flight.stats(), "async": _llm_flight_async.stats()}
+
+def _provider_status(name: str, circuit: dict) -> dict:
+    """Cached health of one provider from its circuit and the last background probe."""
+    return {
+        "api_working": circuit["last_probe_ok"],
+        "error": circuit["last_error"] if circuit["state"] != "closed" or circuit["last_probe_ok"] is False else None,
+        "probe_latency_ms": circuit["last_probe_ms"],
+        "last_probe_at": circuit["last_probe_at"],
+        "last_success_at": circuit["last_success_at"],
+    }
+
 def get_api_status() -> dict:
     """
-    Get current API key status and basic info for both services.
+    Current API key status and cached provider health. Never calls the providers: health comes
+    from the background prober and the circuits, so polling this is free.
     """
     openai_key = os.getenv("OPENAI_API_KEY")
     perplexity_key = os.getenv("PERPLEXITY_API_KEY")
-    
-    status = test_api_connection()
+    circuits = get_circuit_snapshot()
     
     return {
         "openai": {
             "api_key_present": bool(openai_key),
             "api_key_format": openai_key[:10] + "..." + openai_key[-5:] if openai_key else None,
-            "api_working": status["openai"]["available"],
-            "error": status["openai"]["error"]
+            **_provider_status("openai", circuits["openai"]),
         },
         "perplexity": {
             "api_key_present": bool(perplexity_key),
-            "api_working": status["perplexity"]["available"],
-            "error": status["perplexity"]["error"]
+            **_provider_status("perplexity", circuits["perplexity"]),
         },
+        "health_probe": {"enabled": HEALTH_PROBE_ENABLED, "running": health_prober.running,
+                         "interval_seconds": health_prober.interval},
+        "local": local_model.stats(),
+        "circuits": circuits,
+        "rate_limits": get_rate_limiter_stats(),
+        "prompts": get_prompt_stats(),
+        "alternate_pool": alternate_pool.stats(),
+        "topic_index": topic_index.stats(),
+        "prewarm": prewarmer.stats(),
         "fallback_enabled": True
     }
 
 if __name__ == "__main__":
     # Quick test when running directly
     print("Testing Content Generator with Fallback...")
+    asyncio.run(health_prober.probe_all())
     status = get_api_status()
     print(f"API Status: {status}")
     
@@ -5,9 +5,11 @@ import time
 
 import streamlit as st
 
-from app.agents.content_generator import (generate_alternate_idea,
+from app.agents.content_generator import (DAYS, alternate_pool,
+                                          generate_alternate_idea,
                                           generate_content_ideas,
-                                          summarize_single_idea)
+                                          summarize_single_idea,
+                                          summarize_week)
 
 st.set_page_config(
     page_title="Agentic Content Planner",
@@ -604,6 +606,10 @@ if generate_clicked:
                     st.session_state.generation_time = datetime.datetime.now()
                     st.session_state.analysis_results = [None] * 7
                     
+                    # Fill the Regenerate pool for every day in the background (one LLM call)
+                    if not result.get("fallback"):
+                        alternate_pool.prefill(st.session_state.topic, audience_code, DAYS, avoid=dict(zip(DAYS, ideas)))
+                    
                     # NEW: Clear the input field on successful generation
                     st.session_state["clear_input"] = True
                     st.session_state["last_topic_input"] = ""
@@ -665,6 +671,22 @@ if any(idea.strip() for idea in st.session_state.generated_ideas):
     
     days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
     
+    if st.button("📊 Analyze Whole Week", help="Analyze every day with a single request"):
+        try:
+            with st.spinner("Analyzing the week..."):
+                week = summarize_week(
+                    st.session_state.topic,
+                    audience_options.get(selected_audience, "marketers"),
+                    st.session_state.generated_ideas
+                )
+                for i, day in enumerate(days):
+                    if day in week["summaries"]:
+                        st.session_state.analysis_results[i] = week["summaries"][day]
+                st.success("Week analysis complete!")
+                st.rerun()
+        except Exception as e:
+            st.error(f"Failed to analyze week: {str(e)}")
+    
     for i, day in enumerate(days):
         if i < len(st.session_state.generated_ideas):
             idea = st.session_state.generated_ideas[i]
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+from collections import deque
+
+from dotenv import load_dotenv
+
+from app.agents.structured_logging import get_logger
+
+load_dotenv()
+
+log = get_logger("hedging")
+
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_MAX_WORKERS = int(os.getenv("HEDGE_MAX_WORKERS", "32"))
+
+# Per-endpoint defaults. Override with HEDGE_CONFIG, e.g.
+#   HEDGE_CONFIG='{"plan-content": {"delay": 6, "budget": 0.05, "adaptive": false}}'
+DEFAULT_HEDGE_CONFIG = {
+    "plan-content": {"delay": 8.0, "budget": 0.10, "adaptive": True},
+    "summarize-idea": {"delay": 4.0, "budget": 0.10, "adaptive": True},
+    "summarize-week": {"delay": 8.0, "budget": 0.10, "adaptive": True},
+    "alternate-idea": {"delay": 3.0, "budget": 0.10, "adaptive": True},
+}
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per provider."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(provider)
+            if samples is None:
+                samples = self._samples[provider] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, provider: str, pct: float, min_samples: int = 20):
+        """The pct-th percentile latency, or None until enough samples are collected."""
+        with self._lock:
+            samples = sorted(self._samples.get(provider, ()))
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+        return samples[index]
+
+class HedgePolicy:
+    """
+    When to fire a hedged request at the secondary provider.
+
+    The hedge delay is fixed, or (adaptive) the primary's recent p95 latency clamped to
+    [min_delay, max_delay]. At most `budget` (a fraction) of recent calls may be hedged.
+    """
+
+    def __init__(self, name: str, delay: float, budget: float = 0.10, adaptive: bool = True,
+                 percentile: float = 95, min_delay: float = 0.5, max_delay: float = 30.0,
+                 budget_window: int = 200):
+        self.name = name
+        self.delay = delay
+        self.budget = budget
+        self.adaptive = adaptive
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._recent = deque(maxlen=budget_window)
+        self._lock = threading.Lock()
+
+    def hedge_delay(self, primary: str) -> float:
+        if self.adaptive:
+            observed = latency_tracker.percentile(primary, self.percentile)
+            if observed is not None:
+                return min(max(observed, self.min_delay), self.max_delay)
+        return self.delay
+
+    def try_acquire_hedge(self) -> bool:
+        """Check the budget and, if there is room, count this call as hedged."""
+        with self._lock:
+            if not self._recent:
+                self._recent.append(False)
+            # Allow one hedge before the window fills so the budget isn't stuck at zero
+            if sum(self._recent) >= max(1.0, self.budget * len(self._recent)):
+                return False
+            self._recent[-1] = True
+            return True
+
+    def record_call(self) -> None:
+        """Register a call in the budget window (initially not hedged)."""
+        with self._lock:
+            self._recent.append(False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = len(self._recent)
+            hedged = sum(self._recent)
+        return {"recent_calls": calls, "recent_hedged": hedged, "budget": self.budget}
+
+def _load_policies() -> dict:
+    config = {name: dict(values) for name, values in DEFAULT_HEDGE_CONFIG.items()}
+    raw = os.getenv("HEDGE_CONFIG")
+    if raw:
+        try:
+            for name, values in json.loads(raw).items():
+                config.setdefault(name, {"delay": 5.0}).update(values)
+        except (ValueError, AttributeError) as e:
+            log.warning("ignoring invalid HEDGE_CONFIG", error=str(e))
+    return {name: HedgePolicy(name, **values) for name, values in config.items()}
+
+latency_tracker = LatencyTracker()
+hedge_policies = _load_policies()
+
+def get_hedge_policy(endpoint: str):
+    """The hedge policy for an endpoint, or None when hedging is disabled or unconfigured."""
+    if not HEDGE_ENABLED or not endpoint:
+        return None
+    return hedge_policies.get(endpoint)
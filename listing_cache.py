@@ -0,0 +1,104 @@
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SCHEDULED_POSTS_CACHE_ENABLED = os.getenv("SCHEDULED_POSTS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# Distinct listing pages (filters + cursor + limit) kept for the current version
+SCHEDULED_POSTS_CACHE_MAX_ENTRIES = int(os.getenv("SCHEDULED_POSTS_CACHE_MAX_ENTRIES", "256"))
+
+class ListingCache:
+    """
+    Versioned read cache for GET /scheduled-posts.
+
+    Every write to scheduled_posts calls invalidate(), which bumps one version number. Cached pages
+    and ETags belong to a version, so a write retires all of them at once without working out which
+    pages it touched, and checking a client's validators needs only the version - an unchanged poll
+    is answered with 304 without touching the database.
+
+    The version lives in this process: with several API worker processes a write only reaches the
+    worker that handled it, so run a single worker or set SCHEDULED_POSTS_CACHE_ENABLED=false.
+    """
+
+    def __init__(self, max_entries: int = SCHEDULED_POSTS_CACHE_MAX_ENTRIES,
+                 enabled: bool = SCHEDULED_POSTS_CACHE_ENABLED):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        # ETags issued by an earlier process (whose version also started at 0) must never match
+        self._generation = uuid.uuid4().hex[:8]
+        self._version = 0
+        # Writes before this process started are unknown; treat startup as the last modification
+        self._last_modified = int(time.time())
+        self._entries = OrderedDict()   # query key -> (version, body)
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        """Call after a committed write to scheduled_posts."""
+        with self._lock:
+            self._version += 1
+            # Strictly increasing, so a second write within the same second still changes the answer
+            # to If-Modified-Since (HTTP dates have one-second resolution)
+            self._last_modified = max(int(time.time()), self._last_modified + 1)
+            self._entries.clear()
+
+    def validators(self, key: str) -> tuple:
+        """(version, response headers) for one listing page; the version is what get()/put() take."""
+        with self._lock:
+            version, last_modified = self._version, self._last_modified
+        if not self.enabled:
+            return version, {}
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        return version, {
+            "ETag": f'"{self._generation}-{version}-{digest}"',
+            "Last-Modified": formatdate(last_modified, usegmt=True),
+            # Clients may keep the page but must revalidate before every use
+            "Cache-Control": "no-cache",
+        }
+
+    def is_current(self, headers: dict, if_none_match: str = None, if_modified_since: str = None) -> bool:
+        """Whether the client's copy (per its conditional request headers) matches `headers`."""
+        if not self.enabled:
+            return False
+        if if_none_match:
+            # If-None-Match takes precedence over If-Modified-Since; weak comparison, as for GET
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or headers["ETag"] in tags
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return since >= parsedate_to_datetime(headers["Last-Modified"]).timestamp()
+        return False
+
+    def get(self, key: str, version: int):
+        """The serialized page cached for this version, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, version: int, body: bytes) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            # A write committed while this page was being read; the page may predate it
+            if version != self._version:
+                return
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+listing_cache = ListingCache()
@@ -0,0 +1,240 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from app.agents.structured_logging import get_logger
+
+load_dotenv()
+
+log = get_logger("llm_cache")
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "3600"))
+# Extra window after the TTL where a stale entry is still served while it refreshes (0 disables)
+LLM_CACHE_STALE_TTL = float(os.getenv("LLM_CACHE_STALE_TTL", "600"))
+# Persistent tier; set to an empty string to keep the cache in memory only
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB", "./llm_cache.db")
+
+def make_cache_key(prompt: str, provider: str, model: str, temperature: float, max_tokens: int = None) -> str:
+    """
+    Stable key for a completion request. Whitespace in the prompt is normalized; max_tokens=None
+    leaves the token budget out of the key.
+    """
+    normalized_prompt = " ".join(prompt.split())
+    raw = json.dumps([normalized_prompt, provider, model, round(temperature, 3), max_tokens])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    """
+    Two-tier cache for LLM completions: a bounded in-memory LRU in front of a SQLite table.
+
+    Entries are fresh for `ttl` seconds, then stale (still served, flagged for refresh)
+    for another `stale_ttl` seconds, then dropped.
+
+    get_async() and set_nowait() are for the event loop: the in-memory tier is used inline, SQLite
+    reads run in a worker thread and writes are queued to a single writer thread, so a request
+    never waits on the connection lock or a commit.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_MAX_ENTRIES, ttl: float = LLM_CACHE_TTL,
+                 stale_ttl: float = LLM_CACHE_STALE_TTL, db_path: str = LLM_CACHE_DB,
+                 enabled: bool = LLM_CACHE_ENABLED):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0,
+                       "expirations": 0, "persistent_hits": 0, "refreshes": 0}
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._writer = None
+        if enabled and db_path:
+            try:
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                log.warning("LLM cache persistence disabled", error=str(e))
+                self._db = None
+            else:
+                # Write-behind for set_nowait(); one thread, so queued writes land in order
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache-writer")
+
+    def _state(self, created_at: float, now: float):
+        age = now - created_at
+        if age < self.ttl:
+            return "fresh"
+        if age < self.ttl + self.stale_ttl:
+            return "stale"
+        return None
+
+    def get(self, key: str):
+        """
+        Look up a completion.
+
+        Returns:
+            (value, is_stale) on a hit, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        hit = self._get_memory(key, now)
+        if hit is not None:
+            return hit
+        return self._from_row(key, self._db_get(key), now, self._db_delete)
+
+    async def get_async(self, key: str):
+        """get() for the event loop: a miss in memory reads SQLite in a worker thread."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        hit = self._get_memory(key, now)
+        if hit is not None:
+            return hit
+        row = await asyncio.to_thread(self._db_get, key) if self._db is not None else None
+        return self._from_row(key, row, now, lambda expired: self._writer.submit(self._db_delete, expired))
+
+    def _get_memory(self, key: str, now: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            state = self._state(created_at, now)
+            if state:
+                self._entries.move_to_end(key)
+                self._stats["hits" if state == "fresh" else "stale_hits"] += 1
+                return value, state == "stale"
+            del self._entries[key]
+            self._stats["expirations"] += 1
+            return None
+
+    def _from_row(self, key: str, row, now: float, delete):
+        """Finish a lookup the memory tier missed: promote a live SQLite row, `delete` an expired one."""
+        if row is not None:
+            value, created_at = row
+            state = self._state(created_at, now)
+            if state:
+                with self._lock:
+                    self._stats["persistent_hits"] += 1
+                    self._stats["hits" if state == "fresh" else "stale_hits"] += 1
+                    self._store(key, value, created_at)
+                return value, state == "stale"
+            delete(key)
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def created_at(self, key: str):
+        """When the stored completion for a key was generated (epoch seconds), or None. Leaves stats and LRU order alone."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry[1]
+        row = self._db_get(key)
+        return row[1] if row is not None else None
+
+    def set(self, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        created_at = time.time()
+        with self._lock:
+            self._store(key, value, created_at)
+        self._db_put(key, value, created_at)
+
+    def set_nowait(self, key: str, value: str) -> None:
+        """set() for the event loop: stores in memory and queues the SQLite write on the writer thread."""
+        if not self.enabled:
+            return
+        created_at = time.time()
+        with self._lock:
+            self._store(key, value, created_at)
+        if self._writer is not None:
+            self._writer.submit(self._db_put, key, value, created_at)
+
+    def _store(self, key: str, value: str, created_at: float) -> None:
+        # Caller holds self._lock
+        self._entries[key] = (value, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def begin_refresh(self, key: str) -> bool:
+        """Claim a background refresh for a stale key. False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._stats["refreshes"] += 1
+            return True
+
+    def end_refresh(self, key: str) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def _db_get(self, key: str):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                return self._db.execute(
+                    "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            log.warning("LLM cache read failed", error=str(e))
+            return None
+
+    def _db_put(self, key: str, value: str, created_at: float) -> None:
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, created_at),
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            log.warning("LLM cache write failed", error=str(e))
+
+    def _db_delete(self, key: str) -> None:
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+        except sqlite3.Error:
+            pass
+
+llm_cache = LLMCache()
@@ -0,0 +1,98 @@
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+
+from app.agents.structured_logging import get_logger
+
+load_dotenv()
+
+log = get_logger("llm_client")
+
+# Base URLs can be overridden (e.g. to point at a local mock provider for benchmarks)
+PROVIDER_BASE_URLS = {
+    "openai": os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1"),
+    "perplexity": os.getenv("PERPLEXITY_BASE_URL", "https://api.perplexity.ai"),
+}
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "90"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100"))
+LLM_POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "false").lower() in ("1", "true", "yes")
+
+_clients = {}
+_async_clients = {}
+_lock = threading.Lock()
+
+def _http2_enabled() -> bool:
+    """HTTP/2 needs the optional `h2` package; fall back to HTTP/1.1 without it."""
+    if not LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        log.warning("LLM_HTTP2 is set but the 'h2' package is not installed - using HTTP/1.1")
+        return False
+    return True
+
+def _client_kwargs(provider: str) -> dict:
+    if provider not in PROVIDER_BASE_URLS:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    return {
+        "base_url": PROVIDER_BASE_URLS[provider],
+        "timeout": httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+        "limits": httpx.Limits(
+            max_connections=LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        "http2": _http2_enabled(),
+    }
+
+def get_client(provider: str) -> httpx.Client:
+    """
+    Return the long-lived, pooled sync client for a provider.
+    Connections are kept alive between calls so we only pay the TCP+TLS handshake once.
+    """
+    client = _clients.get(provider)
+    if client is None or client.is_closed:
+        with _lock:
+            client = _clients.get(provider)
+            if client is None or client.is_closed:
+                client = httpx.Client(**_client_kwargs(provider))
+                _clients[provider] = client
+    return client
+
+def get_async_client(provider: str) -> httpx.AsyncClient:
+    """
+    Return the long-lived, pooled async client for a provider.
+    Must be used from the event loop that serves the app.
+    """
+    client = _async_clients.get(provider)
+    if client is None or client.is_closed:
+        with _lock:
+            client = _async_clients.get(provider)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(**_client_kwargs(provider))
+                _async_clients[provider] = client
+    return client
+
+def close_clients() -> None:
+    """Close all pooled sync clients."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+async def aclose_clients() -> None:
+    """Close all pooled clients (async and sync). Called on app shutdown."""
+    with _lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+    for client in clients:
+        await client.aclose()
+    close_clients()
@@ -0,0 +1,189 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from dotenv import load_dotenv
+
+from app.agents.structured_logging import get_logger
+
+load_dotenv()
+
+log = get_logger("local_llm")
+
+# Last-resort provider behind OpenAI and Perplexity: a small instruction model on CPU
+LOCAL_LLM_ENABLED = os.getenv("LOCAL_LLM_ENABLED", "false").lower() in ("1", "true", "yes")
+# Qwen2 architecture: needs transformers>=4.37 (pinned in requirements.txt)
+LOCAL_LLM_MODEL = os.getenv("LOCAL_LLM_MODEL", "Qwen/Qwen2.5-0.5B-Instruct")
+# Dynamic int8 quantization of the Linear layers (smaller and ~2x faster on CPU)
+LOCAL_LLM_QUANTIZE = os.getenv("LOCAL_LLM_QUANTIZE", "true").lower() in ("1", "true", "yes")
+# Latency budget per call: generation stops at this many seconds and returns what it has
+LOCAL_LLM_TIMEOUT = float(os.getenv("LOCAL_LLM_TIMEOUT", "20"))
+# Cap on new tokens regardless of the caller's max_tokens (CPU decoding is the slow part)
+LOCAL_LLM_MAX_TOKENS = int(os.getenv("LOCAL_LLM_MAX_TOKENS", "320"))
+# Concurrent generations; each one uses LOCAL_LLM_THREADS torch threads
+LOCAL_LLM_WORKERS = int(os.getenv("LOCAL_LLM_WORKERS", "1"))
+LOCAL_LLM_THREADS = int(os.getenv("LOCAL_LLM_THREADS", str(max(1, (os.cpu_count() or 2) // 2))))
+# Calls allowed to wait for a worker; beyond this the provider fails fast instead of queueing
+LOCAL_LLM_MAX_QUEUE = int(os.getenv("LOCAL_LLM_MAX_QUEUE", "4"))
+# Load the model and run one short generation at startup instead of on the first failover
+LOCAL_LLM_WARMUP = os.getenv("LOCAL_LLM_WARMUP", "true").lower() in ("1", "true", "yes")
+
+class LocalLLMError(Exception):
+    """The local model is unavailable, overloaded, or missed its latency budget."""
+
+class LocalModel:
+    """
+    Lazily loaded transformers causal LM on CPU behind a bounded worker pool.
+
+    The model loads in the background (warm_up(), or the first call), optionally int8-quantized;
+    calls fail fast until it is ready. Calls beyond the workers plus LOCAL_LLM_MAX_QUEUE are
+    rejected immediately, and every generation is capped at LOCAL_LLM_TIMEOUT seconds via
+    transformers' max_time, so a failover answers in seconds.
+    """
+
+    def __init__(self, model_name: str = LOCAL_LLM_MODEL, quantize: bool = LOCAL_LLM_QUANTIZE,
+                 workers: int = LOCAL_LLM_WORKERS, max_queue: int = LOCAL_LLM_MAX_QUEUE,
+                 timeout: float = LOCAL_LLM_TIMEOUT, max_tokens: int = LOCAL_LLM_MAX_TOKENS):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.timeout = timeout
+        self.max_tokens = max_tokens
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="local-llm")
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._load_lock = threading.Lock()
+        self._model = None
+        self._tokenizer = None
+        self._load_error = None
+        self._warming = False
+        self._stats = {"calls": 0, "rejected": 0, "errors": 0, "load_seconds": None, "last_call_seconds": None}
+
+    def _load(self):
+        if self._model is not None:
+            return self._model, self._tokenizer
+        with self._load_lock:
+            if self._model is not None:
+                return self._model, self._tokenizer
+            if self._load_error is not None:
+                raise LocalLLMError(self._load_error)
+            started = time.monotonic()
+            try:
+                import torch
+                from transformers import AutoModelForCausalLM, AutoTokenizer
+
+                torch.set_num_threads(LOCAL_LLM_THREADS)
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                model = AutoModelForCausalLM.from_pretrained(self.model_name, torch_dtype=torch.float32)
+                model.eval()
+                if self.quantize:
+                    model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+            except Exception as e:
+                # Don't retry a broken install or a missing model on every failover
+                self._load_error = f"local model {self.model_name} failed to load: {e}"
+                log.error("local model load failed", model=self.model_name, error=str(e))
+                raise LocalLLMError(self._load_error)
+            self._model, self._tokenizer = model, tokenizer
+            self._stats["load_seconds"] = round(time.monotonic() - started, 1)
+            log.info("local model loaded", model=self.model_name, quantized=self.quantize,
+                     seconds=self._stats["load_seconds"])
+            return model, tokenizer
+
+    def _generate(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        model, tokenizer = self._load()
+        import torch
+
+        if getattr(tokenizer, "chat_template", None):
+            text = tokenizer.apply_chat_template([{"role": "user", "content": prompt}], tokenize=False,
+                                                 add_generation_prompt=True)
+        else:
+            text = prompt
+        inputs = tokenizer(text, return_tensors="pt")
+        started = time.monotonic()
+        with torch.inference_mode():
+            output = model.generate(
+                **inputs,
+                max_new_tokens=min(max_tokens, self.max_tokens),
+                do_sample=temperature > 0,
+                temperature=max(temperature, 0.01),
+                top_p=0.95,
+                max_time=self.timeout,
+                pad_token_id=tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id,
+            )
+        self._stats["last_call_seconds"] = round(time.monotonic() - started, 2)
+        completion = tokenizer.decode(output[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True).strip()
+        if not completion:
+            raise LocalLLMError("local model returned an empty completion")
+        return completion
+
+    def _acquire_slot(self) -> None:
+        if self._model is None:
+            # A failover must not wait minutes for the weights: start loading and fail this call
+            self.warm_up()
+            raise LocalLLMError(self._load_error or "local model is still loading")
+        if not self._slots.acquire(blocking=False):
+            self._stats["rejected"] += 1
+            raise LocalLLMError("local model is busy (worker queue full)")
+        self._stats["calls"] += 1
+
+    def _run(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        try:
+            return self._generate(prompt, max_tokens, temperature)
+        except LocalLLMError:
+            self._stats["errors"] += 1
+            raise
+        except Exception as e:
+            self._stats["errors"] += 1
+            raise LocalLLMError(f"local generation failed: {e}")
+        finally:
+            self._slots.release()
+
+    def complete(self, prompt: str, max_tokens: int = 512, temperature: float = 0.7) -> str:
+        self._acquire_slot()
+        future = self._executor.submit(self._run, prompt, max_tokens, temperature)
+        try:
+            # max_time bounds the generation itself; the margin covers queueing and tokenization
+            return future.result(timeout=self.timeout * 2)
+        except FutureTimeoutError:
+            raise LocalLLMError(f"local model missed its {self.timeout:.0f}s latency budget")
+
+    async def complete_async(self, prompt: str, max_tokens: int = 512, temperature: float = 0.7) -> str:
+        self._acquire_slot()
+        future = self._executor.submit(self._run, prompt, max_tokens, temperature)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout * 2)
+        except asyncio.TimeoutError:
+            raise LocalLLMError(f"local model missed its {self.timeout:.0f}s latency budget")
+
+    def warm_up(self, background: bool = True) -> None:
+        """Load the model and run one tiny generation so the first real failover doesn't pay for it."""
+        with self._load_lock:
+            if self._warming or self._model is not None or self._load_error is not None:
+                return
+            self._warming = True
+
+        def run():
+            try:
+                self._generate("Reply with the word ready.", 4, 0)
+            except Exception as e:
+                log.warning("local model warm-up failed", error=str(e))
+            finally:
+                self._warming = False
+        if background:
+            threading.Thread(target=run, daemon=True, name="local-llm-warmup").start()
+        else:
+            run()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": LOCAL_LLM_ENABLED,
+            "model": self.model_name,
+            "quantized": self.quantize,
+            "loaded": self._model is not None,
+            "loading": self._warming,
+            "load_error": self._load_error,
+            **self._stats,
+        }
+
+local_model = LocalModel()
@@ -1,16 +1,77 @@
+import asyncio
+import base64
+import csv
+import io
+import json
 import os
+import uuid
+from contextlib import asynccontextmanager
 from datetime import date
+from typing import List, Optional
 
-from fastapi import Depends, FastAPI, HTTPException, Query
-from pydantic import BaseModel, constr
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, constr
+from sqlalchemy import insert, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.agents.content_generator import (generate_alternate_idea,
-                                          generate_content_ideas,
-                                          summarize_single_idea)
-from app.database.models import ScheduledPost, SessionLocal
+from app.agents.content_generator import (generate_alternate_idea_async,
+                                          generate_content_ideas_async,
+                                          get_api_status, health_prober, prewarmer,
+                                          stream_content_ideas_async,
+                                          summarize_single_idea_async,
+                                          summarize_week_async)
+from app.agents.llm_client import aclose_clients
+from app.agents.local_llm import LOCAL_LLM_ENABLED, LOCAL_LLM_WARMUP, local_model
+from app.agents.metrics import instrument_engine, registry, scheduled_posts_cache_total
+from app.agents.provider_health import HEALTH_PROBE_ENABLED, get_circuit_snapshot
+from app.agents.prewarm import PREWARM_ENABLED, topic_popularity
+from app.agents.rate_limiter import PRIORITY_BATCH
+from app.agents.streaming import format_sse
+from app.agents.structured_logging import (get_logger, reset_request_id,
+                                           set_request_id)
+from app.database.listing_cache import listing_cache
+from app.database.models import (AsyncSessionLocal, ScheduledPost, SessionLocal,
+                                 async_engine, engine,
+                                 insert_ignoring_duplicates)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Regenerate popular plans in the background (PREWARM_ENABLED; `python -m app.agents.prewarm` otherwise)
+    warmer = asyncio.create_task(prewarmer.run_async()) if PREWARM_ENABLED else None
+    # Provider health for /health and /api-status is probed here, never on the request path
+    prober = asyncio.create_task(health_prober.run_async()) if HEALTH_PROBE_ENABLED else None
+    if LOCAL_LLM_ENABLED and LOCAL_LLM_WARMUP:
+        # Load the local fallback model now rather than during the first provider outage
+        local_model.warm_up()
+    yield
+    for task in (warmer, prober):
+        if task is not None:
+            task.cancel()
+    topic_popularity.flush()
+    # Release pooled LLM provider connections on shutdown
+    await aclose_clients()
+
+app = FastAPI(lifespan=lifespan)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+log = get_logger("api")
+
+@app.middleware("http")
+async def request_id_middleware(request: Request, call_next):
+    """Tag every log line of a request with a correlation id (taken from X-Request-ID when the caller sends one)."""
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex[:16]
+    token = set_request_id(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        reset_request_id(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
 
 NonEmptyStr = constr(min_length=1)
 
@@ -18,19 +79,56 @@ class PostInput(BaseModel):
     idea: NonEmptyStr
     date: date
 
-def get_db():
+class PlanRequestItem(BaseModel):
+    topic: NonEmptyStr
+    audience: NonEmptyStr = "Adults"
+
+class BatchPlanInput(BaseModel):
+    items: List[PlanRequestItem] = Field(..., min_length=1, max_length=500)
+    concurrency: int = Field(5, ge=1, le=50, description="Plans generated in parallel")
+
+class WeekAnalysisInput(BaseModel):
+    topic: NonEmptyStr
+    audience: NonEmptyStr
+    ideas: List[str] = Field(..., min_length=1, max_length=7, description="Ideas in day order, Monday first")
+
+# GET /scheduled-posts page size: default, and the most a client may ask for
+SCHEDULED_POSTS_PAGE_SIZE = int(os.getenv("SCHEDULED_POSTS_PAGE_SIZE", "100"))
+SCHEDULED_POSTS_MAX_PAGE_SIZE = int(os.getenv("SCHEDULED_POSTS_MAX_PAGE_SIZE", "500"))
+BULK_SCHEDULE_MAX_ITEMS = int(os.getenv("BULK_SCHEDULE_MAX_ITEMS", "5000"))
+# (idea, date) pairs per set-based lookup; keeps each statement under SQLite's bound-parameter limit
+BULK_LOOKUP_CHUNK = 400
+
+# Running batches by id, so they can be cancelled from another request
+_active_batches = {}
+
+async def get_db():
+    # DB_ASYNC (with aiosqlite installed) gives endpoints an AsyncSession; otherwise a pooled sync Session
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+async def run_db(db, fn, *args):
+    """
+    Run fn(session, *args) without blocking the event loop: on the AsyncSession's own connection
+    (run_sync) when DB_ASYNC is on, in the thread pool with the sync Session otherwise.
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(fn, db, *args)
+    return await db.run_sync(fn, *args)
+
 @app.get("/")
 def read_root():
     return {"message": "Agentic Content Planner backend is running with OpenAI + Perplexity fallback."}
 
 @app.get("/plan-content")
-def plan_content(
+async def plan_content(
     topic: str = Query("branding", description="Topic for content ideas"),
     audience: str = Query("Adults", description="Intended audience"),
     model: str = Query("auto", description="LLM provider: openai, perplexity, or auto (fallback)")
@@ -41,10 +139,10 @@ def plan_content(
     """
     try:
         # The content_generator.py handles fallback automatically
-        result = generate_content_ideas(topic, audience)
+        result = await generate_content_ideas_async(topic, audience)
         
     except Exception as e:
-        print(f"ERROR in /plan-content: {type(e).__name__}: {e}")
+        log.exception("request failed", endpoint="/plan-content")
         raise HTTPException(status_code=500, detail=f"Content generation failed: {e}")
     
     return {
@@ -54,8 +152,100 @@ def plan_content(
         "model_used": "auto_fallback"
     }
 
+@app.get("/plan-content/stream")
+async def plan_content_stream(
+    topic: str = Query("branding", description="Topic for content ideas"),
+    audience: str = Query("Adults", description="Intended audience")
+):
+    """
+    Server-sent events variant of /plan-content: one `idea` event per day as soon as the
+    model has produced it, then `summary` (full plan) and `done`. A day whose idea changed after
+    it was sent (a provider failed mid-stream) gets a second `idea` event with the same index.
+    """
+    async def events():
+        try:
+            async for event in stream_content_ideas_async(topic, audience):
+                name = event.pop("event")
+                yield format_sse(name, {"topic": topic, **event} if name == "summary" else event)
+        except Exception as e:
+            log.exception("request failed", endpoint="/plan-content/stream")
+            yield format_sse("error", {"detail": f"Content generation failed: {e}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _generate_batch_item(index: int, item: PlanRequestItem, semaphore: asyncio.Semaphore) -> dict:
+    """Generate one plan of a batch, reporting failures on the item instead of raising."""
+    line = {"index": index, "topic": item.topic, "audience": item.audience}
+    async with semaphore:
+        try:
+            result = await generate_content_ideas_async(item.topic, item.audience, priority=PRIORITY_BATCH)
+        except Exception as e:
+            return {**line, "status": "error", "error": str(e)}
+    if result.get("fallback"):
+        # Every provider failed; the static template plan is still returned
+        return {**line, "status": "fallback", "error": result.get("error"),
+                "ideas": result["ideas"], "summary": result["summary"]}
+    return {**line, "status": "ok", "ideas": result["ideas"], "summary": result["summary"]}
+
+async def _stream_batch(batch_id: str, batch: BatchPlanInput):
+    """Yield one NDJSON line per plan as soon as it finishes, then a closing summary line."""
+    semaphore = asyncio.Semaphore(batch.concurrency)
+    tasks = {
+        asyncio.create_task(_generate_batch_item(i, item, semaphore)): i
+        for i, item in enumerate(batch.items)
+    }
+    _active_batches[batch_id] = tasks
+    counts = {"ok": 0, "fallback": 0, "error": 0, "cancelled": 0}
+    try:
+        yield json.dumps({"batch_id": batch_id, "total": len(tasks)}) + "\n"
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    item = batch.items[tasks[task]]
+                    line = {"index": tasks[task], "topic": item.topic, "audience": item.audience,
+                            "status": "cancelled"}
+                else:
+                    line = task.result()
+                counts[line["status"]] += 1
+                yield json.dumps(line) + "\n"
+        yield json.dumps({"batch_id": batch_id, "done": True, **counts}) + "\n"
+    finally:
+        # Client disconnected or the batch finished: make sure nothing keeps running
+        for task in tasks:
+            task.cancel()
+        _active_batches.pop(batch_id, None)
+
+@app.post("/plan-content/batch")
+async def plan_content_batch(batch: BatchPlanInput):
+    """
+    Generate plans for many (topic, audience) pairs with bounded concurrency.
+    Results stream back as newline-delimited JSON in completion order; the first line
+    carries the batch_id used to cancel the batch.
+    """
+    batch_id = uuid.uuid4().hex
+    return StreamingResponse(
+        _stream_batch(batch_id, batch),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch_id},
+    )
+
+@app.delete("/plan-content/batch/{batch_id}")
+async def cancel_plan_content_batch(batch_id: str):
+    """Cancel the unfinished items of a running batch."""
+    tasks = _active_batches.get(batch_id)
+    if tasks is None:
+        raise HTTPException(status_code=404, detail="Batch not found or already finished")
+    cancelled = sum(1 for task in tasks if task.cancel())
+    return {"message": f"Batch {batch_id} cancelled.", "cancelled_items": cancelled}
+
 @app.get("/summarize-idea")
-def summarize_idea(
+async def summarize_idea(
     topic: str,
     audience: str,
     idea: str,
@@ -67,16 +257,30 @@ def summarize_idea(
     """
     try:
         # The content_generator.py handles fallback automatically
-        summary = summarize_single_idea(topic, audience, idea, day)
+        summary = await summarize_single_idea_async(topic, audience, idea, day)
                 
     except Exception as e:
-        print(f"ERROR in /summarize-idea: {type(e).__name__}: {e}")
+        log.exception("request failed", endpoint="/summarize-idea")
         raise HTTPException(status_code=500, detail=f"Summarization failed: {e}")
     
     return {"summary": summary or "No summary available."}
 
+@app.post("/summarize-week")
+async def summarize_week(week: WeekAnalysisInput):
+    """
+    Analyze every day of a plan with one LLM call (instead of one /summarize-idea call per day).
+    Days the batched answer misses are summarized individually.
+    """
+    try:
+        result = await summarize_week_async(week.topic, week.audience, week.ideas)
+    except Exception as e:
+        log.exception("request failed", endpoint="/summarize-week")
+        raise HTTPException(status_code=500, detail=f"Week analysis failed: {e}")
+    
+    return result
+
 @app.get("/alternate-idea")
-def alternate_idea(
+async def alternate_idea(
     topic: str,
     audience: str,
     day: str,
@@ -88,83 +292,280 @@ def alternate_idea(
     """
     try:
         # The content_generator.py handles fallback automatically
-        idea = generate_alternate_idea(topic, audience, day, exclude)
+        idea = await generate_alternate_idea_async(topic, audience, day, exclude)
                 
     except Exception as e:
-        print(f"ERROR in /alternate-idea: {type(e).__name__}: {e}")
+        log.exception("request failed", endpoint="/alternate-idea")
         raise HTTPException(status_code=500, detail=f"Alternate idea generation failed: {e}")
     
     return {"idea": idea}
 
-# Database endpoints remain unchanged
-@app.post("/schedule-post")
-def schedule_post(post: PostInput, db: Session = Depends(get_db)):
-    existing = db.query(ScheduledPost).filter(
-        ScheduledPost.idea == post.idea,
-        ScheduledPost.date == str(post.date)
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail="A post with this idea and date already exists.")
-    
-    new_post = ScheduledPost(idea=post.idea, date=str(post.date))
-    db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+# Scheduled posts: the unique (idea, date) index rejects duplicates (400), missing ids are 404
+def _duplicate_post() -> HTTPException:
+    return HTTPException(status_code=400, detail="A post with this idea and date already exists.")
+
+def _insert_post(db: Session, post: PostInput) -> dict:
+    # One round trip: the unique (idea, date) index decides whether this is a duplicate
+    stmt = insert_ignoring_duplicates(db.get_bind().dialect.name)
+    try:
+        if stmt is not None:
+            post_id = db.execute(stmt.values(idea=post.idea, date=post.date).returning(ScheduledPost.id)).scalar()
+        else:
+            new_post = ScheduledPost(idea=post.idea, date=post.date)
+            db.add(new_post)
+            db.flush()
+            post_id = new_post.id
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise _duplicate_post()
+    if post_id is None:
+        raise _duplicate_post()
+    listing_cache.invalidate()
     return {
         "message": "Post scheduled!",
-        "post": {"id": new_post.id, "idea": new_post.idea, "date": new_post.date}
+        "post": {"id": post_id, "idea": post.idea, "date": post.date}
+    }
+
+@app.post("/schedule-post")
+async def schedule_post(post: PostInput, db=Depends(get_db)):
+    return await run_db(db, _insert_post, post)
+
+def _encode_cursor(post_date: date, post_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{post_date.isoformat()}|{post_id}".encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        post_date, post_id = raw.split("|")
+        return date.fromisoformat(post_date), int(post_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _parse_bulk_items(body: bytes, content_type: str) -> list:
+    """
+    Raw items from a JSON body ([...] or {"posts": [...]}) or a CSV with idea and date columns.
+    A CSV row that can't be read as one post is returned as a ValueError, reported as invalid.
+    """
+    if "csv" in content_type:
+        try:
+            text = body.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+        reader = csv.DictReader(io.StringIO(text))
+        if not {"idea", "date"} <= {name.strip().lower() for name in reader.fieldnames or ()}:
+            raise HTTPException(status_code=400, detail="CSV needs a header row with idea and date columns")
+        items = []
+        for row in reader:
+            # DictReader puts fields beyond the header under None; usually an unquoted comma in an idea.
+            # Empty ones are just trailing commas from a spreadsheet export
+            extra = [value for value in row.pop(None, ()) if value.strip()]
+            if extra:
+                items.append(ValueError(f"row has {len(extra)} more field(s) than the header; "
+                                        "quote ideas that contain commas"))
+                continue
+            items.append({key.strip().lower(): value.strip() if isinstance(value, str) else value
+                          for key, value in row.items()})
+        return items
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be JSON or CSV")
+    items = data.get("posts") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail='Expected a JSON list of posts or {"posts": [...]}')
+    return items
+
+def _lookup_posts(db: Session, pairs: list) -> dict:
+    """(idea, date) -> id for those pairs that exist, one set-based query per chunk."""
+    found = {}
+    for start in range(0, len(pairs), BULK_LOOKUP_CHUNK):
+        rows = db.query(ScheduledPost.id, ScheduledPost.idea, ScheduledPost.date).filter(
+            tuple_(ScheduledPost.idea, ScheduledPost.date).in_(pairs[start:start + BULK_LOOKUP_CHUNK])
+        ).all()
+        found.update(((row.idea, row.date), row.id) for row in rows)
+    return found
+
+def _schedule_bulk(db: Session, items: list) -> dict:
+    results = [None] * len(items)
+    first_index = {}    # (idea, date) -> index of its first valid occurrence in the request
+    for index, item in enumerate(items):
+        if isinstance(item, ValueError):
+            results[index] = {"index": index, "status": "invalid", "error": str(item)}
+            continue
+        try:
+            post = PostInput.model_validate(item)
+        except ValidationError as e:
+            error = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}" for err in e.errors())
+            results[index] = {"index": index, "status": "invalid", "error": error}
+            continue
+        key = (post.idea, post.date)
+        if key in first_index:
+            results[index] = {"index": index, "status": "duplicate", "idea": post.idea, "date": post.date}
+        else:
+            first_index[key] = index
+
+    existing = _lookup_posts(db, list(first_index))
+    new_keys = [key for key in first_index if key not in existing]
+    created = {}
+    if new_keys:
+        stmt = insert_ignoring_duplicates(db.get_bind().dialect.name)
+        try:
+            # executemany in the same transaction; ON CONFLICT covers rows a concurrent writer just added
+            db.execute(stmt if stmt is not None else insert(ScheduledPost),
+                       [{"idea": idea, "date": post_date} for idea, post_date in new_keys])
+            created = _lookup_posts(db, new_keys)
+            db.commit()
+            listing_cache.invalidate()
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(status_code=400, detail="Some posts were scheduled concurrently; nothing was saved.")
+
+    for (idea, post_date), index in first_index.items():
+        if (idea, post_date) in existing:
+            results[index] = {"index": index, "status": "duplicate", "idea": idea, "date": post_date,
+                              "id": existing[(idea, post_date)]}
+        else:
+            results[index] = {"index": index, "status": "created", "idea": idea, "date": post_date,
+                              "id": created.get((idea, post_date))}
+    counts = {"created": 0, "duplicate": 0, "invalid": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {"created": counts["created"], "duplicates": counts["duplicate"], "invalid": counts["invalid"],
+            "results": results}
+
+@app.post("/schedule-post/bulk")
+async def schedule_posts_bulk(request: Request, db=Depends(get_db)):
+    """
+    Schedule many posts (a week, a month, a CSV import) in one transaction: a JSON list of
+    {"idea", "date"} items (or {"posts": [...]}), or text/csv with idea,date columns.
+    Every item gets a result: created (with its id), duplicate, or invalid (with the reason).
+    """
+    items = _parse_bulk_items(await request.body(), request.headers.get("content-type", ""))
+    if not items:
+        raise HTTPException(status_code=400, detail="No posts to schedule")
+    if len(items) > BULK_SCHEDULE_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_SCHEDULE_MAX_ITEMS} posts per request")
+    return await run_db(db, _schedule_bulk, items)
+
+def _list_posts(db: Session, limit: int, cursor: Optional[str], date_from: Optional[date],
+                date_to: Optional[date], include_total: bool) -> dict:
+    query = db.query(ScheduledPost.id, ScheduledPost.idea, ScheduledPost.date)
+    if date_from is not None:
+        query = query.filter(ScheduledPost.date >= date_from)
+    if date_to is not None:
+        query = query.filter(ScheduledPost.date <= date_to)
+    total = query.count() if include_total else None
+    if cursor:
+        query = query.filter(tuple_(ScheduledPost.date, ScheduledPost.id) > _decode_cursor(cursor))
+    # One extra row tells us whether there is a next page without a separate COUNT
+    rows = query.order_by(ScheduledPost.date, ScheduledPost.id).limit(limit + 1).all()
+    page = rows[:limit]
+    response = {
+        "scheduled_posts": [{"id": row.id, "idea": row.idea, "date": row.date} for row in page],
+        "next_cursor": _encode_cursor(page[-1].date, page[-1].id) if len(rows) > limit else None,
     }
+    if include_total:
+        response["total"] = total
+    return response
 
 @app.get("/scheduled-posts")
-def get_scheduled_posts(db: Session = Depends(get_db)):
-    posts = db.query(ScheduledPost).all()
-    return {"scheduled_posts": [{"id": post.id, "idea": post.idea, "date": post.date} for post in posts]}
+async def get_scheduled_posts(
+    request: Request,
+    limit: int = Query(SCHEDULED_POSTS_PAGE_SIZE, ge=1, le=SCHEDULED_POSTS_MAX_PAGE_SIZE, description="Posts per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    date_from: Optional[date] = Query(None, alias="from", description="Earliest date, inclusive"),
+    date_to: Optional[date] = Query(None, alias="to", description="Latest date, inclusive"),
+    include_total: bool = Query(False, description="Also count every post matching the date filters"),
+    db=Depends(get_db),
+):
+    """
+    Posts ordered by (date, id), one page at a time. Pages are keyset-paginated: the cursor is the
+    last (date, id) seen, so every page is an index range scan no matter how deep it is.
 
-@app.put("/scheduled-posts/{post_id}")
-def update_scheduled_post(post_id: int, post: PostInput, db: Session = Depends(get_db)):
-    existing_post = db.query(ScheduledPost).filter(ScheduledPost.id == post_id).first()
-    if not existing_post:
+    Pages carry ETag and Last-Modified; a poll with a current If-None-Match / If-Modified-Since
+    gets an empty 304 without a query. Unchanged pages are served from the listing cache, which
+    every write invalidates.
+    """
+    key = f"{limit}|{cursor or ''}|{date_from}|{date_to}|{include_total}"
+    version, headers = listing_cache.validators(key)
+    if listing_cache.is_current(headers, request.headers.get("if-none-match"),
+                                request.headers.get("if-modified-since")):
+        scheduled_posts_cache_total.inc("not_modified")
+        return Response(status_code=304, headers=headers)
+    body = listing_cache.get(key, version)
+    if body is not None:
+        scheduled_posts_cache_total.inc("hit")
+        return Response(body, media_type="application/json", headers=headers)
+    scheduled_posts_cache_total.inc("miss")
+    page = await run_db(db, _list_posts, limit, cursor, date_from, date_to, include_total)
+    response = JSONResponse(jsonable_encoder(page), headers=headers)
+    listing_cache.put(key, version, response.body)
+    return response
+
+def _update_post(db: Session, post_id: int, post: PostInput) -> dict:
+    stmt = update(ScheduledPost).where(ScheduledPost.id == post_id).values(idea=post.idea, date=post.date)
+    try:
+        updated = db.execute(stmt).rowcount
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise _duplicate_post()
+    if not updated:
         raise HTTPException(status_code=404, detail="Post not found")
-    
-    duplicate = db.query(ScheduledPost).filter(
-        ScheduledPost.idea == post.idea,
-        ScheduledPost.date == str(post.date),
-        ScheduledPost.id != post_id
-    ).first()
-    if duplicate:
-        raise HTTPException(status_code=400, detail="A post with this idea and date already exists.")
-    
-    existing_post.idea = post.idea
-    existing_post.date = str(post.date)
-    db.commit()
-    db.refresh(existing_post)
+    listing_cache.invalidate()
     return {
         "message": f"Post with id {post_id} updated.",
-        "post": {"id": existing_post.id, "idea": existing_post.idea, "date": existing_post.date}
+        "post": {"id": post_id, "idea": post.idea, "date": post.date}
     }
 
-@app.delete("/scheduled-posts/{post_id}")
-def delete_scheduled_post(post_id: int, db: Session = Depends(get_db)):
+@app.put("/scheduled-posts/{post_id}")
+async def update_scheduled_post(post_id: int, post: PostInput, db=Depends(get_db)):
+    return await run_db(db, _update_post, post_id, post)
+
+def _delete_post(db: Session, post_id: int) -> dict:
     post = db.query(ScheduledPost).filter(ScheduledPost.id == post_id).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     db.delete(post)
     db.commit()
+    listing_cache.invalidate()
     return {"message": f"Post with id {post_id} deleted."}
 
+@app.delete("/scheduled-posts/{post_id}")
+async def delete_scheduled_post(post_id: int, db=Depends(get_db)):
+    return await run_db(db, _delete_post, post_id)
+
 # Health check endpoint
+def _provider_available(name: str, circuit: dict, key_env: str) -> bool:
+    return bool(os.getenv(key_env)) and circuit["state"] != "open" and circuit["last_probe_ok"] is not False
+
 @app.get("/health")
 def health_check():
+    """Cached provider health from the background prober; answers instantly and never calls a provider."""
+    circuits = get_circuit_snapshot()
+    openai_ok = _provider_available("openai", circuits["openai"], "OPENAI_API_KEY")
+    perplexity_ok = _provider_available("perplexity", circuits["perplexity"], "PERPLEXITY_API_KEY")
     return {
-        "status": "healthy",
-        "openai_available": bool(os.getenv("OPENAI_API_KEY")),
-        "perplexity_available": bool(os.getenv("PERPLEXITY_API_KEY")),
-        "fallback_enabled": True
+        # Degraded still serves: the local model or the template plan answers when both providers are down
+        "status": "healthy" if openai_ok or perplexity_ok else "degraded",
+        "openai_available": openai_ok,
+        "perplexity_available": perplexity_ok,
+        "fallback_enabled": True,
+        "providers": {
+            name: {key: circuit[key] for key in ("state", "last_probe_ok", "last_probe_ms", "last_probe_at",
+                                                 "last_success_at")}
+            for name, circuit in circuits.items()
+        },
     }
 
+@app.get("/metrics")
+def metrics():
+    """Provider latency, status codes, fallbacks, tokens, parse failures and DB timings for Prometheus."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # Debug endpoint to check API status
 @app.get("/api-status")
 def api_status():
-    """Debug endpoint to check which APIs are working."""
-    from app.agents.content_generator import get_api_status
+    """Debug endpoint to check which APIs are working (cached; see health_prober)."""
     return get_api_status()
@@ -0,0 +1,188 @@
+import bisect
+import threading
+import time
+
+# Default latency buckets (seconds), tuned for LLM calls: fast cache-like answers up to slow completions
+LLM_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 90.0)
+DB_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _format_labels(labelnames: tuple, labels: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    """Monotonic counter, optionally split by labels. inc() is a dict update under a lock."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def samples(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+class Histogram:
+    """
+    Fixed-bucket histogram. observe() only bumps one bucket; the cumulative counts of the
+    text format are built when /metrics is scraped.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple = (), buckets: tuple = LLM_LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # One slot per bucket plus +Inf, then sum and count
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> list:
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+class MetricsRegistry:
+    """In-process registry rendered in the Prometheus text exposition format (version 0.0.4)."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: tuple = (),
+                  buckets: tuple = LLM_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# --- LLM providers ---
+llm_request_seconds = registry.histogram(
+    "llm_request_duration_seconds", "Provider call latency, including failed calls.", ("provider", "outcome"))
+llm_responses_total = registry.counter(
+    "llm_responses_total", "Provider responses by HTTP status code (or timeout / connection_error).",
+    ("provider", "status"))
+llm_fallbacks_total = registry.counter(
+    "llm_fallbacks_total", "Times the provider chain moved past a provider, by reason.", ("provider", "reason"))
+llm_rate_limited_total = registry.counter(
+    "llm_rate_limited_total", "429 responses received from a provider.", ("provider",))
+llm_chain_failures_total = registry.counter(
+    "llm_chain_failures_total", "Calls where every provider failed.")
+llm_tokens_total = registry.counter(
+    "llm_tokens_total", "Tokens reported in the provider usage field.", ("provider", "type"))
+llm_truncated_total = registry.counter(
+    "llm_truncated_total", "Completions cut off at max_tokens (finish_reason length) and retried.", ("provider",))
+
+# --- Plan parsing ---
+plan_parse_total = registry.counter(
+    "plan_parse_total", "Parsed content plans by the strategy that succeeded.", ("strategy",))
+plan_parse_failures_total = registry.counter(
+    "plan_parse_failures_total", "Responses with no usable JSON object or list literal.", ("reason",))
+plan_parse_placeholder_days_total = registry.counter(
+    "plan_parse_placeholder_days_total", "Days filled with a placeholder idea because parsing found none.")
+
+week_summary_fallback_days_total = registry.counter(
+    "week_summary_fallback_days_total", "Days a batched week analysis missed and summarized with a per-day call.")
+
+# --- Alternate-idea pool ---
+alternate_pool_requests_total = registry.counter(
+    "alternate_pool_requests_total", "Regenerate requests served from the alternate pool (hit) or not (miss).",
+    ("result",))
+alternate_pool_refills_total = registry.counter(
+    "alternate_pool_refills_total", "Completed alternate pool refills (one LLM call each).")
+topic_index_lookups_total = registry.counter(
+    "topic_index_lookups_total", "Plan requests checked against the topic index, by result.", ("result",))
+prewarm_plans_total = registry.counter(
+    "prewarm_plans_total", "Plans regenerated ahead of demand by the prewarmer, by result.", ("result",))
+
+# --- Database ---
+db_query_seconds = registry.histogram(
+    "db_query_duration_seconds", "SQL statement latency by statement type.", ("operation",), DB_LATENCY_BUCKETS)
+scheduled_posts_cache_total = registry.counter(
+    "scheduled_posts_cache_total", "GET /scheduled-posts requests by cache result (hit, miss, not_modified).",
+    ("result",))
+
+def instrument_engine(engine) -> None:
+    """Time every statement executed through a SQLAlchemy engine into db_query_duration_seconds."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+        db_query_seconds.observe(time.perf_counter() - started, operation)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context):
+        # after_cursor_execute never fires for a failed statement; drop its start time
+        conn = context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
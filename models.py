@@ -1,17 +1,143 @@
-from sqlalchemy import create_engine, Column, Integer, String
+import importlib.util
+import os
+
+from sqlalchemy import create_engine, event, Column, Date, Index, Integer, String, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./posts.db"  # DB saved as posts.db in your folder
+from app.agents.structured_logging import get_logger
+
+log = get_logger("db")
+
+# DB saved as posts.db in your folder; DATABASE_URL overrides it (e.g. for benchmarks)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./posts.db")
+
+# "tuned" applies the SQLITE_* pragmas below to every connection; "default" keeps SQLite's own settings
+DB_PROFILE = os.getenv("DB_PROFILE", "tuned").lower()
+# WAL lets readers proceed while a write is in progress
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+# NORMAL is durable in WAL mode except for the last commits on power loss; commits skip the fsync
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+# Negative values are KiB: 64 MiB of page cache per connection
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+# Milliseconds a writer waits for the lock instead of failing with "database is locked"
+SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000"))
+# Pooled connections per process; size + overflow covers FastAPI's 40-thread pool for sync endpoints
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "32"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+# Serve the API's DB work through an aiosqlite AsyncSession instead of the thread pool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+_is_sqlite = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+_is_memory = _is_sqlite and (":memory:" in SQLALCHEMY_DATABASE_URL or SQLALCHEMY_DATABASE_URL.rstrip("/") == "sqlite:")
+
+def _engine_kwargs() -> dict:
+    kwargs = {"connect_args": {"check_same_thread": False}} if _is_sqlite else {}
+    if not _is_memory:
+        kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT,
+                      pool_pre_ping=not _is_sqlite)
+    return kwargs
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    """Per-connection pragmas for the "tuned" profile (journal_mode=WAL also persists in the file)."""
+    cursor = dbapi_connection.cursor()
+    try:
+        if not _is_memory:
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA temp_store={SQLITE_TEMP_STORE}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT}")
+    finally:
+        cursor.close()
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **_engine_kwargs())
+if _is_sqlite and DB_PROFILE == "tuned":
+    event.listen(engine, "connect", apply_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+def _create_async_engine():
+    """aiosqlite engine for DB_ASYNC; None when disabled, not SQLite, or aiosqlite isn't installed."""
+    if not DB_ASYNC or not _is_sqlite:
+        return None
+    if importlib.util.find_spec("aiosqlite") is None:
+        log.warning("DB_ASYNC is set but the 'aiosqlite' package is not installed - using the sync engine")
+        return None
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    url = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    kwargs = _engine_kwargs()
+    kwargs.pop("connect_args", None)
+    async_engine = create_async_engine(url, **kwargs)
+    if DB_PROFILE == "tuned":
+        event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+    return async_engine
+
+async_engine = _create_async_engine()
+AsyncSessionLocal = None
+if async_engine is not None:
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 class ScheduledPost(Base):
     __tablename__ = "scheduled_posts"
     id = Column(Integer, primary_key=True, index=True)
     idea = Column(String, nullable=False)
-    date = Column(String, nullable=False)
+    date = Column(Date, nullable=False, index=True)
+
+    # Duplicate (idea, date) pairs are rejected by the database, not by a SELECT beforehand
+    __table_args__ = (Index("ux_scheduled_posts_idea_date", "idea", "date", unique=True),)
+
+def insert_ignoring_duplicates(dialect: str):
+    """
+    INSERT ... ON CONFLICT (idea, date) DO NOTHING into scheduled_posts, for one row (.values())
+    or many (executemany). None on dialects without ON CONFLICT; callers then insert normally and
+    treat IntegrityError as the duplicate.
+    """
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(ScheduledPost).on_conflict_do_nothing(index_elements=["idea", "date"])
+
+def migrate_scheduled_posts(bind=engine) -> bool:
+    """
+    Upgrade a posts.db created before the (idea, date) unique index: date moves to a DATE column
+    and duplicate (idea, date) rows are collapsed into the oldest one. Runs in one transaction;
+    returns True when a migration was applied. SQLite only (the original deployment target).
+    """
+    inspector = inspect(bind)
+    if not inspector.has_table("scheduled_posts"):
+        return False
+    indexes = {index["name"] for index in inspector.get_indexes("scheduled_posts")}
+    date_type = next(str(column["type"]) for column in inspector.get_columns("scheduled_posts")
+                     if column["name"] == "date")
+    if "ux_scheduled_posts_idea_date" in indexes and date_type.upper() == "DATE":
+        return False
+    if bind.dialect.name != "sqlite":
+        raise RuntimeError("scheduled_posts predates the (idea, date) unique index; migrate it manually")
+
+    with bind.begin() as conn:
+        conn.execute(text("ALTER TABLE scheduled_posts RENAME TO scheduled_posts_legacy"))
+        # The legacy table's index names would clash with the new table's
+        for name in indexes:
+            conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+        Base.metadata.create_all(bind=conn, tables=[ScheduledPost.__table__])
+        # Dates were stored with str(date), already the ISO text SQLAlchemy's SQLite Date uses
+        conn.execute(text(
+            "INSERT INTO scheduled_posts (id, idea, date) "
+            "SELECT MIN(id), idea, date FROM scheduled_posts_legacy GROUP BY idea, date"
+        ))
+        conn.execute(text("DROP TABLE scheduled_posts_legacy"))
+    return True
 
-# Create the table if it doesn't exist yet!
+# Upgrade an existing table, then create the table if it doesn't exist yet!
+migrate_scheduled_posts()
 Base.metadata.create_all(bind=engine)
@@ -0,0 +1,328 @@
+"""
+Background pre-warming of popular content plans.
+
+Interactive plan requests are counted per canonical (topic, audience) with exponential decay.
+The warmer takes the hottest combinations and regenerates their plans into the LLM cache
+before they expire, spending at most PREWARM_MAX_CALLS provider calls per warming window.
+
+With a window such as PREWARM_WINDOW=01:00-06:00 the spend moves to off-peak hours: a hot plan
+is regenerated once per window whenever it would otherwise expire before the next window opens.
+For that to cover the peak, LLM_CACHE_TTL has to span the gap between windows (e.g. 86400).
+
+In-process: set PREWARM_ENABLED=true and main.py runs the warmer alongside the API.
+As a CLI (request counts are shared through PREWARM_DB):
+
+    python -m app.agents.prewarm            # run continuously
+    python -m app.agents.prewarm --once     # one pass, e.g. from cron
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+
+from app.agents.llm_cache import LLM_CACHE_DB
+from app.agents.metrics import prewarm_plans_total
+from app.agents.structured_logging import get_logger
+from app.agents.topic_index import canonicalize_audience, canonicalize_topic
+
+load_dotenv()
+
+log = get_logger("prewarm")
+
+# Run the warmer inside the API process (the CLI works either way)
+PREWARM_ENABLED = os.getenv("PREWARM_ENABLED", "false").lower() in ("1", "true", "yes")
+# Count interactive plan requests per (topic, audience); the warmer picks its hot set from these
+PREWARM_TRACKING = os.getenv("PREWARM_TRACKING", "true").lower() in ("1", "true", "yes")
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "300"))
+# Decayed request count a combination needs before it is worth warming
+PREWARM_MIN_SCORE = float(os.getenv("PREWARM_MIN_SCORE", "3"))
+PREWARM_HALF_LIFE_HOURS = float(os.getenv("PREWARM_HALF_LIFE_HOURS", "72"))
+# Local-time warming window "HH:MM-HH:MM" (may wrap midnight); empty warms at any time
+PREWARM_WINDOW = os.getenv("PREWARM_WINDOW", "")
+# Provider calls the warmer may spend per window (per day when no window is set)
+PREWARM_MAX_CALLS = int(os.getenv("PREWARM_MAX_CALLS", "500"))
+PREWARM_INTERVAL = float(os.getenv("PREWARM_INTERVAL", "300"))
+# Without a window: regenerate plans this many seconds before they expire
+PREWARM_REFRESH_AHEAD = float(os.getenv("PREWARM_REFRESH_AHEAD", "900"))
+# Request counts are shared between processes through this SQLite file; empty keeps them in memory
+PREWARM_DB = os.getenv("PREWARM_DB", LLM_CACHE_DB)
+PREWARM_FLUSH_INTERVAL = float(os.getenv("PREWARM_FLUSH_INTERVAL", "60"))
+
+def parse_window(text: str):
+    """ "01:00-06:00" -> (60, 360) minutes after midnight; empty -> None."""
+    if not text.strip():
+        return None
+    try:
+        start, end = (datetime.strptime(part.strip(), "%H:%M") for part in text.split("-"))
+    except ValueError:
+        raise ValueError(f"PREWARM_WINDOW must look like 01:00-06:00, got {text!r}")
+    return start.hour * 60 + start.minute, end.hour * 60 + end.minute
+
+class TopicPopularity:
+    """
+    Exponentially decayed request counts per canonical (topic, audience). record() only bumps a
+    dict; pending counts are merged into SQLite by a background flush, so several API workers
+    and the CLI warmer see the same popularity.
+    """
+
+    def __init__(self, db_path: str = PREWARM_DB, half_life_hours: float = PREWARM_HALF_LIFE_HOURS,
+                 flush_interval: float = PREWARM_FLUSH_INTERVAL, enabled: bool = PREWARM_TRACKING):
+        self.enabled = enabled
+        self.half_life = half_life_hours * 3600
+        self.flush_interval = flush_interval
+        self._pending = {}      # (audience, topic) canonical -> [count, display topic, display audience]
+        self._lock = threading.Lock()
+        self._flushing = False
+        self._last_flush = time.monotonic()
+        self._db_lock = threading.Lock()
+        try:
+            self._db = self._connect(db_path or ":memory:")
+        except sqlite3.Error as e:
+            # Unwritable or locked path: keep counting, but only for this process
+            log.warning("topic popularity sharing disabled, counting in memory", error=str(e))
+            self._db = self._connect(":memory:")
+
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(db_path, check_same_thread=False)
+        try:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS topic_popularity "
+                "(audience TEXT NOT NULL, topic TEXT NOT NULL, display_audience TEXT NOT NULL, "
+                "display_topic TEXT NOT NULL, score REAL NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (audience, topic))"
+            )
+            db.commit()
+        except sqlite3.Error:
+            db.close()
+            raise
+        return db
+
+    def _decayed(self, score: float, updated_at: float, now: float) -> float:
+        return score * 0.5 ** (max(0.0, now - updated_at) / self.half_life)
+
+    def record(self, topic: str, audience: str) -> None:
+        if not self.enabled:
+            return
+        key = (canonicalize_audience(audience), canonicalize_topic(topic))
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = [1, topic, audience]
+            else:
+                entry[0] += 1
+            flush_due = not self._flushing and time.monotonic() - self._last_flush >= self.flush_interval
+            if flush_due:
+                self._flushing = True
+        if flush_due:
+            threading.Thread(target=self.flush, daemon=True).start()
+
+    def flush(self) -> None:
+        """Merge pending counts into the shared table."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushing = True
+        now = time.time()
+        try:
+            with self._db_lock:
+                for (audience, topic), (count, display_topic, display_audience) in pending.items():
+                    row = self._db.execute(
+                        "SELECT score, updated_at FROM topic_popularity WHERE audience = ? AND topic = ?",
+                        (audience, topic),
+                    ).fetchone()
+                    score = count + (self._decayed(row[0], row[1], now) if row else 0.0)
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO topic_popularity VALUES (?, ?, ?, ?, ?, ?)",
+                        (audience, topic, display_audience, display_topic, score, now),
+                    )
+                # Forget combinations nobody has asked for in ~10 half-lives
+                self._db.execute("DELETE FROM topic_popularity WHERE updated_at < ?", (now - 10 * self.half_life,))
+                self._db.commit()
+        except sqlite3.Error as e:
+            log.warning("topic popularity flush failed", error=str(e))
+        finally:
+            with self._lock:
+                self._flushing = False
+                self._last_flush = time.monotonic()
+
+    def hot(self, top_n: int = PREWARM_TOP_N, min_score: float = PREWARM_MIN_SCORE) -> list:
+        """The most requested combinations as [(topic, audience, score)], hottest first."""
+        self.flush()
+        now = time.time()
+        with self._db_lock:
+            rows = self._db.execute(
+                "SELECT display_topic, display_audience, score, updated_at FROM topic_popularity"
+            ).fetchall()
+        scored = [(topic, audience, self._decayed(score, updated_at, now))
+                  for topic, audience, score, updated_at in rows]
+        scored = [entry for entry in scored if entry[2] >= min_score]
+        scored.sort(key=lambda entry: entry[2], reverse=True)
+        return scored[:top_n]
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = sum(entry[0] for entry in self._pending.values())
+        with self._db_lock:
+            tracked = self._db.execute("SELECT COUNT(*) FROM topic_popularity").fetchone()[0]
+        return {"enabled": self.enabled, "tracked": tracked, "pending_requests": pending}
+
+class Prewarmer:
+    """
+    Regenerates hot plans into the LLM cache ahead of demand.
+
+    `warm(topic, audience)` regenerates one plan (one provider call, raises on failure) and
+    `cached_at(topic, audience)` returns when its cached copy was generated, or None.
+    """
+
+    def __init__(self, popularity: TopicPopularity, warm, cached_at, ttl: float, window: str = PREWARM_WINDOW,
+                 max_calls: int = PREWARM_MAX_CALLS, top_n: int = PREWARM_TOP_N,
+                 min_score: float = PREWARM_MIN_SCORE, refresh_ahead: float = PREWARM_REFRESH_AHEAD,
+                 interval: float = PREWARM_INTERVAL):
+        self.popularity = popularity
+        self.warm = warm
+        self.cached_at = cached_at
+        self.ttl = ttl
+        self.window_text = window or None
+        self.window = parse_window(window)
+        self.max_calls = max_calls
+        self.top_n = top_n
+        self.min_score = min_score
+        self.refresh_ahead = refresh_ahead
+        self.interval = interval
+        self._budget_key = None
+        self._spent = 0
+        self._lock = threading.Lock()
+        self._last_run = None
+
+    def _current_window(self, now: float):
+        """(start, end) epoch seconds of the window containing `now`, or None outside it."""
+        start_minute, end_minute = self.window
+        duration = ((end_minute - start_minute) % 1440 or 1440) * 60
+        local = datetime.fromtimestamp(now)
+        midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        for days_back in (0, 1):
+            start = (midnight - timedelta(days=days_back) + timedelta(minutes=start_minute)).timestamp()
+            if start <= now < start + duration:
+                return start, start + duration
+        return None
+
+    def _plan_round(self, now: float):
+        """(budget key, is_due(cached_at)) for a pass at `now`, or None when warming isn't allowed now."""
+        if self.window is None:
+            budget_key = datetime.fromtimestamp(now).date().isoformat()
+            return budget_key, lambda created: created is None or created + self.ttl - now < self.refresh_ahead
+        window = self._current_window(now)
+        if window is None:
+            return None
+        start, _ = window
+        next_start = start + 86400
+        # Warm once per window anything that would expire before the next window opens
+        return start, lambda created: created is None or (created < start and created + self.ttl < next_start)
+
+    def run_once(self, now: float = None) -> dict:
+        """One warming pass over the hot set, within the remaining budget."""
+        now = time.time() if now is None else now
+        result = {"in_window": False, "warmed": 0, "failed": 0, "fresh": 0, "budget_left": 0}
+        plan = self._plan_round(now)
+        if plan is None:
+            self._last_run = {**result, "at": now}
+            return result
+        budget_key, is_due = plan
+        with self._lock:
+            if budget_key != self._budget_key:
+                self._budget_key, self._spent = budget_key, 0
+        result["in_window"] = True
+
+        for topic, audience, _ in self.popularity.hot(self.top_n, self.min_score):
+            with self._lock:
+                if self._spent >= self.max_calls:
+                    break
+            if not is_due(self.cached_at(topic, audience)):
+                result["fresh"] += 1
+                continue
+            with self._lock:
+                self._spent += 1
+            try:
+                self.warm(topic, audience)
+            except Exception as e:
+                result["failed"] += 1
+                prewarm_plans_total.inc("failed")
+                log.warning("prewarm failed", topic=topic, audience=audience, error=str(e))
+                continue
+            result["warmed"] += 1
+            prewarm_plans_total.inc("warmed")
+
+        with self._lock:
+            result["budget_left"] = self.max_calls - self._spent
+        if result["warmed"] or result["failed"]:
+            log.info("prewarm pass finished", **result)
+        self._last_run = {**result, "at": now}
+        return result
+
+    def check_ttl(self) -> None:
+        """Warn when warmed plans can't last until the next window, so warming wouldn't cover the peak."""
+        if self.window is not None:
+            start_minute, end_minute = self.window
+            gap = 86400 - ((end_minute - start_minute) % 1440 or 1440) * 60
+            if self.ttl < gap:
+                log.warning("LLM_CACHE_TTL is shorter than the gap between prewarm windows; "
+                            "warmed plans will expire before the next window", ttl=self.ttl, gap=gap)
+
+    def run_forever(self, stop: threading.Event = None) -> None:
+        stop = stop or threading.Event()
+        self.check_ttl()
+        while not stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                log.exception("prewarm pass crashed")
+            stop.wait(self.interval)
+
+    async def run_async(self) -> None:
+        """In-process loop for the API; passes run in a worker thread so the event loop stays free."""
+        self.check_ttl()
+        while True:
+            try:
+                await asyncio.to_thread(self.run_once)
+            except Exception:
+                log.exception("prewarm pass crashed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            spent = self._spent
+        return {
+            "enabled": PREWARM_ENABLED,
+            "window": self.window_text,
+            "calls_this_window": spent,
+            "max_calls": self.max_calls,
+            "last_run": self._last_run,
+            "popularity": self.popularity.stats(),
+        }
+
+topic_popularity = TopicPopularity()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="Run a single warming pass and exit")
+    parser.add_argument("--list", action="store_true", help="Print the current hot set and exit")
+    args = parser.parse_args()
+
+    # Imported here: content_generator records requests into this module
+    from app.agents.content_generator import prewarmer
+
+    if args.list:
+        for topic, audience, score in topic_popularity.hot(prewarmer.top_n, prewarmer.min_score):
+            print(f"{score:8.1f}  {audience:<30} {topic}")
+    elif args.once:
+        print(prewarmer.run_once())
+    else:
+        prewarmer.run_forever()
+
+if __name__ == "__main__":
+    main()
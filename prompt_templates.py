@@ -0,0 +1,236 @@
+import math
+import os
+import re
+import string
+import threading
+from collections import deque
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "full" is the original wording; "compact" (opt-in) drops the worked example from the plan prompt
+PROMPT_VARIANT = os.getenv("PROMPT_VARIANT", "full").lower()
+# Size max_tokens from observed completion lengths instead of the fixed per-template default
+LLM_ADAPTIVE_MAX_TOKENS = os.getenv("LLM_ADAPTIVE_MAX_TOKENS", "true").lower() in ("1", "true", "yes")
+LLM_MAX_TOKENS_PERCENTILE = float(os.getenv("LLM_MAX_TOKENS_PERCENTILE", "99"))
+LLM_MAX_TOKENS_HEADROOM = float(os.getenv("LLM_MAX_TOKENS_HEADROOM", "1.25"))
+LLM_MAX_TOKENS_MIN_SAMPLES = int(os.getenv("LLM_MAX_TOKENS_MIN_SAMPLES", "20"))
+# Budgets are rounded up to this step so they stay stable (and the LLM cache keys with them)
+LLM_MAX_TOKENS_STEP = int(os.getenv("LLM_MAX_TOKENS_STEP", "32"))
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+def _load_encoder():
+    """Use tiktoken's cl100k_base when it is installed; otherwise fall back to the local estimate."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+_encoder = _load_encoder()
+
+def estimate_tokens(text: str) -> int:
+    """
+    Token count of a piece of text. Exact for OpenAI models when tiktoken is installed; otherwise
+    one token per punctuation mark and per word, plus one per 6 extra characters of long words.
+    """
+    if not text:
+        return 0
+    if _encoder is not None:
+        return len(_encoder.encode(text))
+    return sum(1 + (len(piece) - 1) // 6 for piece in _WORD_RE.findall(text))
+
+class PromptTemplate:
+    """
+    A prompt with optional compact variant. Templates are parsed once at import; rendering is a
+    join over the precompiled pieces, and the token count of the static text is precomputed so
+    estimating a rendered prompt only has to look at the substituted values.
+    """
+
+    def __init__(self, name: str, text: str, compact: str = None, max_tokens: int = 512, min_max_tokens: int = 64):
+        self.name = name
+        self.max_tokens = max_tokens
+        self.min_max_tokens = min_max_tokens
+        self._variants = {"full": self._compile(text)}
+        if compact is not None:
+            self._variants["compact"] = self._compile(compact)
+
+    @staticmethod
+    def _compile(text: str) -> tuple:
+        pieces, fields = [], []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            pieces.append((literal, field))
+            if field is not None:
+                if spec or conversion:
+                    raise ValueError(f"Format specs are not supported in prompt templates: {{{field}}}")
+                fields.append(field)
+        static_tokens = estimate_tokens("".join(literal for literal, _ in pieces))
+        return tuple(pieces), tuple(fields), static_tokens
+
+    def _variant(self, variant: str = None) -> tuple:
+        return self._variants.get(variant or PROMPT_VARIANT) or self._variants["full"]
+
+    def render(self, variant: str = None, **values) -> str:
+        pieces, _, _ = self._variant(variant)
+        return "".join(literal + (str(values[field]) if field is not None else "") for literal, field in pieces)
+
+    def estimate_prompt_tokens(self, variant: str = None, **values) -> int:
+        """Approximate prompt tokens without rendering (substituted values are counted per occurrence)."""
+        _, fields, static_tokens = self._variant(variant)
+        return static_tokens + sum(estimate_tokens(str(values[field])) for field in fields)
+
+class OutputBudget:
+    """
+    Recent completion lengths per template. Once enough samples exist, max_tokens is the chosen
+    percentile times a headroom factor, clamped between the template's floor and its default.
+    """
+
+    def __init__(self, window: int = 500, min_samples: int = LLM_MAX_TOKENS_MIN_SAMPLES,
+                 percentile: float = LLM_MAX_TOKENS_PERCENTILE, headroom: float = LLM_MAX_TOKENS_HEADROOM,
+                 step: int = LLM_MAX_TOKENS_STEP):
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile = percentile
+        self.headroom = headroom
+        self.step = step
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, template: str, completion_tokens: int) -> None:
+        with self._lock:
+            samples = self._samples.get(template)
+            if samples is None:
+                samples = self._samples[template] = deque(maxlen=self.window)
+            samples.append(completion_tokens)
+
+    def _observed(self, template: str):
+        with self._lock:
+            samples = sorted(self._samples.get(template, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(len(samples) - 1, math.ceil(self.percentile / 100 * len(samples)) - 1)
+        return samples[index]
+
+    def max_tokens(self, template: PromptTemplate) -> int:
+        observed = self._observed(template.name)
+        if observed is None:
+            return template.max_tokens
+        budget = math.ceil(observed * self.headroom / self.step) * self.step
+        return max(template.min_max_tokens, min(template.max_tokens, budget))
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {name: len(samples) for name, samples in self._samples.items()}
+        return {
+            name: {"samples": count, "observed_p": self._observed(name),
+                   "max_tokens": self.max_tokens(TEMPLATES[name]) if name in TEMPLATES else None}
+            for name, count in counts.items()
+        }
+
+_PLAN_REQUIREMENTS = (
+    "You are an expert content strategist creating content for {audience}.\n"
+    "Create 7 unique, engaging content ideas about '{topic}' for a weekly content calendar.\n\n"
+    "Requirements for each idea:\n"
+    "- Tailored specifically for {audience}\n"
+    "- Relevant, actionable, and valuable\n"
+    "- Different approach/angle for each day\n"
+    "- Concise but descriptive (10-15 words max)\n\n"
+)
+
+TEMPLATES = {template.name: template for template in (
+    PromptTemplate(
+        "plan-content",
+        _PLAN_REQUIREMENTS +
+        "IMPORTANT: Format your response EXACTLY as a Python list:\n"
+        "['Monday: [specific idea]', 'Tuesday: [specific idea]', 'Wednesday: [specific idea]', 'Thursday: [specific idea]', 'Friday: [specific idea]', 'Saturday: [specific idea]', 'Sunday: [specific idea]']\n\n"
+        "After the list, provide a 2-3 sentence summary of the week's content strategy.\n\n"
+        "Example format:\n"
+        "['Monday: Introduction to {topic} fundamentals for beginners', 'Tuesday: Common {topic} mistakes to avoid', 'Wednesday: Advanced {topic} techniques', 'Thursday: {topic} case studies and examples', 'Friday: Tools and resources for {topic}', 'Saturday: {topic} trends and future outlook', 'Sunday: {topic} community and networking tips']\n\n"
+        "This comprehensive weekly plan educates {audience} about {topic}, progressing from basics to advanced applications while building community engagement.",
+        compact=(
+            "As a content strategist, write 7 distinct content ideas about '{topic}' for {audience}, "
+            "one per day, each actionable and 10-15 words.\n"
+            "Reply EXACTLY as a Python list, then a 2-3 sentence summary of the week's strategy:\n"
+            "['Monday: ...', 'Tuesday: ...', 'Wednesday: ...', 'Thursday: ...', 'Friday: ...', 'Saturday: ...', 'Sunday: ...']"
+        ),
+        max_tokens=900, min_max_tokens=320,
+    ),
+    PromptTemplate(
+        "plan-content-json",
+        _PLAN_REQUIREMENTS +
+        "Respond ONLY with a JSON object of this shape:\n"
+        '{{"ideas": {{"Monday": "...", "Tuesday": "...", "Wednesday": "...", "Thursday": "...", '
+        '"Friday": "...", "Saturday": "...", "Sunday": "..."}}, '
+        '"summary": "2-3 sentence summary of the week\'s content strategy"}}',
+        compact=(
+            "As a content strategist, write 7 distinct content ideas about '{topic}' for {audience}, "
+            "one per day, each actionable and 10-15 words.\n"
+            'Respond ONLY with JSON: {{"ideas": {{"Monday": "...", ..., "Sunday": "..."}}, '
+            '"summary": "2-3 sentences on the week\'s strategy"}}'
+        ),
+        max_tokens=900, min_max_tokens=320,
+    ),
+    PromptTemplate(
+        "summarize-idea",
+        "As a content strategist, analyze why this content idea is effective for {day}:\n\n"
+        "Topic: {topic}\n"
+        "Audience: {audience}\n"
+        "Content Idea: {idea}\n\n"
+        "Write 2-3 sentences explaining:\n"
+        "1. Why this idea works well for {day}\n"
+        "2. How it appeals to {audience}\n"
+        "3. What specific value it provides\n\n"
+        "Keep it concise, actionable, and professional.",
+        max_tokens=150, min_max_tokens=96,
+    ),
+    PromptTemplate(
+        "summarize-week",
+        "As a content strategist, analyze this weekly content plan about '{topic}' for {audience}:\n\n"
+        "{plan}\n\n"
+        "For EACH day, write 2-3 sentences explaining:\n"
+        "1. Why the idea works well for that day\n"
+        "2. How it appeals to {audience}\n"
+        "3. What specific value it provides\n\n"
+        "Keep it concise, actionable, and professional.\n"
+        "Respond ONLY with a JSON object mapping each day to its analysis: {shape}",
+        max_tokens=1050, min_max_tokens=400,
+    ),
+    PromptTemplate(
+        "alternate-pool",
+        "Generate {count} fresh, creative content ideas about '{topic}' targeting {audience} for each of: {days}.\n"
+        "Make each one engaging, specific, 10-15 words, and clearly different from the others and from typical "
+        "content in this space. Focus on actionable value for {audience}.{avoid_clause}\n"
+        "Respond ONLY with a JSON object mapping each day to a list of ideas: {shape}",
+        max_tokens=1500, min_max_tokens=128,
+    ),
+    PromptTemplate(
+        "alternate-idea",
+        "Generate a fresh, creative content idea for {day} about '{topic}' targeting {audience}.\n"
+        "Make it engaging, specific, and different from typical content in this space.\n"
+        "Focus on actionable value for {audience}.\n"
+        "Provide ONLY the content idea title/description, no extra text.{exclude_clause}",
+        max_tokens=100, min_max_tokens=48,
+    ),
+)}
+
+output_budget = OutputBudget()
+
+def build_prompt(name: str, **values) -> tuple:
+    """Render a template and pick its max_tokens. Returns (prompt, max_tokens)."""
+    template = TEMPLATES[name]
+    max_tokens = output_budget.max_tokens(template) if LLM_ADAPTIVE_MAX_TOKENS else template.max_tokens
+    return template.render(**values), max_tokens
+
+def record_completion(name: str, completion: str) -> None:
+    """Feed a completion's length into the adaptive max_tokens for its template."""
+    output_budget.record(name, estimate_tokens(completion))
+
+def get_prompt_stats() -> dict:
+    return {
+        "variant": PROMPT_VARIANT,
+        "adaptive_max_tokens": LLM_ADAPTIVE_MAX_TOKENS,
+        "tokenizer": "tiktoken" if _encoder is not None else "estimate",
+        "templates": output_budget.stats(),
+    }
@@ -0,0 +1,195 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from app.agents.local_llm import LOCAL_LLM_ENABLED
+
+load_dotenv()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN", "30"))
+CIRCUIT_MAX_COOLDOWN = float(os.getenv("CIRCUIT_MAX_COOLDOWN", "300"))
+# A half-open trial that never reports back (e.g. cancelled) is abandoned after this long
+CIRCUIT_TRIAL_TIMEOUT = float(os.getenv("CIRCUIT_TRIAL_TIMEOUT", "120"))
+
+# Background provider probes; status endpoints read their cached results instead of calling providers
+HEALTH_PROBE_ENABLED = os.getenv("HEALTH_PROBE_ENABLED", "true").lower() in ("1", "true", "yes")
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "60"))
+# Each wait is the interval +/- this fraction, so workers and instances don't probe in lockstep
+HEALTH_PROBE_JITTER = float(os.getenv("HEALTH_PROBE_JITTER", "0.2"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "10"))
+
+class ProviderCircuit:
+    """
+    Per-provider health state machine.
+
+    closed     -> requests flow normally; consecutive failures are counted
+    open       -> requests skip this provider until the cooldown (or retry-after) expires
+    half_open  -> exactly one trial request is let through; success closes, failure reopens
+    """
+
+    def __init__(self, name: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown: float = CIRCUIT_COOLDOWN, max_cooldown: float = CIRCUIT_MAX_COOLDOWN,
+                 trial_timeout: float = CIRCUIT_TRIAL_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.trial_timeout = trial_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.last_error = None
+        self.last_failure_at = None
+        self.last_success_at = None
+        self.rate_limited_count = 0
+        self.last_probe_at = None
+        self.last_probe_ok = None
+        self.last_probe_ms = None
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Decide whether a request may use this provider right now. Never blocks."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if now < self.open_until:
+                    return False
+                self.state = HALF_OPEN
+                self._trial_started = now
+                return True
+            # HALF_OPEN: only one trial at a time
+            if self._trial_started is not None and now - self._trial_started < self.trial_timeout:
+                return False
+            self._trial_started = now
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self._trial_started = None
+            self.last_success_at = time.time()
+
+    def record_probe(self, ok: bool, seconds: float) -> None:
+        """Note a background probe's outcome; the circuit itself is updated via record_success/record_failure."""
+        with self._lock:
+            self.last_probe_at = time.time()
+            self.last_probe_ok = ok
+            self.last_probe_ms = round(seconds * 1000, 1)
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial slot whose request was cancelled before it finished."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trial_started = None
+
+    def record_failure(self, error: str = None, retry_after: float = None) -> None:
+        """
+        Record a failed call. A rate limit (retry_after set) opens the circuit immediately
+        for the advertised cooldown; other errors open it after the failure threshold.
+        """
+        with self._lock:
+            self.consecutive_failures += 1
+            self.last_error = error
+            self.last_failure_at = time.time()
+            if retry_after is not None:
+                self.rate_limited_count += 1
+            if self.state == HALF_OPEN or retry_after is not None \
+                    or self.consecutive_failures >= self.failure_threshold:
+                cooldown = retry_after if retry_after is not None else self.cooldown
+                self.state = OPEN
+                self.open_until = time.monotonic() + min(max(cooldown, 0), self.max_cooldown)
+                self._trial_started = None
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit will allow a trial request."""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.open_until - time.monotonic())
+
+    def snapshot(self) -> dict:
+        retry_in = self.retry_in()
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "retry_in_seconds": round(retry_in, 1),
+                "rate_limited_count": self.rate_limited_count,
+                "last_error": self.last_error,
+                "last_failure_at": self.last_failure_at,
+                "last_success_at": self.last_success_at,
+                "last_probe_at": self.last_probe_at,
+                "last_probe_ok": self.last_probe_ok,
+                "last_probe_ms": self.last_probe_ms,
+            }
+
+provider_circuits = {
+    "openai": ProviderCircuit("openai"),
+    "perplexity": ProviderCircuit("perplexity"),
+}
+if LOCAL_LLM_ENABLED:
+    provider_circuits["local"] = ProviderCircuit("local")
+
+def get_circuit_snapshot() -> dict:
+    return {name: circuit.snapshot() for name, circuit in provider_circuits.items()}
+
+class HealthProber:
+    """
+    Probes providers on a jittered interval and feeds the outcome into their circuits, so a
+    recovering provider is re-admitted (or a dead one opened) without risking user requests.
+
+    `probes` maps provider name -> async callable making one minimal request (raises on failure).
+    Providers whose circuit is open and still cooling down are left alone until it expires.
+    """
+
+    def __init__(self, probes: dict, interval: float = HEALTH_PROBE_INTERVAL, jitter: float = HEALTH_PROBE_JITTER,
+                 timeout: float = HEALTH_PROBE_TIMEOUT):
+        self.probes = probes
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.running = False
+
+    async def probe(self, name: str) -> None:
+        circuit = provider_circuits[name]
+        if not circuit.allow_request():
+            return
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(self.probes[name](), timeout=self.timeout)
+        except asyncio.CancelledError:
+            circuit.release_trial()
+            raise
+        except Exception as e:
+            circuit.record_probe(False, time.monotonic() - started)
+            error = str(e) or f"probe timed out after {self.timeout:.0f}s"
+            circuit.record_failure(f"health probe: {error}", retry_after=getattr(e, "retry_after", None))
+            return
+        circuit.record_probe(True, time.monotonic() - started)
+        circuit.record_success()
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(*(self.probe(name) for name in self.probes))
+
+    async def run_async(self) -> None:
+        """Probe loop for the API's lifespan; cancel the task to stop it."""
+        self.running = True
+        try:
+            while True:
+                await self.probe_all()
+                await asyncio.sleep(self.interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+        finally:
+            self.running = False
@@ -0,0 +1,207 @@
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Lower value = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# Longest a call may wait in the queue, per priority, before giving up on this provider
+RATE_LIMIT_MAX_WAIT = {
+    PRIORITY_INTERACTIVE: float(os.getenv("RATE_LIMIT_MAX_WAIT_INTERACTIVE", "10")),
+    PRIORITY_BATCH: float(os.getenv("RATE_LIMIT_MAX_WAIT_BATCH", "120")),
+}
+
+class QueueTimeoutError(Exception):
+    """Raised when a call could not get provider capacity within its maximum wait."""
+    pass
+
+def estimate_request_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough token cost of a call: ~4 characters per prompt token plus the completion budget."""
+    return len(prompt) // 4 + 1 + max_tokens
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at `per_minute` / 60 per second."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self.tokens -= amount
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "enqueued", "active")
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.active = True
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+class ProviderRateLimiter:
+    """
+    Client-side limiter for one provider, tracking requests/min and tokens/min.
+
+    Calls that can't run immediately queue by priority (interactive before batch, FIFO
+    within a priority) and give up with QueueTimeoutError after their maximum wait.
+    A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float, tokens_per_minute: float):
+        self.name = name
+        self._request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._stats = {"acquired": 0, "queued": 0, "timeouts": 0, "total_wait_seconds": 0.0,
+                       "max_wait_seconds": 0.0, "max_queue_depth": 0}
+        self._depth = 0
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until both buckets can cover the call. Caller holds the lock."""
+        wait = 0.0
+        if self._request_bucket is not None:
+            wait = max(wait, self._request_bucket.time_until(1, now))
+        if self._token_bucket is not None:
+            # Never ask for more than the bucket can ever hold
+            wait = max(wait, self._token_bucket.time_until(min(tokens, self._token_bucket.capacity), now))
+        return wait
+
+    def _take(self, tokens: int) -> None:
+        if self._request_bucket is not None:
+            self._request_bucket.take(1)
+        if self._token_bucket is not None:
+            self._token_bucket.take(min(tokens, self._token_bucket.capacity))
+
+    def _head(self):
+        while self._heap and not self._heap[0].active:
+            heapq.heappop(self._heap)
+        return self._heap[0] if self._heap else None
+
+    def _try_acquire(self, waiter, tokens: int, now: float) -> float:
+        """0.0 if the call was granted, otherwise how long to wait before retrying. Caller holds the lock."""
+        if waiter is not None and self._head() is not waiter:
+            return 0.05
+        if waiter is None and self._head() is not None:
+            return -1.0  # others are already queued; join the queue
+        wait = self._wait_time(tokens, now)
+        if wait > 0:
+            return wait
+        self._take(tokens)
+        self._stats["acquired"] += 1
+        return 0.0
+
+    def _enqueue(self, priority: int):
+        waiter = _Waiter(priority, next(self._seq))
+        heapq.heappush(self._heap, waiter)
+        self._depth += 1
+        self._stats["queued"] += 1
+        self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._depth)
+        return waiter
+
+    def _leave(self, waiter, granted: bool) -> None:
+        waiter.active = False
+        self._depth -= 1
+        waited = time.monotonic() - waiter.enqueued
+        if granted:
+            self._stats["total_wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+        else:
+            self._stats["timeouts"] += 1
+
+    def _timeout_error(self, max_wait: float) -> QueueTimeoutError:
+        return QueueTimeoutError(f"{self.name} client-side rate limit: no capacity within {max_wait:.0f}s")
+
+    def acquire(self, tokens: int, priority: int = PRIORITY_INTERACTIVE, max_wait: float = None) -> None:
+        """Block until the call may proceed, or raise QueueTimeoutError."""
+        max_wait = RATE_LIMIT_MAX_WAIT.get(priority, RATE_LIMIT_MAX_WAIT[PRIORITY_BATCH]) if max_wait is None else max_wait
+        with self._cond:
+            if self._try_acquire(None, tokens, time.monotonic()) == 0.0:
+                return
+            waiter = self._enqueue(priority)
+            deadline = waiter.enqueued + max_wait
+            granted = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._try_acquire(waiter, tokens, now)
+                    if wait == 0.0:
+                        granted = True
+                        return
+                    if now + wait > deadline:
+                        raise self._timeout_error(max_wait)
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._leave(waiter, granted)
+                self._cond.notify_all()
+
+    async def acquire_async(self, tokens: int, priority: int = PRIORITY_INTERACTIVE, max_wait: float = None) -> None:
+        """Async variant of acquire; waits with asyncio.sleep instead of blocking the loop."""
+        max_wait = RATE_LIMIT_MAX_WAIT.get(priority, RATE_LIMIT_MAX_WAIT[PRIORITY_BATCH]) if max_wait is None else max_wait
+        with self._cond:
+            if self._try_acquire(None, tokens, time.monotonic()) == 0.0:
+                return
+            waiter = self._enqueue(priority)
+        deadline = waiter.enqueued + max_wait
+        granted = False
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    wait = self._try_acquire(waiter, tokens, now)
+                if wait == 0.0:
+                    granted = True
+                    return
+                if now + wait > deadline:
+                    raise self._timeout_error(max_wait)
+                await asyncio.sleep(min(wait, 0.25))
+        finally:
+            with self._cond:
+                self._leave(waiter, granted)
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            granted_after_wait = self._stats["queued"] - self._stats["timeouts"] - self._depth
+            avg_wait = self._stats["total_wait_seconds"] / granted_after_wait if granted_after_wait > 0 else 0.0
+            return {**self._stats, "queue_depth": self._depth, "avg_wait_seconds": round(avg_wait, 3)}
+
+rate_limiters = {
+    "openai": ProviderRateLimiter(
+        "OpenAI",
+        float(os.getenv("OPENAI_RPM_LIMIT", "500")),
+        float(os.getenv("OPENAI_TPM_LIMIT", "60000")),
+    ),
+    "perplexity": ProviderRateLimiter(
+        "Perplexity",
+        float(os.getenv("PERPLEXITY_RPM_LIMIT", "50")),
+        float(os.getenv("PERPLEXITY_TPM_LIMIT", "100000")),
+    ),
+}
+
+def get_rate_limiter_stats() -> dict:
+    return {name: limiter.stats() for name, limiter in rate_limiters.items()}
@@ -0,0 +1,80 @@
+import json
+import re
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Sentinels returned by parse_sse_delta: the end-of-stream marker, and a completion cut off at max_tokens
+SSE_DONE = object()
+SSE_TRUNCATED = object()
+
+def parse_sse_delta(line: str):
+    """
+    Extract the text delta from one line of an OpenAI-compatible streaming response.
+
+    Returns the delta text, SSE_DONE for the terminating `data: [DONE]`, SSE_TRUNCATED for the
+    final chunk of a completion that stopped at max_tokens (finish_reason "length"), or None for
+    keep-alives, comments and other chunks without content.
+    """
+    if not line.startswith("data:"):
+        return None
+    payload = line[5:].strip()
+    if payload == "[DONE]":
+        return SSE_DONE
+    try:
+        choice = json.loads(payload)["choices"][0]
+        content = choice.get("delta", {}).get("content")
+        if not content and choice.get("finish_reason") == "length":
+            return SSE_TRUNCATED
+        return content
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Straight and typographic quotes
+_Q = "'\"\u2018\u2019\u201c\u201d"
+
+# A day's item is complete once it is closed by a quote followed by , ] or }, or by a newline
+_DAY_ITEM_RE = re.compile(
+    r"(?:^|[\[,{\n" + _Q + r"])\s*[" + _Q + r"]?(?P<day>" + "|".join(DAY_NAMES) + r")[" + _Q + r"]?\s*:\s*[" + _Q + r"]?"
+    r"(?P<idea>[^\n]+?)(?:[" + _Q + r"]\s*[,\]}]|\n)",
+    re.IGNORECASE,
+)
+
+class IncrementalIdeaParser:
+    """
+    Picks complete day ideas out of a token stream as it arrives.
+
+    Understands the list format the prompt asks for ("['Monday: ...', 'Tuesday: ...']"),
+    one-idea-per-line output and JSON objects keyed by day. Each day is emitted once;
+    anything this misses is filled in by the full parse when the stream ends.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.emitted = {}
+        self._pos = 0
+
+    def feed(self, chunk: str) -> list:
+        """Add streamed text; return [(day_index, idea), ...] for days completed by it."""
+        self.text += chunk
+        found = []
+        while True:
+            match = _DAY_ITEM_RE.search(self.text, self._pos)
+            if not match:
+                break
+            # Restart just before the terminator so back-to-back items still see their separator
+            self._pos = match.end() - 1
+            day_index = DAY_NAMES.index(match.group("day").capitalize())
+            idea = match.group("idea").strip().strip(_Q).strip()
+            if idea and day_index not in self.emitted:
+                self.emitted[day_index] = idea
+                found.append((day_index, idea))
+        return found
+
+    def reset_text(self) -> None:
+        """Drop buffered text (e.g. when falling back to another provider) but remember emitted days."""
+        self.text = ""
+        self._pos = 0
@@ -0,0 +1,183 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for one object per line (log shippers), "text" for a readable console line
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Share of high-volume success lines that are kept (1 keeps all, 0 drops all); warnings and errors are never sampled
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "0.1"))
+# String fields longer than this are truncated when formatted (0 disables)
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "500"))
+# Records waiting for the writer thread; when full, new records are dropped instead of blocking
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_request_id = contextvars.ContextVar("request_id", default=None)
+
+def set_request_id(request_id: str):
+    """Bind a correlation id to the current request context. Returns a token for reset_request_id."""
+    return _request_id.set(request_id)
+
+def reset_request_id(token) -> None:
+    _request_id.reset(token)
+
+def get_request_id():
+    return _request_id.get()
+
+def truncate(value, limit: int = None):
+    """Shorten long strings (response bodies, prompts) so their logging cost stays bounded."""
+    limit = LOG_MAX_FIELD_CHARS if limit is None else limit
+    if not isinstance(value, str):
+        value = str(value)
+    if limit and len(value) > limit:
+        return f"{value[:limit]}... [{len(value) - limit} more chars]"
+    return value
+
+def _field_value(value):
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    return truncate(value)
+
+class StructuredFormatter(logging.Formatter):
+    """Formats a record plus its structured fields; runs on the writer thread, not the request thread."""
+
+    def __init__(self, fmt: str = LOG_FORMAT):
+        super().__init__()
+        self.fmt = fmt
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = {key: _field_value(value) for key, value in getattr(record, "fields", {}).items()}
+        request_id = getattr(record, "request_id", None)
+        message = truncate(record.getMessage())
+        if self.fmt == "text":
+            parts = [time.strftime("%H:%M:%S", time.localtime(record.created)), record.levelname, record.name]
+            if request_id:
+                parts.append(f"[{request_id}]")
+            line = " ".join(parts) + f" {message}"
+            if fields:
+                line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        else:
+            entry = {
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "msg": message,
+            }
+            if request_id:
+                entry["request_id"] = request_id
+            entry.update(fields)
+            line = json.dumps(entry, default=str, ensure_ascii=False)
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+class _DroppingQueueHandler(QueueHandler):
+    """Never blocks the caller: when the writer thread falls behind, records are counted and dropped."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Skip QueueHandler's eager format(); only the exception text has to be captured here
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class StructuredLogger:
+    """
+    Thin wrapper over a stdlib logger: messages carry keyword fields, the current request id,
+    and success() lines are sampled at LOG_SUCCESS_SAMPLE_RATE.
+    """
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(f"planner.{name}")
+
+    def _log(self, level: int, msg: str, fields: dict, sampled: bool = False, exc_info=None) -> None:
+        if not self._logger.isEnabledFor(level):
+            return
+        if sampled and random.random() >= LOG_SUCCESS_SAMPLE_RATE:
+            return
+        extra = {"fields": fields, "request_id": _request_id.get()}
+        self._logger.log(level, msg, extra=extra, exc_info=exc_info)
+
+    def debug(self, msg: str, **fields) -> None:
+        self._log(logging.DEBUG, msg, fields)
+
+    def info(self, msg: str, **fields) -> None:
+        self._log(logging.INFO, msg, fields)
+
+    def success(self, msg: str, **fields) -> None:
+        """INFO line emitted on every successful call; sampled so its cost doesn't scale with traffic."""
+        self._log(logging.INFO, msg, fields, sampled=True)
+
+    def warning(self, msg: str, **fields) -> None:
+        self._log(logging.WARNING, msg, fields)
+
+    def error(self, msg: str, **fields) -> None:
+        self._log(logging.ERROR, msg, fields)
+
+    def exception(self, msg: str, **fields) -> None:
+        self._log(logging.ERROR, msg, fields, exc_info=True)
+
+_listener = None
+_handler = None
+_configure_lock = threading.Lock()
+
+def configure_logging(level: str = None, fmt: str = None, stream=None) -> None:
+    """
+    Route the "planner" loggers through a bounded queue to a background writer thread.
+    Safe to call more than once; later calls replace the level, format and stream.
+    """
+    global _listener, _handler
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(StructuredFormatter(fmt or LOG_FORMAT))
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        _handler = _DroppingQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+
+        root = logging.getLogger("planner")
+        root.handlers[:] = [_handler]
+        root.setLevel(level or LOG_LEVEL)
+        root.propagate = False
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler is not None else 0
+
+def get_logger(name: str) -> StructuredLogger:
+    if _listener is None:
+        configure_logging()
+    return StructuredLogger(name)
+
+atexit.register(shutdown_logging)
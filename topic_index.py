@@ -0,0 +1,192 @@
+import os
+import random
+import re
+import threading
+from collections import OrderedDict, namedtuple
+from itertools import islice
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOPIC_INDEX_ENABLED = os.getenv("TOPIC_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+# Character-trigram Jaccard similarity at which a previously generated topic is reused (1 = exact only).
+# A single typo in a two- or three-word topic scores about 0.8-0.85.
+TOPIC_SIMILARITY_THRESHOLD = float(os.getenv("TOPIC_SIMILARITY_THRESHOLD", "0.8"))
+TOPIC_INDEX_MAX_ENTRIES = int(os.getenv("TOPIC_INDEX_MAX_ENTRIES", "200000"))
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+_STOPWORDS = frozenset("a an the for of and in on about with your my our their".split())
+# Kept (not stopwords): with them, word order is part of the topic ("python to java" != "java to python")
+_DIRECTION_WORDS = frozenset("to from into vs versus than".split())
+# Tokens this short are acronyms or qualifiers ("b2b", "ios", "uk"); one letter apart is another topic
+_SHORT_TOKEN_LEN = 3
+# Trailing words that describe the request rather than the topic ("AI marketing strategies" == "AI marketing").
+# Nouns that change the topic ("business plan", "content marketing", "marketing strategy") are kept.
+_REQUEST_SUFFIXES = frozenset("tip tips idea ideas strategies".split())
+
+# Audience names the dashboard and API send, mapped to the dashboard's audience codes
+AUDIENCE_CODES = {
+    "startup founders entrepreneurs": "entrepreneurs", "startup founders": "entrepreneurs",
+    "founders": "entrepreneurs", "entrepreneur": "entrepreneurs",
+    "marketing professionals": "marketers", "marketer": "marketers", "marketing": "marketers",
+    "content creators influencers": "creators", "content creators": "creators", "creator": "creators",
+    "influencers": "creators",
+    "tech software developers": "developers", "software developers": "developers", "developer": "developers",
+    "devs": "developers",
+    "educators students": "students", "student": "students", "educators": "students",
+    "healthcare professionals": "healthcare",
+    "business executives": "executives", "executive": "executives",
+    "e commerce owners": "ecommerce", "ecommerce owners": "ecommerce", "e commerce": "ecommerce",
+    "freelancers consultants": "freelancers", "freelancer": "freelancers", "consultants": "freelancers",
+    "sustainability advocates": "sustainability",
+    "adult": "adults",
+}
+
+def _singular(word: str) -> str:
+    """Plural -> singular for the common English endings; deliberately conservative."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("sses"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+def canonicalize_topic(topic: str) -> str:
+    """
+    Case-fold, normalize punctuation and whitespace, drop stopwords and trailing request words,
+    and singularize, so "AI Marketing", " ai marketing " and "AI-marketing strategies" are one
+    topic. Request words are only dropped while two topic words remain: "business ideas" is a
+    topic of its own, not "business".
+    """
+    words = _NON_WORD_RE.sub(" ", topic.casefold().replace("&", " and ").replace("'", "")).split()
+    kept = [word for word in words if word not in _STOPWORDS] or words
+    while len(kept) > 2 and kept[-1] in _REQUEST_SUFFIXES:
+        kept.pop()
+    return " ".join(_singular(word) for word in kept)
+
+def canonicalize_audience(audience: str) -> str:
+    """Map audience display names and aliases to their code; unknown audiences are just normalized."""
+    text = " ".join(_NON_WORD_RE.sub(" ", audience.casefold().replace("&", " ")).split())
+    return AUDIENCE_CODES.get(text, text)
+
+def _shingles(text: str) -> frozenset:
+    """Character trigrams of the canonical topic, in word order."""
+    padded = f" {text} "
+    if len(padded) < 3:
+        return frozenset((padded,))
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _distinct_topics(a: str, b: str) -> bool:
+    """
+    Whether two canonical topics that look alike by trigrams are still different topics: they
+    differ in a number ("trends 2023" / "trends 2024") or a short token ("b2b" / "b2c"), or they
+    are the same words around a direction word in another order ("python to java" / "java to python").
+    Near duplicates are typos and inflections of longer words, which pass.
+    """
+    words_a, words_b = a.split(), b.split()
+    for word in set(words_a) ^ set(words_b):
+        if len(word) <= _SHORT_TOKEN_LEN or any(char.isdigit() for char in word):
+            return True
+    return words_a != words_b and sorted(words_a) == sorted(words_b) and not _DIRECTION_WORDS.isdisjoint(words_a)
+
+TopicMatch = namedtuple("TopicMatch", "value topic similarity")
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+class TopicIndex:
+    """
+    Previously generated topics, per audience, for exact (canonical) and near-duplicate lookup.
+
+    Near duplicates use MinHash over character trigrams with LSH banding: a lookup hashes one
+    short string and probes `bands` dict buckets, and only the few topics sharing a bucket get an
+    exact Jaccard check. Cost doesn't grow with the number of indexed topics.
+    """
+
+    def __init__(self, threshold: float = TOPIC_SIMILARITY_THRESHOLD, num_perm: int = 32, bands: int = 8,
+                 max_entries: int = TOPIC_INDEX_MAX_ENTRIES, max_candidates: int = 64, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+        self._entries = OrderedDict()   # (audience, canonical) -> (value, shingles, band keys)
+        self._buckets = {}              # band key -> set of (audience, canonical)
+        self._lock = threading.Lock()
+        self._stats = {"exact": 0, "similar": 0, "miss": 0}
+
+    def _band_keys(self, audience: str, shingles: frozenset) -> list:
+        hashes = [hash(shingle) & 0xFFFFFFFFFFFF for shingle in shingles]
+        signature = [min([(a * h + b) % _MERSENNE_PRIME for h in hashes]) for a, b in self._perms]
+        rows = self.rows
+        return [(audience, band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(self.bands)]
+
+    def add(self, audience: str, topic: str, value) -> None:
+        key = (canonicalize_audience(audience), canonicalize_topic(topic))
+        shingles = _shingles(key[1])
+        band_keys = self._band_keys(key[0], shingles) if self.threshold < 1 else []
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, shingles, band_keys)
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple) -> None:
+        # Caller holds self._lock
+        _, _, band_keys = self._entries.pop(key)
+        for band_key in band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def lookup(self, audience: str, topic: str):
+        """The value stored for this topic or the most similar one above the threshold, else None."""
+        key = (canonicalize_audience(audience), canonicalize_topic(topic))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact"] += 1
+                return TopicMatch(entry[0], key[1], 1.0)
+        if self.threshold >= 1:
+            with self._lock:
+                self._stats["miss"] += 1
+            return None
+
+        shingles = _shingles(key[1])
+        band_keys = self._band_keys(key[0], shingles)
+        best = None
+        with self._lock:
+            candidates = set()
+            for band_key in band_keys:
+                # Buckets of very common topics can be large; never copy more than max_candidates
+                bucket = self._buckets.get(band_key, ())
+                candidates.update(islice(bucket, self.max_candidates - len(candidates)))
+                if len(candidates) >= self.max_candidates:
+                    break
+            for candidate in candidates:
+                value, other, _ = self._entries[candidate]
+                similarity = len(shingles & other) / len(shingles | other)
+                if similarity >= self.threshold and (best is None or similarity > best.similarity) \
+                        and not _distinct_topics(key[1], candidate[1]):
+                    best = TopicMatch(value, candidate[1], similarity)
+            if best is not None:
+                self._entries.move_to_end((key[0], best.topic))
+            self._stats["similar" if best is not None else "miss"] += 1
+        return best
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "topics": len(self._entries), "threshold": self.threshold}
+
+topic_index = TopicIndex()